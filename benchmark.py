@@ -0,0 +1,319 @@
+# benchmark.py
+"""
+    Нагрузочный прогон всего пайплайна на синтетической панели.
+
+    Этапы (как в main, но без клика, кэшей и файлов отчёта):
+        1. load      - синтетический факт -> InMemoryFactSource -> длинный датафрейм
+        2. features  - календарные признаки
+        3. backtest  - сетка бэктестов (run_backtest_grid)
+        4. policy    - выбор лучшей модели/окна (build_summary_tables)
+        5. forecast  - прогноз текущего месяца по policy
+
+    Отчёт: общее время, время по этапам, пиковый RSS (текущий процесс + процессы пула).
+
+    Режим --import-time: холодный импорт модулей (каждый замер - новый процесс, как процесс пула spawn),
+    медиана по --repeats запускам: время, пиковый RSS и какие тяжёлые библиотеки моделей подгрузились.
+
+    Пример:
+        python benchmark.py --series 200 --days 1095 --windows 60 90 --backtest-dates 3 --workers 8
+        python benchmark.py --series 20 --json bench_results.json   # дописывает строку в историю
+        python benchmark.py --import-time                           # модули IMPORT_TIME_MODULES
+        python benchmark.py --import-time forecast.models_registry --repeats 9
+"""
+
+import argparse
+import contextlib
+import datetime as dt
+import io
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+import pandas as pd
+
+from data.load_raw_fact_data import load_and_prepare_long_df, FACT_METRIC_COLUMNS
+from data.series_store import SeriesStore
+from data.sources import InMemoryFactSource
+from data.synthetic_panel import generate_synthetic_fact, synthetic_holidays, synthetic_pairs
+from evaluation.parallel_backtests import run_backtest_grid
+from evaluation.summary_report_metrics import build_summary_tables
+from features.calendar_features import add_calendar_features
+from forecast.policy_month_forecast import forecast_current_month_by_policy
+from utils.finish_formating_dframe import long_to_wide_forecast
+
+# модули, импорт которых платит каждый процесс пула / запуск main
+IMPORT_TIME_MODULES = ["forecast.models_registry", "evaluation.parallel_backtests", "main"]
+
+# библиотеки моделей, которые не должны грузиться без моделей, которым они нужны
+HEAVY_LIBRARIES = ["catboost", "lightgbm", "xgboost", "sklearn", "statsmodels"]
+
+# выполняется в новом процессе: время импорта, пиковый RSS в КБ и тяжёлые библиотеки.
+# В Linux ru_maxrss переживает exec (в нём и RSS родителя-бенчмарка), поэтому RSS - из VmHWM
+_IMPORT_PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+__import__(sys.argv[1])
+seconds = time.perf_counter() - start
+try:
+    with open("/proc/self/status") as f:
+        maxrss_kb = next(int(line.split()[1]) for line in f if line.startswith("VmHWM:"))
+except OSError:
+    maxrss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 if sys.platform == "darwin" else 1)
+print(json.dumps({
+    "SEC": seconds,
+    "MAXRSS_KB": maxrss_kb,
+    "HEAVY": sorted(name for name in sys.argv[2:] if name in sys.modules),
+}))
+"""
+
+
+def parse_args(argv=None):
+
+    parser = argparse.ArgumentParser(description="Бенчмарк пайплайна на синтетической панели")
+
+    parser.add_argument("--series", type=int, default=20, help="число связок FULL_SIGN")
+    parser.add_argument("--days", type=int, default=730, help="дней истории")
+    parser.add_argument("--metrics", type=int, default=len(FACT_METRIC_COLUMNS),
+                        help="сколько метрик факта прогонять (первые N)")
+    parser.add_argument("--windows", type=int, nargs="+", default=[60], help="окна обучения")
+    parser.add_argument("--backtest-dates", type=int, default=2,
+                        help="число дат бэктеста (1-е числа месяцев перед месяцем прогноза)")
+    parser.add_argument("--models", nargs="+", default=["BASELINE_OLS"], help="модели бэктеста")
+    parser.add_argument("--forecast-date", default="2025-12-10", help="дата старта прогноза")
+    parser.add_argument("--workers", type=int, default=1, help="процессов бэктеста")
+    parser.add_argument("--threads", type=int, default=1, help="потоков модели на процесс")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--verbose", action="store_true", help="не глушить вывод пайплайна")
+    parser.add_argument("--json", default=None, help="файл истории замеров (дописывается)")
+    parser.add_argument("--import-time", nargs="*", default=None, metavar="MODULE",
+                        help="замер холодного импорта модулей вместо пайплайна (без списка - IMPORT_TIME_MODULES)")
+    parser.add_argument("--repeats", type=int, default=5, help="запусков на модуль в режиме --import-time")
+
+    return parser.parse_args(argv)
+
+
+def peak_rss_mb() -> dict:
+    """
+        Пиковый RSS в МБ: текущий процесс и самый "тяжёлый" завершённый дочерний (пул бэктеста).
+        ru_maxrss в Linux - КБ, в macOS - байты.
+    """
+
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+
+    return {
+        "SELF": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+        "CHILDREN": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale,
+    }
+
+
+def run_benchmark(args) -> dict:
+
+    forecast_start_date = pd.Timestamp(args.forecast_date)
+    month_start = forecast_start_date.replace(day=1)
+
+    backtest_dates = [
+        month_start - pd.DateOffset(months=i)
+        for i in range(args.backtest_dates, 0, -1)
+    ]
+
+    metrics = FACT_METRIC_COLUMNS[:args.metrics]
+
+    stages = {}
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+
+    started = time.perf_counter()
+
+    with quiet:
+
+        # ---- 1. факт ----
+        t0 = time.perf_counter()
+
+        fact_df = generate_synthetic_fact(
+            n_series=args.series,
+            n_days=args.days,
+            end_date=forecast_start_date - pd.Timedelta(days=1),
+            seed=args.seed
+        )
+
+        long_df = load_and_prepare_long_df(
+            source=InMemoryFactSource(fact_df),
+            subspecies_kp=synthetic_pairs(fact_df),
+            subspecies_td=[],
+            start_date=forecast_start_date,
+            count_hist_dates=args.days
+        )
+
+        stages["load"] = time.perf_counter() - t0
+
+        # ---- 2. календарные признаки ----
+        t0 = time.perf_counter()
+
+        df_w_features = add_calendar_features(
+            long_df,
+            holidays=synthetic_holidays(long_df["DDATE"].min(), long_df["DDATE"].max())
+        )
+
+        series_store = SeriesStore(df_w_features)
+
+        stages["features"] = time.perf_counter() - t0
+
+        # ---- 3. бэктест ----
+        t0 = time.perf_counter()
+
+        final_report = run_backtest_grid(
+            df=series_store,
+            full_signs=df_w_features["FULL_SIGN"].unique().tolist(),
+            metrics=metrics,
+            train_windows=args.windows,
+            backtest_dates=backtest_dates,
+            models_to_run=args.models,
+            n_workers=args.workers,
+            threads_per_worker=args.threads,
+            cache_file=None
+        )
+
+        stages["backtest"] = time.perf_counter() - t0
+
+        # ---- 4. policy ----
+        t0 = time.perf_counter()
+
+        policy_df = build_summary_tables(
+            report_df=final_report,
+            models_check_wmape=args.models
+        )["BEST_MODEL_POLICY"]
+
+        stages["policy"] = time.perf_counter() - t0
+
+        # ---- 5. прогноз текущего месяца ----
+        t0 = time.perf_counter()
+
+        forecast_long = forecast_current_month_by_policy(
+            df=series_store,
+            policy_df=policy_df,
+            forecast_start_date=forecast_start_date
+        )
+        long_to_wide_forecast(forecast_long)
+
+        stages["forecast"] = time.perf_counter() - t0
+
+    return {
+        "RUN_DATE": dt.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "SERIES": args.series,
+        "DAYS": args.days,
+        "METRICS": len(metrics),
+        "WINDOWS": args.windows,
+        "BACKTEST_DATES": len(backtest_dates),
+        "MODELS": args.models,
+        "WORKERS": args.workers,
+        "THREADS": args.threads,
+        "BACKTEST_CELLS": len(final_report),
+        "WALL_SEC": time.perf_counter() - started,
+        "STAGES_SEC": stages,
+        "PEAK_RSS_MB": peak_rss_mb(),
+    }
+
+
+def measure_import_time(modules: list[str], repeats: int = 5) -> dict:
+    """
+        Холодный импорт каждого модуля в новом процессе (медиана по repeats запускам).
+
+        :return: {"IMPORT_TIME": {модуль: {"SEC", "RSS_MB", "HEAVY"}}, "REPEATS": repeats}
+    """
+
+    root = os.path.dirname(os.path.abspath(__file__))
+
+    import_time = {}
+
+    for module in modules:
+        runs = []
+
+        for _ in range(max(repeats, 1)):
+            completed = subprocess.run(
+                [sys.executable, "-c", _IMPORT_PROBE, module, *HEAVY_LIBRARIES],
+                cwd=root,
+                capture_output=True,
+                text=True,
+                check=True
+            )
+            # импортируемый модуль может печатать - замер в последней строке
+            runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+        import_time[module] = {
+            "SEC": statistics.median(run["SEC"] for run in runs),
+            "RSS_MB": statistics.median(run["MAXRSS_KB"] for run in runs) / 1024,
+            "HEAVY": runs[-1]["HEAVY"],
+        }
+
+    return {
+        "RUN_DATE": dt.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "IMPORT_TIME": import_time,
+        "REPEATS": repeats,
+    }
+
+
+def print_import_time(result: dict):
+
+    print(f"\n✅ Холодный импорт, медиана {result['REPEATS']} запусков:")
+
+    for module, stats in result["IMPORT_TIME"].items():
+        heavy = ", ".join(stats["HEAVY"]) or "-"
+        print(f"   {module:<32} {stats['SEC']:6.2f} c {stats['RSS_MB']:6.0f} МБ   библиотеки моделей: {heavy}")
+
+
+def print_result(result: dict):
+
+    print(
+        f"\n✅ Бенчмарк: {result['SERIES']} связок × {result['METRICS']} метрик × {result['DAYS']} дней, "
+        f"окна {result['WINDOWS']}, дат бэктеста {result['BACKTEST_DATES']}, модели {result['MODELS']}, "
+        f"процессов {result['WORKERS']}"
+    )
+
+    for stage, seconds in result["STAGES_SEC"].items():
+        print(f"   {stage:<10} {seconds:10.2f} c")
+
+    print(f"   {'ИТОГО':<10} {result['WALL_SEC']:10.2f} c")
+
+    print(
+        f"   пиковый RSS: процесс {result['PEAK_RSS_MB']['SELF']:.0f} МБ, "
+        f"процесс пула {result['PEAK_RSS_MB']['CHILDREN']:.0f} МБ"
+    )
+
+
+def append_result_json(result: dict, filename: str):
+
+    records = []
+
+    if os.path.exists(filename):
+        with open(filename, "r", encoding="utf-8") as f:
+            content = f.read().strip()
+            records = json.loads(content) if content else []
+
+    records.append(result)
+
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(records, f, ensure_ascii=False, indent=4)
+
+
+def main(argv=None):
+
+    args = parse_args(argv)
+
+    if args.import_time is not None:
+        result = measure_import_time(args.import_time or IMPORT_TIME_MODULES, args.repeats)
+        print_import_time(result)
+
+    else:
+        result = run_benchmark(args)
+        print_result(result)
+
+    if args.json:
+        append_result_json(result, args.json)
+        print(f"   замер дописан в {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,496 @@
+# cli.py
+"""
+    Пайплайн по этапам (main() делает всё подряд, здесь каждый этап можно запустить отдельно).
+
+    Этапы (в порядке пайплайна):
+        load      - факт из источника (DATA_SOURCE) -> длинный датафрейм
+        features  - календарные признаки
+        backtest  - сетка бэктестов (final_report)
+        policy    - Excel-отчёт и выбор лучшей модели/окна (хранилище POLICY_FILE + снимок текущей policy)
+        forecast  - прогноз текущего месяца по policy
+        plot      - графики policy
+
+    Каждый этап пишет версионированный артефакт (utils/stage_artifacts.py, STAGE_ARTIFACT_DIR),
+    следующий этап читает его с диска. Этап пропускается, если хэши его входов
+    (артефакты предыдущих этапов, настройки, версия кода) не изменились; --force - пересчитать.
+
+    forecast и plot берут policy из артефакта этапа policy, а если его нет - текущую policy из POLICY_FILE,
+    поэтому утренний прогноз по уже выбранной policy не требует бэктеста:
+
+        python cli.py load features forecast
+        python cli.py backtest policy          # после load / features
+        python cli.py all                      # всё подряд, как main.py
+"""
+
+import argparse
+import glob
+import hashlib
+import os
+import re
+
+import pandas as pd
+
+from config.setting import (
+    MODELS_TO_RUN,
+    TRAIN_WINDOWS,
+    BACKTEST_DATES,
+    SELECTION_MODE,
+    RACING_FIRST_DATES,
+    RACING_DROP_FRACTION,
+    BACKTEST_N_WORKERS,
+    MODEL_THREADS_PER_WORKER,
+    PLOT_N_WORKERS,
+    PLOT_SKIP_UNCHANGED,
+    POLICY_FORECAST_N_WORKERS,
+    POLICY_FORECAST_ROW_TIMEOUT,
+    POLICY_FORECAST_FALLBACK_MODEL,
+    BACKTEST_CACHE_FILE,
+    MODEL_ARTIFACT_DIR,
+    MODEL_ARTIFACT_MAX_MB,
+    EARLY_STOPPING_VALIDATION_DAYS,
+    EARLY_STOPPING_REUSE_ITERATIONS,
+    STAGE_ARTIFACT_DIR,
+    STAGE_ARTIFACT_KEEP,
+    START_FORECAST_DATE,
+    MAX_HISTORY_DAYS,
+    KP_DISTR_PAIRS,
+    TD_PAIRS,
+    METRICS,
+    CLICKHOUSE_BULK_LOAD,
+    DATA_SOURCE,
+    DATA_SOURCE_PATH,
+    FACT_CACHE_DIR,
+    FACT_CACHE_RECHECK_DAYS,
+    FACT_CACHE_FORCE_REFRESH,
+    FACT_CACHE_OFFLINE,
+    POLICY_FILE,
+    POLICY_JSON_FILE,
+    EXCEL_REPORT_FILE
+)
+from data.series_store import SeriesStore
+from evaluation.backtest_cache import compute_code_version
+from evaluation.policy_store import PolicyStore, migrate_policy_json
+from models.artifact_store import configure_artifact_store
+from models.early_stopping import configure_early_stopping, early_stopping_signature
+from utils.pandas_setting import setup_pandas_display
+from utils.stage_artifacts import StageArtifactStore
+
+STAGES = ["load", "features", "backtest", "policy", "forecast", "plot"]
+
+# код выгрузки факта (источники, кэш факта, схема) - вход этапа load
+_LOAD_CODE_PATHS = ("data",)
+
+
+def _require(store: StageArtifactStore, stage: str) -> dict:
+    # артефакт предыдущего этапа обязателен
+    manifest = store.latest(stage)
+
+    if manifest is None:
+        raise SystemExit(f"❌ Нет артефакта этапа {stage}: сначала python cli.py {stage}")
+
+    return manifest
+
+
+def _read_frame(manifest: dict) -> pd.DataFrame:
+
+    df = pd.read_parquet(manifest["PATH"])
+    df["DDATE"] = df["DDATE"].astype("datetime64[ns]")
+
+    return df
+
+
+def _write_policy_snapshot(policy_df: pd.DataFrame, path: str):
+    # снимок текущей policy (строки по связкам) - стабильный JSON, хэш зависит только от содержимого
+    policy_df.to_json(path, orient="records", date_format="iso", force_ascii=False, indent=4)
+
+
+def _read_policy_snapshot(path: str) -> pd.DataFrame:
+
+    policy_df = pd.read_json(path, orient="records")
+    policy_df["RUN_DATE"] = pd.to_datetime(policy_df["RUN_DATE"])
+
+    return policy_df
+
+
+def _policy_source(store: StageArtifactStore) -> tuple[pd.DataFrame, str]:
+    """
+        Policy для прогноза и графиков: артефакт этапа policy, иначе текущая policy из POLICY_FILE.
+
+        :return: (policy по связкам, хэш содержимого)
+    """
+
+    manifest = store.latest("policy")
+
+    if manifest is not None:
+        return _read_policy_snapshot(manifest["PATH"]), manifest["OUTPUT_HASH"]
+
+    policy_store = PolicyStore(POLICY_FILE)
+
+    try:
+        policy_df = policy_store.latest_policy()
+    finally:
+        policy_store.close()
+
+    if policy_df.empty:
+        raise SystemExit(f"❌ Нет policy: сначала python cli.py backtest policy (хранилище {POLICY_FILE} пустое)")
+
+    policy_json = policy_df.to_json(orient="records", date_format="iso", force_ascii=False)
+
+    return policy_df, hashlib.sha256(policy_json.encode()).hexdigest()
+
+
+def _files_state(paths: list[str]) -> list[tuple]:
+    # (файл, размер, mtime) по файлам и каталогам (рекурсивно)
+    files = []
+
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(
+                os.path.join(dir_path, name)
+                for dir_path, _, file_names in os.walk(path)
+                for name in file_names
+            )
+        elif os.path.exists(path):
+            files.append(path)
+
+    return [
+        (file, os.path.getsize(file), os.stat(file).st_mtime_ns)
+        for file in sorted(files)
+    ]
+
+
+def _fact_source_state() -> list[tuple] | None:
+    """
+        Состояние факта, который прочитает этап load: размеры и mtime его файлов.
+
+        :return: None, если состояние не видно с диска (клик, таблица DuckDB) - тогда load запускается всегда,
+                 а следующие этапы всё равно пропускаются, если факт не изменился (OUTPUT_HASH тот же)
+    """
+
+    # offline: факт - только локальный кэш (этап его не дописывает)
+    if FACT_CACHE_OFFLINE:
+        return _files_state([FACT_CACHE_DIR])
+
+    if DATA_SOURCE == "file":
+        return _files_state([DATA_SOURCE_PATH])
+
+    if DATA_SOURCE == "duckdb":
+        # файлы из выражения, например read_parquet('fact/*.parquet')
+        patterns = re.findall(r"'([^']+)'", DATA_SOURCE_PATH or "")
+
+        if patterns:
+            return _files_state([file for pattern in patterns for file in sorted(glob.glob(pattern))])
+
+    return None
+
+
+# =========================================================
+# ✅ Этапы
+# =========================================================
+def stage_load(store: StageArtifactStore, force: bool = False) -> dict:
+
+    from data.load_raw_fact_data import load_and_prepare_long_df
+    from data.sources import create_fact_source
+
+    # входы - настройки выгрузки, состояние файлов факта и код выгрузки
+    source_state = _fact_source_state()
+
+    inputs = {
+        "source": DATA_SOURCE,
+        "path": DATA_SOURCE_PATH,
+        "source_state": source_state,
+        "offline": FACT_CACHE_OFFLINE,
+        "bulk": CLICKHOUSE_BULK_LOAD,
+        "pairs": KP_DISTR_PAIRS + TD_PAIRS,
+        "start_date": START_FORECAST_DATE,
+        "history_days": MAX_HISTORY_DAYS,
+        "code": compute_code_version(_LOAD_CODE_PATHS),
+    }
+
+    def build(path):
+        long_df = load_and_prepare_long_df(
+            source=create_fact_source(
+                kind=DATA_SOURCE,
+                path=DATA_SOURCE_PATH,
+                bulk=CLICKHOUSE_BULK_LOAD
+            ),
+            subspecies_kp=KP_DISTR_PAIRS,
+            subspecies_td=TD_PAIRS,
+            start_date=START_FORECAST_DATE,
+            count_hist_dates=MAX_HISTORY_DAYS,
+            cache_dir=FACT_CACHE_DIR,
+            recheck_days=FACT_CACHE_RECHECK_DAYS,
+            force_refresh=FACT_CACHE_FORCE_REFRESH or force,
+            offline=FACT_CACHE_OFFLINE
+        )
+
+        long_df.to_parquet(path, index=False)
+
+    # факт клика (поздние корректировки за тот же день) с диска не виден - выгрузка каждый раз,
+    # кэш факта делает её инкрементальной
+    return store.run("load", inputs, build, ".parquet", force or source_state is None)
+
+
+def stage_features(store: StageArtifactStore, force: bool = False) -> dict:
+
+    from data.calendar_days import HOLIDAYS
+    from features.calendar_features import add_calendar_features
+
+    load_manifest = _require(store, "load")
+
+    inputs = {
+        "load": load_manifest["OUTPUT_HASH"],
+        "holidays": sorted(str(day) for day in HOLIDAYS),
+        "code": compute_code_version(),
+    }
+
+    def build(path):
+        df_w_features = add_calendar_features(
+            _read_frame(load_manifest),
+            holidays=HOLIDAYS
+        )
+
+        df_w_features.to_parquet(path, index=False)
+
+    return store.run("features", inputs, build, ".parquet", force)
+
+
+def stage_backtest(store: StageArtifactStore, force: bool = False) -> dict:
+
+    from evaluation.racing_selection import run_model_selection
+
+    features_manifest = _require(store, "features")
+
+    inputs = {
+        "features": features_manifest["OUTPUT_HASH"],
+        "models": MODELS_TO_RUN,
+        "windows": TRAIN_WINDOWS,
+        "backtest_dates": BACKTEST_DATES,
+        "metrics": METRICS,
+        "selection": [SELECTION_MODE, RACING_FIRST_DATES, RACING_DROP_FRACTION],
+        "early_stopping": early_stopping_signature(),
+        "code": compute_code_version(),
+    }
+
+    def build(path):
+        df_w_features = _read_frame(features_manifest)
+
+        final_report = run_model_selection(
+            selection_mode=SELECTION_MODE,
+            first_dates=RACING_FIRST_DATES,
+            drop_fraction=RACING_DROP_FRACTION,
+            df=SeriesStore(df_w_features),
+            full_signs=df_w_features["FULL_SIGN"].dropna().unique().tolist(),
+            metrics=METRICS,
+            train_windows=TRAIN_WINDOWS,
+            backtest_dates=BACKTEST_DATES,
+            models_to_run=MODELS_TO_RUN,
+            n_workers=BACKTEST_N_WORKERS,
+            threads_per_worker=MODEL_THREADS_PER_WORKER,
+            cache_file=BACKTEST_CACHE_FILE
+        )
+
+        print("\n✅ Итоговый отчёт:")
+        print(final_report)
+
+        final_report.to_parquet(path, index=False)
+
+    return store.run("backtest", inputs, build, ".parquet", force)
+
+
+def stage_policy(store: StageArtifactStore, force: bool = False) -> dict:
+
+    from evaluation.summary_report_metrics import export_report_excel_n_dump_policy
+
+    features_manifest = _require(store, "features")
+    backtest_manifest = _require(store, "backtest")
+
+    inputs = {
+        "features": features_manifest["OUTPUT_HASH"],
+        "backtest": backtest_manifest["OUTPUT_HASH"],
+        "models": MODELS_TO_RUN,
+    }
+
+    def build(path):
+        # POLICY_FILE - история всех запусков (policy дописывается), артефакт - снимок текущей policy
+        export_report_excel_n_dump_policy(
+            report_df=pd.read_parquet(backtest_manifest["PATH"]),
+            models_list=MODELS_TO_RUN,
+            file_policy=POLICY_FILE,
+            filename_for_report=EXCEL_REPORT_FILE,
+            forecast_store_file=BACKTEST_CACHE_FILE,
+            df=SeriesStore(_read_frame(features_manifest))
+        )
+
+        policy_store = PolicyStore(POLICY_FILE)
+
+        try:
+            _write_policy_snapshot(policy_store.latest_policy(), path)
+        finally:
+            policy_store.close()
+
+    return store.run("policy", inputs, build, ".json", force)
+
+
+def stage_forecast(store: StageArtifactStore, force: bool = False) -> dict:
+
+    from forecast.policy_month_forecast import run_policy_current_month_forecast
+
+    features_manifest = _require(store, "features")
+    policy_df, policy_hash = _policy_source(store)
+
+    inputs = {
+        "features": features_manifest["OUTPUT_HASH"],
+        "policy": policy_hash,
+        "start_date": START_FORECAST_DATE,
+        "fallback_model": POLICY_FORECAST_FALLBACK_MODEL,
+        "early_stopping": early_stopping_signature(),
+        "code": compute_code_version(),
+    }
+
+    def build(path):
+        finish_forecast_df, forecast_models = run_policy_current_month_forecast(
+            df=SeriesStore(_read_frame(features_manifest)),
+            policy_file=POLICY_FILE,
+            forecast_start_date=START_FORECAST_DATE,
+            policy_df=policy_df,
+            n_workers=POLICY_FORECAST_N_WORKERS,
+            threads_per_worker=MODEL_THREADS_PER_WORKER,
+            row_timeout=POLICY_FORECAST_ROW_TIMEOUT,
+            fallback_model=POLICY_FORECAST_FALLBACK_MODEL
+        )
+
+        # модель, фактически посчитавшая связку (fallback вместо модели policy) - рядом с прогнозом метрики
+        model_columns = (
+            forecast_models
+            .pivot(index="FULL_SIGN", columns="METRIC_NAME", values="FORECAST_MODEL")
+            .add_suffix("_FORECAST_MODEL")
+            .reset_index()
+        )
+
+        finish_forecast_df.merge(model_columns, on="FULL_SIGN", how="left").to_parquet(path, index=False)
+
+    return store.run("forecast", inputs, build, ".parquet", force)
+
+
+def stage_plot(store: StageArtifactStore, force: bool = False) -> dict:
+
+    from plots_tables.policy_plots_backtests import PLOTS_MANIFEST_FILE, PLOTS_SAVE_DIR, plot_policy_backtests
+
+    features_manifest = _require(store, "features")
+    policy_df, policy_hash = _policy_source(store)
+
+    # графики берут дневные прогнозы из кэша бэктеста -> от артефакта backtest (если он есть)
+    backtest_manifest = store.latest("backtest")
+
+    inputs = {
+        "features": features_manifest["OUTPUT_HASH"],
+        "policy": policy_hash,
+        "backtest": None if backtest_manifest is None else backtest_manifest["OUTPUT_HASH"],
+        "backtest_dates": BACKTEST_DATES,
+        "code": compute_code_version(),
+    }
+
+    def build(path):
+        plot_policy_backtests(
+            df=SeriesStore(_read_frame(features_manifest)),
+            policy_df=policy_df,
+            backtest_dates=BACKTEST_DATES,
+            forecast_store_file=BACKTEST_CACHE_FILE,
+            save_dir=PLOTS_SAVE_DIR,
+            n_workers=PLOT_N_WORKERS,
+            skip_unchanged=PLOT_SKIP_UNCHANGED
+        )
+
+        # артефакт этапа - список графиков (сами PNG в PLOTS_SAVE_DIR)
+        files = sorted(name for name in os.listdir(PLOTS_SAVE_DIR) if name != PLOTS_MANIFEST_FILE)
+
+        pd.Series(files, name="FILE").to_json(path)
+
+    return store.run("plot", inputs, build, ".json", force)
+
+
+STAGE_FUNCS = {
+    "load": stage_load,
+    "features": stage_features,
+    "backtest": stage_backtest,
+    "policy": stage_policy,
+    "forecast": stage_forecast,
+    "plot": stage_plot,
+}
+
+
+def parse_args(argv=None):
+
+    parser = argparse.ArgumentParser(description="Этапы пайплайна прогноза (артефакты в STAGE_ARTIFACT_DIR)")
+
+    parser.add_argument(
+        "stages", nargs="+", choices=STAGES + ["all"],
+        help="этапы (выполняются в порядке пайплайна): " + " ".join(STAGES) + " | all"
+    )
+    parser.add_argument("--force", action="store_true", help="пересчитать этапы, даже если входы не изменились")
+    parser.add_argument("--artifact-dir", default=STAGE_ARTIFACT_DIR, help="каталог артефактов этапов")
+    parser.add_argument(
+        "--invalidate-fact-cache", nargs="*", metavar="FULL_SIGN", default=None,
+        help="сбросить кэш факта FACT_CACHE_DIR перед этапами (без FULL_SIGN - весь кэш)"
+    )
+
+    return parser.parse_args(argv)
+
+
+def run_stages(
+        stages: list[str],
+        artifact_dir: str = STAGE_ARTIFACT_DIR,
+        force: bool = False,
+        invalidate_fact_cache: list[str] | None = None
+) -> dict:
+    """
+        Выполняет этапы в порядке пайплайна.
+
+        :param invalidate_fact_cache: сбросить кэш факта перед этапами ([] - весь кэш, список FULL_SIGN - только их)
+        :return: {этап: манифест артефакта}
+    """
+
+    setup_pandas_display()
+
+    if invalidate_fact_cache is not None and FACT_CACHE_DIR:
+        from data.fact_cache import invalidate_fact_cache as drop_fact_cache
+
+        drop_fact_cache(FACT_CACHE_DIR, full_signs=invalidate_fact_cache or None)
+        print(f"✅ Кэш факта {FACT_CACHE_DIR} сброшен: {', '.join(invalidate_fact_cache) or 'все связки'}")
+
+    # ✅ те же настройки процесса, что в main
+    configure_artifact_store(
+        root_dir=MODEL_ARTIFACT_DIR,
+        max_mb=MODEL_ARTIFACT_MAX_MB
+    )
+
+    configure_early_stopping(
+        validation_days=EARLY_STOPPING_VALIDATION_DAYS,
+        reuse_iterations=EARLY_STOPPING_REUSE_ITERATIONS
+    )
+
+    # ✅ старый policy JSON -> хранилище policy (один раз)
+    migrate_policy_json(POLICY_FILE, POLICY_JSON_FILE)
+
+    store = StageArtifactStore(artifact_dir, keep=STAGE_ARTIFACT_KEEP)
+
+    selected = STAGES if "all" in stages else [stage for stage in STAGES if stage in stages]
+
+    return {stage: STAGE_FUNCS[stage](store, force) for stage in selected}
+
+
+def main(argv=None):
+
+    args = parse_args(argv)
+
+    run_stages(
+        args.stages,
+        artifact_dir=args.artifact_dir,
+        force=args.force,
+        invalidate_fact_cache=args.invalidate_fact_cache
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 # config/settings.py
 
 ''' Файл с параметрами применямыми к модели '''
+import os
 import pandas as pd
 import datetime as dt
 
@@ -18,11 +19,44 @@ TRAIN_WINDOWS = [60, 90, 120]
 # =========================================
 # OUTPUT FILES:
 # 1. Сохранение найденных лучшего окна и модели для метрики + канала продаж
+#    (SQLite: история запусков + текущая policy по связкам, evaluation/policy_store.py)
 # 2. Формирование excel отчета для анализа.
 # =========================================
-POLICY_FILE = 'policy_model.json'
+POLICY_FILE = 'policy_store.sqlite'
+# Старый policy JSON: при запуске один раз переносится в POLICY_FILE (файл не меняется)
+POLICY_JSON_FILE = 'policy_model.json'
 EXCEL_REPORT_FILE = 'forecast_report.xlsx'
 
+# =========================================
+# Кэш ячеек бэктеста (прогноз + метрики). Повторный прогон считает только новые ячейки.
+# None -> без кэша
+# =========================================
+BACKTEST_CACHE_FILE = 'backtest_cache.sqlite'
+
+# =========================================
+# Хранилище обученных моделей: графики и прогноз по policy не переобучают модели,
+# уже обученные на тех же данных. Размер ограничен (старые модели вытесняются, LRU)
+# None -> модели всегда обучаются заново
+# =========================================
+MODEL_ARTIFACT_DIR = 'model_artifacts'
+MODEL_ARTIFACT_MAX_MB = 2048
+
+# =========================================
+# Артефакты этапов cli.py (load / features / backtest / policy / forecast / plot):
+# этап пропускается, если его входы не изменились. Хранится STAGE_ARTIFACT_KEEP последних версий этапа
+# =========================================
+STAGE_ARTIFACT_DIR = 'stage_artifacts'
+STAGE_ARTIFACT_KEEP = 3
+
+# =========================================
+# Ранняя остановка бустингов (CatBoost / LightGBM / XGBoost): последние N дней train-окна - валидация,
+# затем переобучение на всём окне с найденным числом итераций. None -> все итерации из параметров модели
+# EARLY_STOPPING_REUSE_ITERATIONS - найденное число итераций переиспользуется для следующих обучений связки
+# (результат зависит от порядка обучений, а WMAPE ячеек пишутся в кэш бэктеста - по умолчанию выключено)
+# =========================================
+EARLY_STOPPING_VALIDATION_DAYS = None  # например 14
+EARLY_STOPPING_REUSE_ITERATIONS = False
+
 # =============================================================================
 # МОДЕЛИ ДЛЯ BACKTEST. По каким будут бэктесты проводиться на выбор лучшей ?
 # =============================================================================
@@ -33,12 +67,36 @@ MODELS_TO_RUN = [
     # "BASELINE_HOLT_WINTERS",
     "BASELINE_RF",
     "CATBOOST_RECURSIVE",
+    # "CATBOOST_RECURSIVE_ONE_FIT",
     #"CATBOOST_DIRECT",
     #"LIGHTGBM_DIRECT",
     # "LIGHTGBM_RECURSIVE",
+    # "LIGHTGBM_RECURSIVE_ONE_FIT",
     # "XGB_DIRECT"
 ]
 
+# =============================================================================
+# Параллельный бэктест: сколько процессов и сколько потоков у модели в каждом процессе
+# (BACKTEST_N_WORKERS = 1 -> последовательно в текущем процессе, модели на всех ядрах)
+# =============================================================================
+BACKTEST_N_WORKERS = os.cpu_count() or 1
+MODEL_THREADS_PER_WORKER = 1
+
+# =============================================================================
+# Графики policy (backtests_plots_policy_daily): сколько процессов рисуют PNG
+# и не перерисовывать графики, входы которых не изменились с прошлого запуска
+# =============================================================================
+PLOT_N_WORKERS = os.cpu_count() or 1
+PLOT_SKIP_UNCHANGED = True
+
+# =============================================================================
+# Прогноз текущего месяца по policy: процессов на строки policy (потоков модели - MODEL_THREADS_PER_WORKER),
+# таймаут строки (секунд, None -> без ограничения) и модель, которой считается упавшая / зависшая строка
+# =============================================================================
+POLICY_FORECAST_N_WORKERS = os.cpu_count() or 1
+POLICY_FORECAST_ROW_TIMEOUT = 1800
+POLICY_FORECAST_FALLBACK_MODEL = "BASELINE_OLS"
+
 BACKTEST_DATES = [
     # pd.Timestamp("2025-08-01"),
     # pd.Timestamp("2025-08-10"),
@@ -57,6 +115,17 @@ BACKTEST_DATES = [
     pd.Timestamp("2025-12-20"),
 ]
 
+# =============================================================================
+# Выбор модели и окна:
+#   "grid"   - полная сетка MODELS_TO_RUN × TRAIN_WINDOWS × BACKTEST_DATES
+#   "racing" - гонка на выбывание (evaluation/racing_selection.py): все кандидаты (модель, окно)
+#              на первых RACING_FIRST_DATES датах, после каждого раунда выбывает худшая доля
+#              RACING_DROP_FRACTION кандидатов связки, оставшиеся считаются на следующих датах
+# =============================================================================
+SELECTION_MODE = "grid"
+RACING_FIRST_DATES = 2
+RACING_DROP_FRACTION = 0.5
+
 # Какие каналы прогоняем (дистры плоховато прогнозируются, пока не разбирался почему). Каналы КП и ТД можно взять
 KP_DISTR_PAIRS = [
     ("КП РЕГИОН А", "БЕЗ ИРИС"),
@@ -72,6 +141,23 @@ TD_PAIRS = [
     # ("РСС", "БЕЗ ИРИС"),
     ]
 
+# Загрузка факта из клика: True - один запрос на все связки, False - старый цикл (запрос на каждую связку)
+CLICKHOUSE_BULK_LOAD = True
+
+# Источник факта: "clickhouse" | "file" (Parquet/CSV) | "duckdb"
+DATA_SOURCE = "clickhouse"
+# Для file - путь к файлу факта, для duckdb - таблица или выражение (например "read_parquet('fact/*.parquet')")
+DATA_SOURCE_PATH = None
+
+# Локальный кэш факта (Parquet по FULL_SIGN). None -> каждый раз полная выгрузка из клика
+FACT_CACHE_DIR = 'fact_cache'
+# Сколько последних уже закэшированных дней перезапрашивать (поздние корректировки факта)
+FACT_CACHE_RECHECK_DAYS = 3
+# Полная перезагрузка кэша
+FACT_CACHE_FORCE_REFRESH = False
+# Работа полностью offline: только из кэша, без подключения к клику
+FACT_CACHE_OFFLINE = False
+
 # Какие таргеты прогнозируем
 METRICS = [
     "SUM_SNDS",
@@ -1,11 +1,13 @@
 # data/clickhouse.py
-import clickhouse_connect
 import pandas as pd
 import datetime as dt
 
 ''' Подключение к клику и выгрузка датафреймов '''
 
 def create_clickhouse_connect():
+    # драйвер нужен только для реального подключения (локальные прогоны/тесты работают без него)
+    import clickhouse_connect
+
     client = clickhouse_connect.get_client(
         host='CLICK',
         username='USER',
@@ -157,4 +159,170 @@ def get_fact_data(
             cal.DDATE ASC
     ''')  # noqa: E501
 
-    return data
\ No newline at end of file
+    return data
+
+# ============== Датафрейм с фактом по ВСЕМ связкам канал + признак одним запросом ====================================|
+def get_fact_data_bulk(
+    client,
+    subspecies_kp: list[tuple[str, str]],
+    subspecies_td: list[tuple[str, str]],
+    start_date: dt.date,
+    count_hist_fact_dates: int,
+) -> pd.DataFrame:
+    '''
+        Возвращает Датафрейм с фактом сразу по всем связкам (канал, признак ИРИС) одним параметризованным запросом.
+
+        Вместо отдельного запроса get_fact_data / get_fact_data_tvoy_doctor на каждую связку:
+        - список связок передаётся параметром (Array(Tuple))
+        - календарь последних дней строится один раз и CROSS JOIN-ится со списком связок
+        - витрины КП (vitrina.FACT_KP_IRIS_NOIRIS) и ТД (opt_prod.OPT_BASE_FACT_TABLE) читаются по одному разу
+
+        Результат такой же, как pd.concat по связкам в старом цикле:
+        те же колонки, связки в порядке subspecies_kp + subspecies_td, внутри связки даты по возрастанию.
+        Календарь строится по номеру связки (PAIR_IDX), а факт (КП и ТД) уникален по (дата, канал, признак, витрина),
+        поэтому на каждый день связки приходится ровно одна строка — и при повторе связки в списке,
+        и при одном канале ТД с двумя признаками ИРИС.
+    '''
+
+    pairs = (
+        [(subspecial, iris_sign, 'KP') for subspecial, iris_sign in subspecies_kp] +
+        [(subspecial, iris_sign, 'TD') for subspecial, iris_sign in subspecies_td]
+    )
+
+    data = client.query_df(
+        '''
+            WITH
+            /* Все связки одним списком: (порядковый номер, канал, признак, витрина) */
+            pairs AS (
+                SELECT
+                    tupleElement(pair, 1) AS PAIR_IDX,
+                    tupleElement(pair, 2) AS SALES_SUBSPECIES,
+                    tupleElement(pair, 3) AS SIGN_IRIS,
+                    tupleElement(pair, 4) AS SOURCE
+                FROM (
+                    SELECT arrayJoin({pairs:Array(Tuple(UInt32, String, String, String))}) AS pair
+                )
+            ),
+            /* Календарь последних N дней, размноженный на все связки */
+            calendar AS (
+                SELECT
+                    toDate(addDays(toLastDayOfMonth({start_date:Date}), -n.number)) AS DDATE,
+                    p.PAIR_IDX AS PAIR_IDX,
+                    p.SALES_SUBSPECIES AS SALES_SUBSPECIES,
+                    p.SIGN_IRIS AS SIGN_IRIS,
+                    p.SOURCE AS SOURCE,
+                    concat(p.SALES_SUBSPECIES, ' ', p.SIGN_IRIS) AS FULL_SIGN
+                FROM numbers({count_hist_fact_dates:UInt32}) AS n
+                CROSS JOIN pairs AS p
+            ),
+            /* Факт КП РЕГИОН А/ Б + признак И/ БЕЗ И */
+            fact_kp AS (
+                SELECT
+                    DDATE,
+                    SALES_SUBSPECIES,
+                    SIGN_IRIS,
+                    'KP' AS SOURCE,
+                    ROUND(SUM(SUM_SNDS), 2) AS SUM_SNDS,
+                    ROUND(SUM(SUM_PROFIT), 2) AS SUM_PROFIT,
+                    ROUND(SUM(SUM_PROFIT_NO_KSP), 2) AS SUM_PROFIT_NO_KSP,
+                    ROUND(SUM(SUM_COST_NONDS_NO_KSP), 2) AS SUM_COST_NONDS_NO_KSP,
+                    ROUND(SUM(SUM_COST_SNDS_NO_KSP), 2) AS SUM_COST_SNDS_NO_KSP
+                FROM vitrina.FACT_KP_IRIS_NOIRIS
+                WHERE
+                    (SALES_SUBSPECIES, SIGN_IRIS) IN (
+                        SELECT SALES_SUBSPECIES, SIGN_IRIS FROM pairs WHERE SOURCE = 'KP'
+                    )
+                    AND DDATE > subtractDays({start_date:Date}, {count_hist_fact_dates:UInt32} + 1)
+                    AND DDATE <= addDays(
+                            date_trunc('month', {start_date:Date}) + INTERVAL 1 MONTH,
+                            -1
+                    )
+                GROUP BY
+                    DDATE,
+                    SALES_SUBSPECIES,
+                    SIGN_IRIS
+            ),
+            /* Факт по Реализации в ТД: группировка по каналу, признак берём из связки */
+            fact_td AS (
+                SELECT
+                    f.DDATE AS DDATE,
+                    f.SALES_SUBSPECIES AS SALES_SUBSPECIES,
+                    p.SIGN_IRIS AS SIGN_IRIS,
+                    'TD' AS SOURCE,
+                    f.SUM_SNDS AS SUM_SNDS,
+                    f.SUM_PROFIT AS SUM_PROFIT,
+                    f.SUM_PROFIT_NO_KSP AS SUM_PROFIT_NO_KSP,
+                    f.SUM_COST_NONDS_NO_KSP AS SUM_COST_NONDS_NO_KSP,
+                    f.SUM_COST_SNDS_NO_KSP AS SUM_COST_SNDS_NO_KSP
+                FROM (
+                    SELECT
+                        DDATE,
+                        SALES_SUBSPECIES,
+                        ROUND(SUM(SUM_SNDS), 2) AS SUM_SNDS,
+                        ROUND(SUM(SUM_PROFIT), 2) AS SUM_PROFIT,
+                        ROUND(SUM(SUM_PROFIT_NO_KSP), 2) AS SUM_PROFIT_NO_KSP,
+                        ROUND(SUM(SUM_COST_NONDS_NO_KSP), 2) AS SUM_COST_NONDS_NO_KSP,
+                        ROUND(SUM(SUM_COST_SNDS_NO_KSP), 2) AS SUM_COST_SNDS_NO_KSP
+                    FROM
+                        opt_prod.OPT_BASE_FACT_TABLE
+                    WHERE
+                        SALES_SUBSPECIES IN (SELECT SALES_SUBSPECIES FROM pairs WHERE SOURCE = 'TD')
+                        AND DDATE > subtractDays({start_date:Date}, {count_hist_fact_dates:UInt32})
+                        AND DDATE <= addDays(
+                                date_trunc('month', {start_date:Date}) + INTERVAL 1 MONTH,
+                                -1
+                        )
+                    GROUP BY
+                        DDATE,
+                        SALES_SUBSPECIES
+                ) AS f
+                /* DISTINCT: повтор связки в списке не размножает строки факта */
+                INNER JOIN (
+                    SELECT DISTINCT SALES_SUBSPECIES, SIGN_IRIS FROM pairs WHERE SOURCE = 'TD'
+                ) AS p ON f.SALES_SUBSPECIES = p.SALES_SUBSPECIES
+            ),
+            fact AS (
+                SELECT * FROM fact_kp
+                UNION ALL
+                SELECT * FROM fact_td
+            )
+        /* Соединяем календарь и факт по дате + связке: если нет данных — ставим 0 */
+        SELECT
+            cal.DDATE AS DDATE,
+            cal.SALES_SUBSPECIES AS SALES_SUBSPECIES,
+            ROUND(coalesce(f.SUM_SNDS, 0)) AS SUM_SNDS,
+            ROUND(coalesce(f.SUM_PROFIT, 0)) AS SUM_PROFIT,
+            ROUND(coalesce(f.SUM_PROFIT_NO_KSP, 0)) AS SUM_PROFIT_NO_KSP,
+            ROUND(coalesce(f.SUM_COST_NONDS_NO_KSP, 0)) AS SUM_COST_NONDS_NO_KSP,
+            ROUND(coalesce(f.SUM_COST_SNDS_NO_KSP, 0)) AS SUM_COST_SNDS_NO_KSP,
+            cal.SIGN_IRIS AS SIGN_IRIS,
+            cal.FULL_SIGN AS FULL_SIGN,
+            cal.PAIR_IDX AS PAIR_IDX
+        FROM
+            calendar AS cal
+        LEFT JOIN
+            fact AS f
+                ON cal.DDATE = f.DDATE
+                AND cal.SALES_SUBSPECIES = f.SALES_SUBSPECIES
+                AND cal.SIGN_IRIS = f.SIGN_IRIS
+                AND cal.SOURCE = f.SOURCE
+        ORDER BY
+            cal.PAIR_IDX ASC,
+            cal.DDATE ASC
+        ''',
+        parameters={
+            'pairs': [(idx, subspecial, iris_sign, source) for idx, (subspecial, iris_sign, source) in enumerate(pairs)],
+            'start_date': pd.Timestamp(start_date).date(),
+            'count_hist_fact_dates': count_hist_fact_dates,
+        }
+    )  # noqa: E501
+
+    # порядок связок как в старом цикле; служебный номер связки не отдаём наружу
+    data = (
+        data
+        .sort_values(['PAIR_IDX', 'DDATE'], kind='stable')
+        .drop(columns=['PAIR_IDX'])
+        .reset_index(drop=True)
+    )
+
+    return data
@@ -0,0 +1,288 @@
+# data/fact_cache.py
+"""
+    Локальный колоночный кэш широкого датафрейма факта (Parquet, партиция на FULL_SIGN).
+
+    Зачем:
+    - каждый запуск тянул MAX_HISTORY_DAYS дней по всем связкам из клика,
+      хотя с прошлого запуска поменялись только последние день-два
+
+    Как работает:
+    - по каждой связке хранится файл FULL_SIGN=<связка>.parquet
+      и high-water mark — последний закрытый день (день перед датой прошлой загрузки)
+    - при запуске из источника запрашиваются только даты после high-water mark
+      плюс recheck_days дней назад (поздние корректировки факта), остальное берётся из кэша
+    - если связки нет в кэше / кэш не покрывает окно истории / сменилась версия кэша — полная загрузка
+    - force_refresh=True — полная загрузка всех связок
+    - offline=True — источник (клик) не используется вообще, данные только из кэша;
+      если кэш не покрывает историю запроса (дата старта позже high-water mark) — ошибка,
+      а не нулевые продажи за недостающие дни
+    - invalidate_fact_cache — сброс кэша (python cli.py load --invalidate-fact-cache [FULL_SIGN ...])
+"""
+
+import datetime as dt
+import json
+import os
+from urllib.parse import quote
+
+import pandas as pd
+
+from .load_raw_fact_data import FACT_METRIC_COLUMNS, FACT_WIDE_COLUMNS
+
+FACT_CACHE_VERSION = 1
+
+_META_FILE = "_meta.json"
+
+
+def _partition_path(cache_dir: str, full_sign: str) -> str:
+    return os.path.join(cache_dir, f"FULL_SIGN={quote(full_sign, safe='')}.parquet")
+
+
+def _read_meta(cache_dir: str) -> dict:
+
+    path = os.path.join(cache_dir, _META_FILE)
+
+    if not os.path.exists(path):
+        return {"version": FACT_CACHE_VERSION, "partitions": {}}
+
+    with open(path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+
+    # другая версия формата кэша -> всё считаем невалидным
+    if meta.get("version") != FACT_CACHE_VERSION:
+        return {"version": FACT_CACHE_VERSION, "partitions": {}}
+
+    return meta
+
+
+def _write_meta(cache_dir: str, meta: dict):
+
+    path = os.path.join(cache_dir, _META_FILE)
+    tmp_path = path + ".tmp"
+
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=4)
+
+    os.replace(tmp_path, path)
+
+
+def _read_partition(cache_dir: str, full_sign: str) -> pd.DataFrame:
+
+    data = pd.read_parquet(_partition_path(cache_dir, full_sign))
+    data["DDATE"] = data["DDATE"].astype("datetime64[ns]")
+
+    return data
+
+
+def _write_partition(cache_dir: str, full_sign: str, data: pd.DataFrame):
+
+    path = _partition_path(cache_dir, full_sign)
+    tmp_path = path + ".tmp"
+
+    data.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def invalidate_fact_cache(
+        cache_dir: str,
+        full_signs: list[str] | None = None
+):
+    """
+        Сбрасывает кэш факта.
+
+        :param full_signs: какие связки сбросить (None = весь кэш)
+    """
+
+    meta = _read_meta(cache_dir)
+
+    to_drop = list(meta["partitions"]) if full_signs is None else full_signs
+
+    for full_sign in to_drop:
+        meta["partitions"].pop(full_sign, None)
+
+        path = _partition_path(cache_dir, full_sign)
+        if os.path.exists(path):
+            os.remove(path)
+
+    if os.path.isdir(cache_dir):
+        _write_meta(cache_dir, meta)
+
+
+def _fit_to_calendar(
+        data: pd.DataFrame,
+        subspecial: str,
+        iris_sign: str,
+        calendar: pd.DatetimeIndex
+) -> pd.DataFrame:
+    """
+        Оставляет ровно даты календаря запроса, пропуски = 0 (как coalesce в клике).
+    """
+
+    fitted = (
+        data
+        .set_index("DDATE")[FACT_METRIC_COLUMNS]
+        .reindex(calendar, fill_value=0)
+        .rename_axis("DDATE")
+        .reset_index()
+    )
+
+    fitted["SALES_SUBSPECIES"] = subspecial
+    fitted["SIGN_IRIS"] = iris_sign
+    fitted["FULL_SIGN"] = f"{subspecial} {iris_sign}"
+
+    return fitted[FACT_WIDE_COLUMNS]
+
+
+def load_wide_fact_cached(
+        source,
+        subspecies_kp,
+        subspecies_td,
+        start_date,
+        count_hist_dates,
+        cache_dir: str,
+        recheck_days: int = 3,
+        force_refresh: bool = False,
+        offline: bool = False
+) -> pd.DataFrame:
+    """
+        Широкий датафрейм факта с локальным кэшем и инкрементальной догрузкой.
+
+        Результат такой же, как source.load_wide (те же колонки, связки в порядке kp + td,
+        даты по возрастанию), но из источника запрашиваются только новые даты.
+
+        :param source: источник факта (data.sources), при offline=True может быть None
+        :param cache_dir: каталог кэша
+        :param recheck_days: сколько уже закэшированных дней перезапрашивать (поздние корректировки)
+        :param force_refresh: полная перезагрузка всех связок
+        :param offline: не ходить в источник, только кэш
+                        (ошибка, если связки нет в кэше или кэш не покрывает историю до start_date)
+        :return: широкий датафрейм факта
+    """
+
+    os.makedirs(cache_dir, exist_ok=True)
+
+    start_date = pd.Timestamp(start_date).normalize()
+    month_end = start_date + pd.offsets.MonthEnd(0)
+
+    # календарь запроса: последние count_hist_dates дней до конца месяца (как в источнике)
+    calendar = pd.date_range(end=month_end, periods=count_hist_dates, freq="D").as_unit("ns")
+
+    meta = _read_meta(cache_dir)
+
+    pairs = [(sub, iris, "KP") for sub, iris in subspecies_kp] + [(sub, iris, "TD") for sub, iris in subspecies_td]
+
+    cached = {}
+    stale = []
+    full_load = []
+    incremental = {}
+
+    for subspecial, iris_sign, fact_table in pairs:
+
+        full_sign = f"{subspecial} {iris_sign}"
+        partition_meta = meta["partitions"].get(full_sign)
+
+        if partition_meta is not None and os.path.exists(_partition_path(cache_dir, full_sign)):
+            cached[full_sign] = _read_partition(cache_dir, full_sign)
+
+        if offline:
+            if full_sign not in cached:
+                raise FileNotFoundError(f"Связки {full_sign} нет в кэше факта {cache_dir} (offline режим)")
+
+            # кэш не покрывает историю запроса: недостающие дни стали бы нулевыми продажами
+            if (
+                pd.Timestamp(partition_meta["high_water_mark"]) < start_date - pd.Timedelta(days=1)
+                or cached[full_sign]["DDATE"].min() > calendar[0]
+            ):
+                stale.append(f"{full_sign} (факт до {partition_meta['high_water_mark']})")
+            continue
+
+        if (
+            force_refresh
+            or full_sign not in cached
+            or cached[full_sign]["DDATE"].min() > calendar[0]
+        ):
+            full_load.append((subspecial, iris_sign, fact_table))
+            continue
+
+        high_water_mark = pd.Timestamp(partition_meta["high_water_mark"])
+
+        incremental[(subspecial, iris_sign, fact_table)] = high_water_mark - pd.Timedelta(days=recheck_days - 1)
+
+    if stale:
+        raise ValueError(
+            f"Кэш факта {cache_dir} не покрывает историю до {(start_date - pd.Timedelta(days=1)).date()} "
+            f"за {count_hist_dates} дней (offline режим): {', '.join(stale)}. "
+            f"Обновите кэш без offline или сдвиньте START_FORECAST_DATE"
+        )
+
+    fresh = []
+
+    # ---- полная загрузка ----
+    if full_load:
+        fresh.append(
+            source.load_wide(
+                subspecies_kp=[(sub, iris) for sub, iris, fact_table in full_load if fact_table == "KP"],
+                subspecies_td=[(sub, iris) for sub, iris, fact_table in full_load if fact_table == "TD"],
+                start_date=start_date,
+                count_hist_dates=count_hist_dates
+            )
+        )
+
+    # ---- инкрементальная догрузка: одна выгрузка с самой ранней нужной даты ----
+    refresh_from = None
+
+    if incremental:
+        refresh_from = max(min(incremental.values()), calendar[0])
+        refresh_days = (month_end - refresh_from).days + 1
+
+    # refresh_days <= 0: месяц запроса целиком раньше high-water mark, всё есть в кэше
+    if incremental and refresh_days > 0:
+        fresh.append(
+            source.load_wide(
+                subspecies_kp=[(sub, iris) for sub, iris, fact_table in incremental if fact_table == "KP"],
+                subspecies_td=[(sub, iris) for sub, iris, fact_table in incremental if fact_table == "TD"],
+                start_date=start_date,
+                count_hist_dates=refresh_days
+            )
+        )
+
+    fresh_df = pd.concat(fresh, ignore_index=True) if fresh else pd.DataFrame(columns=FACT_WIDE_COLUMNS)
+    fresh_df["DDATE"] = fresh_df["DDATE"].astype("datetime64[ns]")
+
+    all_dfs = []
+
+    for subspecial, iris_sign, fact_table in pairs:
+
+        full_sign = f"{subspecial} {iris_sign}"
+
+        fresh_part = fresh_df[fresh_df["FULL_SIGN"] == full_sign]
+
+        if offline:
+            data = cached[full_sign]
+
+        elif (subspecial, iris_sign, fact_table) in incremental:
+            # старые дни из кэша + перезапрошенные / новые из источника
+            old_part = cached[full_sign]
+            data = pd.concat(
+                [old_part[old_part["DDATE"] < refresh_from], fresh_part],
+                ignore_index=True
+            )
+
+        else:
+            data = fresh_part
+
+        data = _fit_to_calendar(data, subspecial, iris_sign, calendar)
+
+        if not offline:
+            _write_partition(cache_dir, full_sign, data)
+
+            meta["partitions"][full_sign] = {
+                "high_water_mark": str((start_date - pd.Timedelta(days=1)).date()),
+                "updated_at": dt.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            }
+
+        all_dfs.append(data)
+
+    if not offline:
+        _write_meta(cache_dir, meta)
+
+    return pd.concat(all_dfs, ignore_index=True)
@@ -1,24 +1,50 @@
 # data/load_row_fact_data.py
 import pandas as pd
-from .clickhouse import get_fact_data, get_fact_data_tvoy_doctor
+from .clickhouse import get_fact_data, get_fact_data_tvoy_doctor, get_fact_data_bulk
 
-# =============== Преобразуем данные из широково в длинный датафрйм =====================
-def load_and_prepare_long_df(
+# Идентификаторы связки и метрики широкого датафрейма факта (как отдаёт клик)
+FACT_ID_COLUMNS = ["DDATE", "SALES_SUBSPECIES", "SIGN_IRIS", "FULL_SIGN"]
+
+FACT_METRIC_COLUMNS = [
+    "SUM_SNDS",
+    "SUM_PROFIT",
+    "SUM_PROFIT_NO_KSP",
+    "SUM_COST_NONDS_NO_KSP",
+    "SUM_COST_SNDS_NO_KSP",
+]
+
+# Схема широкого датафрейма факта (порядок колонок как в выгрузке из клика), общая для всех источников
+FACT_WIDE_COLUMNS = ["DDATE", "SALES_SUBSPECIES", *FACT_METRIC_COLUMNS, "SIGN_IRIS", "FULL_SIGN"]
+
+# =============== Загрузка широкого датафрейма факта по всем связкам =====================
+def load_wide_fact_df(
         client,
         subspecies_kp,
         subspecies_td,
         start_date,
-        count_hist_dates
-):
+        count_hist_dates,
+        bulk=True
+) -> pd.DataFrame:
     '''
         :param client: Клиент клика
         :param subspecies_kp: Словарь с Каналом продаж
         :param subspecies_td: Словарь с Каналом продаж
         :param start_date: Дата от которой строим прогноз и ДО которой берем фактические данные
         :param count_hist_dates: Сколько дней фактических данных брать до текущей даты
-        :return: Возвращает длинный датафрейм со всеми каналами, метриками, прзнаками + добавлены EXOG признаки (выходные, праздники, день недели и тд.)
+        :param bulk: True - один запрос на все связки (get_fact_data_bulk),
+                     False - старый цикл, отдельный запрос на каждую связку
+        :return: Широкий датафрейм факта (одна строка = связка за день, метрики в колонках)
     '''
 
+    if bulk:
+        return get_fact_data_bulk(
+            client=client,
+            subspecies_kp=subspecies_kp,
+            subspecies_td=subspecies_td,
+            start_date=start_date,
+            count_hist_fact_dates=count_hist_dates
+        )
+
     all_dfs = []
 
     for cannel, iris_sign in subspecies_kp:
@@ -43,21 +69,70 @@ def load_and_prepare_long_df(
 
         all_dfs.append(df_td)
 
-    wide_df = pd.concat(all_dfs, ignore_index=True)
+    return pd.concat(all_dfs, ignore_index=True)
+
+# =============== Преобразуем данные из широково в длинный датафрйм =====================
+def load_and_prepare_long_df(
+        source,
+        subspecies_kp,
+        subspecies_td,
+        start_date,
+        count_hist_dates,
+        cache_dir=None,
+        recheck_days=3,
+        force_refresh=False,
+        offline=False
+):
+    '''
+        :param source: Источник факта (data.sources: ClickHouseFactSource, FileFactSource, ...)
+        :param subspecies_kp: Словарь с Каналом продаж
+        :param subspecies_td: Словарь с Каналом продаж
+        :param start_date: Дата от которой строим прогноз и ДО которой берем фактические данные
+        :param count_hist_dates: Сколько дней фактических данных брать до текущей даты
+        :param cache_dir: каталог локального кэша факта (None = всегда полная выгрузка из источника)
+        :param recheck_days: сколько последних закэшированных дней перезапрашивать
+        :param force_refresh: игнорировать кэш и перезагрузить всё
+        :param offline: работать только из кэша, без обращения к источнику
+        :return: Возвращает длинный датафрейм со всеми каналами, метриками, прзнаками + добавлены EXOG признаки (выходные, праздники, день недели и тд.)
+    '''
+
+    if cache_dir:
+        # импорт здесь: fact_cache сам использует схему факта из этого модуля
+        from .fact_cache import load_wide_fact_cached
+
+        wide_df = load_wide_fact_cached(
+            source=source,
+            subspecies_kp=subspecies_kp,
+            subspecies_td=subspecies_td,
+            start_date=start_date,
+            count_hist_dates=count_hist_dates,
+            cache_dir=cache_dir,
+            recheck_days=recheck_days,
+            force_refresh=force_refresh,
+            offline=offline
+        )
+
+    else:
+        wide_df = source.load_wide(
+            subspecies_kp=subspecies_kp,
+            subspecies_td=subspecies_td,
+            start_date=start_date,
+            count_hist_dates=count_hist_dates
+        )
+
+    return wide_to_long_df(wide_df)
+
+def wide_to_long_df(
+        wide_df: pd.DataFrame
+) -> pd.DataFrame:
+    '''
+        Переводим таблицу из ширкой в длинную (одна строка = одна метрика за день).
+        Так каждая метрика будет отдельной строкой, удобнее для анализа
+    '''
 
-    # -----------------------------------------
-    # 4. Переводим таблицу из ширкой в длинную (одна строка = одна метрика за день).
-    # Так каждая метрика будет отдельной строкой, удобнее для анализа
-    # -----------------------------------------
     long_df = wide_df.melt(
-        id_vars=["DDATE", "SALES_SUBSPECIES", "SIGN_IRIS", "FULL_SIGN"],
-        value_vars=[
-            "SUM_SNDS",
-            "SUM_PROFIT",
-            "SUM_PROFIT_NO_KSP",
-            "SUM_COST_NONDS_NO_KSP",
-            "SUM_COST_SNDS_NO_KSP",
-        ],
+        id_vars=FACT_ID_COLUMNS,
+        value_vars=FACT_METRIC_COLUMNS,
         var_name="METRIC_NAME",
         value_name="METRIC_VALUE"
     )
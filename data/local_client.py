@@ -0,0 +1,76 @@
+# data/local_client.py
+import re
+
+import pandas as pd
+
+from .sources import fit_fact_to_calendar
+
+''' Локальная замена клиента ClickHouse: отдаёт факт из фикстуры вместо БД '''
+
+class LocalClickHouseClient:
+    '''
+        Stand-in для clickhouse_connect клиента.
+
+        Понимает запросы из data/clickhouse.py:
+        - get_fact_data / get_fact_data_tvoy_doctor (одна связка, параметры внутри текста запроса)
+        - get_fact_data_bulk (все связки, параметры в parameters)
+
+        и возвращает то же, что вернул бы ClickHouse: календарь последних N дней
+        до конца месяца start_date, факт из фикстуры, пропуски = 0.
+
+        Все запросы сохраняются в self.queries (можно проверить, сколько их ушло),
+        параметры запросов - в self.parameters.
+    '''
+
+    def __init__(self, fact_df: pd.DataFrame):
+        '''
+            :param fact_df: фикстура в широком формате: DDATE, SALES_SUBSPECIES, SIGN_IRIS + SUM_* колонки
+        '''
+
+        self.fact_df = fact_df.copy()
+        self.fact_df["DDATE"] = pd.to_datetime(self.fact_df["DDATE"])
+        self.queries = []
+        self.parameters = []
+
+    def query_df(self, query: str, parameters: dict | None = None) -> pd.DataFrame:
+
+        self.queries.append(query)
+        self.parameters.append(parameters)
+
+        # ---- один запрос на все связки ----
+        if parameters and "pairs" in parameters:
+            frames = [
+                self._calendar_fact(
+                    subspecial=subspecial,
+                    iris_sign=iris_sign,
+                    start_date=parameters["start_date"],
+                    count_hist_fact_dates=parameters["count_hist_fact_dates"]
+                ).assign(PAIR_IDX=pair_idx)
+                for pair_idx, subspecial, iris_sign, _source in parameters["pairs"]
+            ]
+
+            return pd.concat(frames, ignore_index=True)
+
+        # ---- старый запрос на одну связку ----
+        return self._calendar_fact(
+            subspecial=re.search(r"'([^']*)' (?:as|AS) SALES_SUBSPECIES", query).group(1),
+            iris_sign=re.search(r"'([^']*)' AS SIGN_IRIS", query).group(1),
+            start_date=re.search(r"toLastDayOfMonth\(toDate\('([^']*)'\)\)", query).group(1),
+            count_hist_fact_dates=int(re.search(r"FROM numbers\((\d+)\)", query).group(1))
+        )
+
+    def _calendar_fact(
+            self,
+            subspecial: str,
+            iris_sign: str,
+            start_date,
+            count_hist_fact_dates: int
+    ) -> pd.DataFrame:
+
+        return fit_fact_to_calendar(
+            fact_df=self.fact_df,
+            subspecial=subspecial,
+            iris_sign=iris_sign,
+            start_date=start_date,
+            count_hist_dates=count_hist_fact_dates
+        )
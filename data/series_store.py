@@ -0,0 +1,70 @@
+# data/series_store.py
+"""
+    Хранилище рядов длинного датафрейма по связке (FULL_SIGN, METRIC_NAME).
+
+    Раньше каждый этап (бэктест, прогноз по policy, графики) в цикле делал
+        df[(df["FULL_SIGN"] == x) & (df["METRIC_NAME"] == y)]
+    т.е. полный проход по всему длинному df на каждую связку и каждое окно.
+
+    SeriesStore строится один раз (один groupby) и отдаёт ряд связки за O(1):
+    - отдельный непрерывный блок строк
+    - отсортирован по DDATE
+    - индекс строк как в исходном df (результат тот же, что у фильтра по маске)
+
+    Блоки отдаются без копии: модели входной df не меняют,
+    если нужно менять ряд — делать .copy() на своей стороне.
+"""
+
+import pandas as pd
+
+
+class SeriesStore:
+    """
+        Ряды длинного датафрейма, разложенные по (FULL_SIGN, METRIC_NAME).
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        """
+            :param df: длинный датафрейм (все связки и метрики, с календарными признаками или без)
+        """
+
+        self._series = {
+            key: block.sort_values("DDATE", kind="stable")
+            for key, block in df.groupby(["FULL_SIGN", "METRIC_NAME"], sort=False)
+        }
+
+    @classmethod
+    def from_df(cls, df) -> "SeriesStore":
+        """
+            Хранилище из длинного df; уже готовое хранилище возвращается как есть
+            (этапы принимают и то, и другое).
+        """
+
+        return df if isinstance(df, SeriesStore) else cls(df)
+
+    def get(self, full_sign: str, metric_name: str) -> pd.DataFrame:
+        """
+            :return: ряд связки, отсортированный по DDATE
+        """
+
+        return self._series[(full_sign, metric_name)]
+
+    def keys(self) -> list[tuple[str, str]]:
+        return list(self._series)
+
+    def __contains__(self, key) -> bool:
+        return key in self._series
+
+    def __len__(self) -> int:
+        return len(self._series)
+
+
+def series_identity(df: pd.DataFrame) -> tuple:
+    """
+        (FULL_SIGN, METRIC_NAME) ряда одной связки по его колонкам ((None, None), если их нет).
+    """
+
+    if df.empty or "FULL_SIGN" not in df.columns or "METRIC_NAME" not in df.columns:
+        return None, None
+
+    return df["FULL_SIGN"].iat[0], df["METRIC_NAME"].iat[0]
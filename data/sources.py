@@ -0,0 +1,260 @@
+# data/sources.py
+"""
+    Источники факта для load_and_prepare_long_df.
+
+    Все источники отдают широкий датафрейм одной схемы (как выгрузка из клика):
+        DDATE, SALES_SUBSPECIES, SUM_* (5 метрик), SIGN_IRIS, FULL_SIGN
+
+    - календарь: последние count_hist_dates дней до конца месяца start_date
+    - дни без продаж = 0
+    - связки в порядке subspecies_kp + subspecies_td, даты по возрастанию
+
+    Источники:
+    - ClickHouseFactSource  - боевые запросы (data/clickhouse.py)
+    - FileFactSource        - Parquet / CSV файл с фактом
+    - DuckDBFactSource      - таблица или выражение DuckDB (например read_parquet('fact/*.parquet'))
+    - InMemoryFactSource    - готовый датафрейм (бенчмарки, синтетика, отладка)
+
+    Файловые источники ожидают "сырой" факт: DDATE, SALES_SUBSPECIES, SIGN_IRIS + SUM_* колонки
+    (FULL_SIGN не обязателен, несколько строк на дату суммируются).
+"""
+
+import os
+
+import pandas as pd
+
+from .clickhouse import create_clickhouse_connect
+from .load_raw_fact_data import load_wide_fact_df, FACT_METRIC_COLUMNS, FACT_WIDE_COLUMNS
+
+
+def fit_fact_to_calendar(
+        fact_df: pd.DataFrame,
+        subspecial: str,
+        iris_sign: str,
+        start_date,
+        count_hist_dates: int
+) -> pd.DataFrame:
+    """
+        Повторяет логику запроса в клик для одной связки:
+        календарь последних count_hist_dates дней до конца месяца start_date,
+        сумма факта по дню, пропуски = 0, ROUND.
+
+        :param fact_df: сырой факт (DDATE, SALES_SUBSPECIES, SIGN_IRIS, SUM_*)
+        :return: широкий датафрейм связки (FACT_WIDE_COLUMNS)
+    """
+
+    month_end = pd.Timestamp(start_date).normalize() + pd.offsets.MonthEnd(0)
+
+    calendar = pd.date_range(
+        end=month_end,
+        periods=count_hist_dates,
+        freq="D"
+    ).as_unit("ns")
+
+    fact = fact_df[
+        (fact_df["SALES_SUBSPECIES"] == subspecial) &
+        (fact_df["SIGN_IRIS"] == iris_sign)
+    ]
+
+    data = (
+        fact
+        .groupby("DDATE")[FACT_METRIC_COLUMNS]
+        .sum()
+        .reindex(calendar, fill_value=0)
+        .round()
+        .rename_axis("DDATE")
+        .reset_index()
+    )
+
+    data["SALES_SUBSPECIES"] = subspecial
+    data["SIGN_IRIS"] = iris_sign
+    data["FULL_SIGN"] = f"{subspecial} {iris_sign}"
+
+    return data[FACT_WIDE_COLUMNS]
+
+
+class FactDataSource:
+    """
+        Базовый источник факта.
+    """
+
+    def load_wide(
+            self,
+            subspecies_kp,
+            subspecies_td,
+            start_date,
+            count_hist_dates
+    ) -> pd.DataFrame:
+        """
+            :param subspecies_kp: связки (канал, признак ИРИС) из фактов КП
+            :param subspecies_td: связки (канал, признак ИРИС) из фактов ТД
+            :param start_date: дата старта прогноза (факт берётся до конца её месяца)
+            :param count_hist_dates: сколько дней календаря до конца месяца
+            :return: широкий датафрейм факта (FACT_WIDE_COLUMNS)
+        """
+
+        raise NotImplementedError
+
+
+class ClickHouseFactSource(FactDataSource):
+    """
+        Факт из ClickHouse (текущие запросы).
+        Подключение создаётся при первой выгрузке: offline-прогон из кэша в клик не ходит.
+    """
+
+    def __init__(self, client=None, bulk: bool = True):
+        """
+            :param client: клиент клика (None = create_clickhouse_connect() при первой выгрузке)
+            :param bulk: один запрос на все связки (True) или запрос на каждую связку (False)
+        """
+
+        self.client = client
+        self.bulk = bulk
+
+    def load_wide(self, subspecies_kp, subspecies_td, start_date, count_hist_dates) -> pd.DataFrame:
+
+        if self.client is None:
+            self.client = create_clickhouse_connect()
+
+        wide_df = load_wide_fact_df(
+            client=self.client,
+            subspecies_kp=subspecies_kp,
+            subspecies_td=subspecies_td,
+            start_date=start_date,
+            count_hist_dates=count_hist_dates,
+            bulk=self.bulk
+        )
+
+        wide_df["DDATE"] = pd.to_datetime(wide_df["DDATE"]).astype("datetime64[ns]")
+
+        return wide_df[FACT_WIDE_COLUMNS]
+
+
+class InMemoryFactSource(FactDataSource):
+    """
+        Факт из готового датафрейма.
+    """
+
+    def __init__(self, fact_df: pd.DataFrame):
+        """
+            :param fact_df: сырой факт: DDATE, SALES_SUBSPECIES, SIGN_IRIS + SUM_* колонки
+        """
+
+        self.fact_df = fact_df.copy()
+        self.fact_df["DDATE"] = pd.to_datetime(self.fact_df["DDATE"]).astype("datetime64[ns]")
+
+    def load_wide(self, subspecies_kp, subspecies_td, start_date, count_hist_dates) -> pd.DataFrame:
+
+        all_dfs = [
+            fit_fact_to_calendar(
+                fact_df=self.fact_df,
+                subspecial=subspecial,
+                iris_sign=iris_sign,
+                start_date=start_date,
+                count_hist_dates=count_hist_dates
+            )
+            for subspecial, iris_sign in [*subspecies_kp, *subspecies_td]
+        ]
+
+        return pd.concat(all_dfs, ignore_index=True)
+
+
+class FileFactSource(FactDataSource):
+    """
+        Факт из Parquet / CSV файла (формат по расширению).
+        Файл читается один раз, при первой выгрузке (offline-прогон из кэша файл не читает),
+        дальше выгрузки идут из InMemoryFactSource по прочитанному факту.
+    """
+
+    def __init__(self, path: str):
+
+        self.path = path
+        self._source = None
+
+    def _read(self) -> pd.DataFrame:
+
+        if self.path.endswith(".csv"):
+            return pd.read_csv(self.path, parse_dates=["DDATE"])
+
+        return pd.read_parquet(self.path)
+
+    def load_wide(self, subspecies_kp, subspecies_td, start_date, count_hist_dates) -> pd.DataFrame:
+
+        if self._source is None:
+            self._source = InMemoryFactSource(self._read())
+
+        return self._source.load_wide(subspecies_kp, subspecies_td, start_date, count_hist_dates)
+
+
+class DuckDBFactSource(FactDataSource):
+    """
+        Факт из DuckDB: фильтр по датам и связкам выполняется в DuckDB,
+        в pandas приходит только нужный срез.
+    """
+
+    def __init__(self, relation: str, database: str = ":memory:"):
+        """
+            :param relation: таблица или табличное выражение (например "read_parquet('fact/*.parquet')")
+            :param database: файл базы DuckDB (":memory:" - только файлы через relation)
+        """
+
+        self.relation = relation
+        self.database = database
+
+    def load_wide(self, subspecies_kp, subspecies_td, start_date, count_hist_dates) -> pd.DataFrame:
+
+        # драйвер нужен только для этого источника
+        import duckdb
+
+        pairs = [*subspecies_kp, *subspecies_td]
+
+        month_end = pd.Timestamp(start_date).normalize() + pd.offsets.MonthEnd(0)
+        first_date = month_end - pd.Timedelta(days=count_hist_dates - 1)
+
+        metrics_sql = ", ".join(FACT_METRIC_COLUMNS)
+
+        with duckdb.connect(self.database, read_only=self.database != ":memory:") as con:
+            fact_df = con.execute(
+                f"""
+                SELECT CAST(DDATE AS DATE) AS DDATE, SALES_SUBSPECIES, SIGN_IRIS, {metrics_sql}
+                FROM {self.relation}
+                WHERE CAST(DDATE AS DATE) BETWEEN ? AND ?
+                  AND concat(SALES_SUBSPECIES, ' ', SIGN_IRIS) IN (SELECT UNNEST(?))
+                """,
+                [
+                    first_date.date(),
+                    month_end.date(),
+                    [f"{subspecial} {iris_sign}" for subspecial, iris_sign in pairs]
+                ]
+            ).df()
+
+        return InMemoryFactSource(fact_df).load_wide(subspecies_kp, subspecies_td, start_date, count_hist_dates)
+
+
+def create_fact_source(
+        kind: str = "clickhouse",
+        path: str | None = None,
+        bulk: bool = True
+) -> FactDataSource:
+    """
+        Источник факта по настройке DATA_SOURCE.
+
+        :param kind: "clickhouse" | "file" | "duckdb"
+        :param path: файл факта (file) / таблица или выражение DuckDB (duckdb)
+        :param bulk: режим запросов клика (только для clickhouse)
+    """
+
+    if kind == "clickhouse":
+        return ClickHouseFactSource(bulk=bulk)
+
+    if kind == "file":
+        if not path or not os.path.exists(path):
+            raise FileNotFoundError(f"Файл факта не найден: {path}")
+        return FileFactSource(path)
+
+    if kind == "duckdb":
+        if not path:
+            raise ValueError("Для источника duckdb нужна таблица или выражение в DATA_SOURCE_PATH")
+        return DuckDBFactSource(relation=path)
+
+    raise ValueError(f"Неизвестный источник факта: {kind}")
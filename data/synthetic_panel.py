@@ -0,0 +1,145 @@
+# data/synthetic_panel.py
+"""
+    Генератор синтетической панели продаж для бенчмарков и нагрузочных прогонов.
+
+    Ряды похожи на боевой факт:
+    - недельная сезонность (свой профиль дней недели у каждой связки)
+    - выходные: у части связок продаж нет совсем (0), у остальных сильная просадка
+    - праздники: продажи падают почти до нуля
+    - годовая сезонность, линейный тренд, мультипликативный шум
+    - 5 метрик факта согласованы между собой (прибыль < выручки, себестоимость = выручка - прибыль)
+
+    Выход:
+    - generate_synthetic_fact    - широкий факт (схема FACT_WIDE_COLUMNS, как из клика / InMemoryFactSource)
+    - generate_synthetic_long_df - длинный датафрейм для add_calendar_features
+"""
+
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+
+from .calendar_days import HOLIDAYS
+from .load_raw_fact_data import FACT_WIDE_COLUMNS, wide_to_long_df
+
+
+def synthetic_holidays(
+        start_date: pd.Timestamp,
+        end_date: pd.Timestamp
+) -> set[dt.date]:
+    """
+        Праздники из data.calendar_days, повторённые на каждый год диапазона
+        (в календаре праздников только один год).
+    """
+
+    years = range(pd.Timestamp(start_date).year, pd.Timestamp(end_date).year + 1)
+
+    holidays = set()
+
+    for holiday in HOLIDAYS:
+        for year in years:
+            holidays.add(holiday.replace(year=year))
+
+    return holidays
+
+
+def generate_synthetic_fact(
+        n_series: int = 200,
+        n_days: int = 3 * 365,
+        end_date: pd.Timestamp = pd.Timestamp("2025-12-31"),
+        zero_weekend_share: float = 0.5,
+        noise: float = 0.15,
+        seed: int = 42
+) -> pd.DataFrame:
+    """
+        Широкий факт синтетической панели.
+
+        :param n_series: число связок FULL_SIGN
+        :param n_days: дней истории (до end_date включительно)
+        :param end_date: последний день факта
+        :param zero_weekend_share: доля связок без продаж в выходные
+        :param noise: стандартное отклонение мультипликативного шума
+        :param seed: seed генератора (одинаковые параметры -> одинаковая панель)
+        :return: DataFrame FACT_WIDE_COLUMNS (DDATE, SALES_SUBSPECIES, SUM_*, SIGN_IRIS, FULL_SIGN)
+    """
+
+    rng = np.random.default_rng(seed)
+
+    dates = pd.date_range(end=pd.Timestamp(end_date).normalize(), periods=n_days, freq="D")
+    day_idx = np.arange(n_days)
+    day_of_week = dates.dayofweek.values
+
+    holidays = synthetic_holidays(dates[0], dates[-1])
+    is_holiday = np.isin(dates.date, list(holidays))
+
+    # ---- параметры связок (строка = связка) ----
+    level = rng.lognormal(mean=13.0, sigma=1.0, size=(n_series, 1))
+    trend = rng.normal(0.0, 0.3, size=(n_series, 1)) / 365
+    annual_amp = rng.uniform(0.0, 0.2, size=(n_series, 1))
+    annual_phase = rng.uniform(0.0, 2 * np.pi, size=(n_series, 1))
+
+    weekly_profile = rng.uniform(0.85, 1.15, size=(n_series, 7))
+    weekly_profile[:, 5:] = rng.uniform(0.05, 0.3, size=(n_series, 2))
+
+    zero_weekends = rng.random(n_series) < zero_weekend_share
+    weekly_profile[zero_weekends, 5:] = 0.0
+
+    # ---- выручка ----
+    sales = (
+        level
+        * (1 + trend * day_idx)
+        * (1 + annual_amp * np.sin(2 * np.pi * day_idx / 365.25 + annual_phase))
+        * weekly_profile[:, day_of_week]
+        * rng.lognormal(mean=0.0, sigma=noise, size=(n_series, n_days))
+    )
+
+    sales[:, is_holiday] *= rng.uniform(0.0, 0.1, size=(n_series, 1))
+    sales = np.clip(sales, 0, None)
+
+    # ---- согласованные метрики ----
+    margin = rng.uniform(0.1, 0.35, size=(n_series, 1)) * rng.normal(1.0, 0.05, size=(n_series, n_days))
+    ksp_share = rng.uniform(0.0, 0.1, size=(n_series, 1))
+
+    sum_snds = sales
+    sum_profit = sales * margin
+    sum_profit_no_ksp = sum_profit * (1 - ksp_share)
+    sum_cost_nonds_no_ksp = sales / 1.2 - sum_profit_no_ksp
+    sum_cost_snds_no_ksp = sum_cost_nonds_no_ksp * 1.2
+
+    # ---- связки ----
+    sales_subspecies = np.array([f"SYN КАНАЛ {i // 2 + 1:04d}" for i in range(n_series)])
+    sign_iris = np.where(np.arange(n_series) % 2 == 0, "ИРИС", "БЕЗ ИРИС")
+
+    wide_df = pd.DataFrame({
+        "DDATE": np.tile(dates.values, n_series),
+        "SALES_SUBSPECIES": np.repeat(sales_subspecies, n_days),
+        "SUM_SNDS": sum_snds.ravel().round(),
+        "SUM_PROFIT": sum_profit.ravel().round(),
+        "SUM_PROFIT_NO_KSP": sum_profit_no_ksp.ravel().round(),
+        "SUM_COST_NONDS_NO_KSP": sum_cost_nonds_no_ksp.ravel().round(),
+        "SUM_COST_SNDS_NO_KSP": sum_cost_snds_no_ksp.ravel().round(),
+        "SIGN_IRIS": np.repeat(sign_iris, n_days),
+    })
+
+    wide_df["FULL_SIGN"] = wide_df["SALES_SUBSPECIES"] + " " + wide_df["SIGN_IRIS"]
+
+    return wide_df[FACT_WIDE_COLUMNS]
+
+
+def synthetic_pairs(wide_df: pd.DataFrame) -> list[tuple[str, str]]:
+    """
+        Связки (канал, признак ИРИС) панели в порядке появления — как KP_DISTR_PAIRS в настройках.
+    """
+
+    pairs = wide_df[["SALES_SUBSPECIES", "SIGN_IRIS"]].drop_duplicates()
+
+    return list(pairs.itertuples(index=False, name=None))
+
+
+def generate_synthetic_long_df(**kwargs) -> pd.DataFrame:
+    """
+        Длинный датафрейм синтетической панели (как load_and_prepare_long_df).
+        Параметры — как у generate_synthetic_fact.
+    """
+
+    return wide_to_long_df(generate_synthetic_fact(**kwargs))
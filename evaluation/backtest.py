@@ -14,12 +14,13 @@
 """
 
 import pandas as pd
-from models.catboost_model import train_catboost
+from evaluation.date_index import DateIndex, rows_between
 
 def split_train_and_test_data(
         df: pd.DataFrame,
         forecast_date: pd.Timestamp,
-        train_window_days: int
+        train_window_days: int,
+        date_index: DateIndex | None = None
 ):
     """
         Разбивает модельный датафрейм на обучающую и тестовую выборки
@@ -36,20 +37,20 @@ def split_train_and_test_data(
         :param df: датафрейм с готовыми фичами (лаги, rolling и т.д.)
         :param forecast_date: дата, на которую делаем прогноз
         :param train_window_days: размер окна обучения (в днях)
-        :return: train_df, test_df
+        :param date_index: индекс дат df (рекурсия делит один df на каждый день — строим индекс один раз)
+        :return: train_df, test_df (срезы df без копии)
     """
 
     train_end = forecast_date - pd.Timedelta(days=1)
     train_start = train_end - pd.Timedelta(days=train_window_days - 1)
 
-    train_df = df[
-        (df['DDATE'] >= train_start) &
-        (df['DDATE'] <= train_end)
-    ].copy()
+    if date_index is None:
+        date_index = DateIndex(df)
+
+    train_df = rows_between(df, train_start, train_end, date_index)
 
-    test_df = df[
-        df['DDATE'] == forecast_date
-    ].copy() # В данном случае кусок для теста будет 1 день, далее рекурсивно до конца мес можно считать
+    # В данном случае кусок для теста будет 1 день, далее рекурсивно до конца мес можно считать
+    test_df = rows_between(df, forecast_date, forecast_date, date_index)
 
     return train_df, test_df
 
@@ -139,6 +140,9 @@ def backtest_one_day(
     X_train, y_train = split_X_y(train_df)
     X_test, y_test = split_X_y(test_df)
 
+    # импорт здесь: split_X_y нужен и моделям без catboost (ленивый реестр моделей)
+    from models.catboost_model import train_catboost
+
     model = train_catboost(X_train, y_train)
     y_pred = predict_one_day(model, X_test)
 
@@ -0,0 +1,372 @@
+# evaluation/backtest_cache.py
+"""
+    Персистентный кэш результатов бэктеста (SQLite на локальном диске).
+
+    Одна запись = одна ячейка сетки:
+        FULL_SIGN × METRIC_NAME × MODEL × TRAIN_WINDOW_DAYS × START_DATE
+
+    В записи хранятся месячные метрики, а дневной прогноз модели (DDATE, FORECAST) —
+    в компактной таблице forecast_vectors (два бинарных массива на ячейку).
+    Из неё же читают графики policy (по ключу ячейки) и Excel-отчёт (по датам бэктеста) — без повторного прогона моделей.
+    Чтение из кэша ничего не пишет: попадание в кэш не берёт блокировку записи.
+
+    Ключ записи — хэш от:
+        - среза ряда, который видит модель (все строки до конца месяца бэктеста),
+          у глобальных моделей — ещё и срезов всех рядов, на которых они обучаются
+        - гиперпараметров модели
+        - версии кода (хэш исходников forecast/, features/, models/, бэктеста, метрик, SeriesStore/DateIndex
+          и версий numpy/pandas/sklearn/statsmodels/catboost/lightgbm/xgboost)
+        - окна обучения и даты старта
+
+    Зачем:
+    - упавший/убитый прогон не теряет уже посчитанные WMAPE (каждая ячейка коммитится сразу)
+    - повторный прогон с одной новой моделью считает только её
+"""
+
+import datetime as dt
+import functools
+import hashlib
+import importlib.metadata
+import json
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+CACHE_SCHEMA_VERSION = 2
+
+# Исходники, от которых зависит результат ячейки бэктеста (каталоги - рекурсивно)
+_CODE_VERSION_PATHS = [
+    "forecast",
+    "features",
+    "models",
+    os.path.join("evaluation", "backtest.py"),
+    os.path.join("evaluation", "metrics.py"),
+    os.path.join("evaluation", "backtests_models_few_periods.py"),
+    os.path.join("evaluation", "date_index.py"),
+    os.path.join("data", "series_store.py"),
+]
+
+# Библиотеки, от версии которых зависит прогноз (версии из метаданных пакетов, без импорта)
+_CODE_VERSION_PACKAGES = [
+    "numpy",
+    "pandas",
+    "scikit-learn",
+    "statsmodels",
+    "catboost",
+    "lightgbm",
+    "xgboost",
+]
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@functools.lru_cache(maxsize=None)
+def compute_code_version(paths: tuple[str, ...] | None = None) -> str:
+    """
+        Хэш исходников и версий библиотек, влияющих на прогноз и метрики.
+        Любая правка кода моделей/фичей или обновление бустинга инвалидирует кэш автоматически
+        (кэш ячеек бэктеста и хранилище обученных моделей).
+
+        :param paths: каталоги / файлы от корня проекта (None = _CODE_VERSION_PATHS)
+    """
+
+    digest = hashlib.sha256(f"schema={CACHE_SCHEMA_VERSION}".encode())
+
+    for package in _CODE_VERSION_PACKAGES:
+        try:
+            version = importlib.metadata.version(package)
+        except importlib.metadata.PackageNotFoundError:
+            version = None
+
+        digest.update(f"{package}={version}".encode())
+
+    for rel_path in paths or _CODE_VERSION_PATHS:
+        path = os.path.join(_PROJECT_ROOT, rel_path)
+
+        if os.path.isdir(path):
+            files = sorted(
+                os.path.join(dir_path, name)
+                for dir_path, dir_names, file_names in os.walk(path)
+                if "__pycache__" not in dir_path
+                for name in file_names
+                if name.endswith(".py")
+            )
+        else:
+            files = [path]
+
+        for file in files:
+            digest.update(os.path.relpath(file, _PROJECT_ROOT).encode())
+            with open(file, "rb") as f:
+                digest.update(f.read())
+
+    return digest.hexdigest()[:16]
+
+
+def hash_series_slice(
+        df: pd.DataFrame,
+        end_date: pd.Timestamp
+) -> str:
+    """
+        Хэш среза ряда, от которого зависит ячейка бэктеста:
+        все строки связки с DDATE <= end_date (история + факт месяца).
+    """
+
+    slice_df = (
+        df[df["DDATE"] <= end_date]
+        .sort_values("DDATE")
+        .reset_index(drop=True)
+    )
+
+    row_hashes = pd.util.hash_pandas_object(slice_df, index=False).values
+
+    digest = hashlib.sha256(row_hashes.tobytes())
+    digest.update(",".join(slice_df.columns).encode())
+
+    return digest.hexdigest()
+
+
+def make_cell_key(
+        series_hash: str,
+        model_key: str,
+        train_window_days: int,
+        start_date: pd.Timestamp,
+        hyperparams: dict,
+        scope_hash: str | None = None
+) -> str:
+    """
+        Ключ ячейки бэктеста (content-addressed).
+
+        :param scope_hash: хэш всех рядов, на которых обучается модель, если это не только свой ряд
+                           (глобальные модели); None - прогноз зависит только от своего ряда
+    """
+
+    key = {
+        "series": series_hash,
+        "model": model_key,
+        "window": int(train_window_days),
+        "start": str(pd.Timestamp(start_date).date()),
+        "params": hyperparams,
+        "code": compute_code_version(),
+    }
+
+    if scope_hash is not None:
+        key["scope"] = scope_hash
+
+    payload = json.dumps(key, sort_keys=True, default=str)
+
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _to_builtin(value):
+    # numpy-числа -> float для json, строки (FIT_MODE) как есть
+    if value is None or isinstance(value, str):
+        return value
+
+    return float(value)
+
+
+# ---- дневной прогноз <-> бинарные массивы ----
+def _encode_dates(dates) -> bytes:
+    # дни от 1970-01-01 (int32)
+    return pd.to_datetime(pd.Series(dates)).values.astype("datetime64[D]").astype(np.int32).tobytes()
+
+
+def _decode_dates(blob: bytes) -> pd.DatetimeIndex:
+    return pd.DatetimeIndex(np.frombuffer(blob, dtype=np.int32).astype("datetime64[D]")).as_unit("ns")
+
+
+def _encode_values(values) -> bytes:
+    return np.asarray(values, dtype=np.float64).tobytes()
+
+
+def _decode_values(blob: bytes) -> np.ndarray:
+    return np.frombuffer(blob, dtype=np.float64).copy()
+
+
+class BacktestCache:
+    """
+        Хранилище ячеек бэктеста и их дневных прогнозов в SQLite.
+
+        Безопасно для нескольких процессов (WAL + timeout на блокировку),
+        поэтому один файл можно использовать из параллельного бэктеста.
+
+        Файл старой версии схемы пересоздаётся (PRAGMA user_version).
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+
+        self._conn = sqlite3.connect(filename, timeout=60)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+
+        with self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+
+            if version != CACHE_SCHEMA_VERSION:
+                self._conn.execute("DROP TABLE IF EXISTS backtest_cells")
+                self._conn.execute("DROP TABLE IF EXISTS forecast_vectors")
+                self._conn.execute(f"PRAGMA user_version = {CACHE_SCHEMA_VERSION}")
+
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS backtest_cells (
+                    CELL_KEY TEXT PRIMARY KEY,
+                    FULL_SIGN TEXT,
+                    METRIC_NAME TEXT,
+                    MODEL TEXT,
+                    TRAIN_WINDOW_DAYS INTEGER,
+                    START_DATE TEXT,
+                    METRICS_JSON TEXT,
+                    CREATED_AT TEXT
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS forecast_vectors (
+                    CELL_KEY TEXT PRIMARY KEY,
+                    FULL_SIGN TEXT,
+                    METRIC_NAME TEXT,
+                    MODEL TEXT,
+                    TRAIN_WINDOW_DAYS INTEGER,
+                    START_DATE TEXT,
+                    DDATES BLOB,
+                    FORECAST BLOB,
+                    UPDATED_AT TEXT
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS forecast_vectors_cell
+                ON forecast_vectors (FULL_SIGN, METRIC_NAME, MODEL, TRAIN_WINDOW_DAYS, START_DATE, UPDATED_AT)
+                """
+            )
+
+    @staticmethod
+    def _now() -> str:
+        return dt.datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")
+
+    def get(self, cell_key: str):
+        """
+            :return: (forecast_df, metrics) или None, если ячейки нет в кэше
+        """
+
+        row = self._conn.execute(
+            """
+            SELECT v.DDATES, v.FORECAST, c.METRICS_JSON
+            FROM backtest_cells c
+            JOIN forecast_vectors v ON v.CELL_KEY = c.CELL_KEY
+            WHERE c.CELL_KEY = ?
+            """,
+            (cell_key,)
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        forecast_df = pd.DataFrame({
+            "DDATE": _decode_dates(row[0]),
+            "FORECAST": _decode_values(row[1])
+        })
+
+        return forecast_df, json.loads(row[2])
+
+    def cached_keys(self, cell_keys: list[str]) -> set[str]:
+        """
+            Какие из ключей уже есть в кэше (без чтения прогнозов) —
+            batch-модели не пересчитывают такие ячейки.
+        """
+
+        cell_keys = sorted(set(cell_keys))
+        found = set()
+
+        # пачками: ограничение SQLite на число параметров запроса
+        for i in range(0, len(cell_keys), 500):
+            chunk = cell_keys[i:i + 500]
+
+            found.update(
+                row[0] for row in self._conn.execute(
+                    f"""
+                    SELECT c.CELL_KEY
+                    FROM backtest_cells c
+                    JOIN forecast_vectors v ON v.CELL_KEY = c.CELL_KEY
+                    WHERE c.CELL_KEY IN ({', '.join('?' * len(chunk))})
+                    """,
+                    chunk
+                )
+            )
+
+        return found
+
+    def put(
+            self,
+            cell_key: str,
+            full_sign: str,
+            metric_name: str,
+            model_key: str,
+            train_window_days: int,
+            start_date: pd.Timestamp,
+            forecast_df: pd.DataFrame,
+            metrics: dict | None
+    ):
+        """
+            Сохраняет ячейку и её дневной прогноз и сразу коммитит (прогон можно прервать в любой момент).
+        """
+
+        metrics_json = None if metrics is None else {
+            name: _to_builtin(value) for name, value in metrics.items()
+        }
+
+        cell = (
+            cell_key,
+            full_sign,
+            metric_name,
+            model_key,
+            int(train_window_days),
+            str(pd.Timestamp(start_date).date()),
+        )
+
+        now = self._now()
+
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO backtest_cells VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (*cell, json.dumps(metrics_json), now)
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO forecast_vectors VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    *cell,
+                    _encode_dates(forecast_df["DDATE"]),
+                    _encode_values(forecast_df["FORECAST"]),
+                    now,
+                )
+            )
+
+    def get_forecast(self, cell_key: str) -> pd.DataFrame | None:
+        """
+            Дневной прогноз ячейки по ключу кэша (графики и отчёт: ключ тот же, что в бэктесте).
+
+            :return: DataFrame [DDATE, FORECAST] или None
+        """
+
+        row = self._conn.execute(
+            "SELECT DDATES, FORECAST FROM forecast_vectors WHERE CELL_KEY = ?",
+            (cell_key,)
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        return pd.DataFrame({
+            "DDATE": _decode_dates(row[0]),
+            "FORECAST": _decode_values(row[1])
+        })
+
+    def close(self):
+        self._conn.close()
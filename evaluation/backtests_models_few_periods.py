@@ -1,23 +1,97 @@
 
+import hashlib
+
 import pandas as pd
 
 from evaluation.metrics import calc_month_metrics
 from utils.printers import print_month_metrics
 
-from forecast.baseline_month import baseline_forecast
-from forecast.recursive_catboost_forecast_month import recursive_catboost_forecast_to_month_end
-from forecast.direct_catboost_forecast_month import catboost_forecast_direct_to_month_end
-from forecast.random_forest_forecast_month import random_forest_forecast_direct_to_month_end
-from forecast.direct_lightgbm_forecast_month import lightgbm_forecast_to_month_end
-from forecast.xgboost_forecast_direct_month import xgboost_forecast_direct_to_month_end
-from forecast.recursive_lightGBM_forecast import recursive_lightGBM_forecast_to_month_end
-from forecast.baseline_exponential_holt_winters_forecast import (
-    baseline_simple_expon_forecast,
-    baseline_holt_forecast,
-    baseline_holt_winters_forecast
+from data.series_store import SeriesStore
+from forecast.models_registry import (
+    MODEL_REGISTRY,
+    KEY_SCOPE_CHANNEL,
+    KEY_SCOPE_SERIES,
+    model_cache_params,
+    model_key_scope,
+    model_warm_start,
+    warm_start_chain_before
 )
-from forecast.models_registry import MODEL_REGISTRY
+from evaluation.backtest_cache import BacktestCache, hash_series_slice, make_cell_key
+from evaluation.date_index import DateIndex, rows_between
+
+# служебные колонки прогноза о самом обучении (например warm start) -> в отчёт как <MODEL>_<COLUMN>
+FIT_INFO_COLUMNS = ["FIT_MODE", "FIT_SECONDS"]
+
+
+def scope_series_hash(
+        series_store: SeriesStore,
+        scope: str,
+        full_sign: str,
+        metric_name: str,
+        end_date: pd.Timestamp
+) -> str:
+    """
+        Хэш всех рядов, от которых зависит прогноз ячейки модели с key_scope = scope
+        (KEY_SCOPE_STORE - все ряды хранилища, KEY_SCOPE_CHANNEL - все метрики канала full_sign),
+        срезы до end_date.
+    """
+
+    keys = sorted(series_store.keys())
+
+    if scope == KEY_SCOPE_CHANNEL:
+        keys = [key for key in keys if key[0] == full_sign]
+
+    digest = hashlib.sha256(scope.encode())
+
+    for key in keys:
+        digest.update(repr(key).encode())
+        digest.update(hash_series_slice(series_store.get(*key), end_date).encode())
+
+    return digest.hexdigest()
+
+
+def backtest_cell_key(
+        df: pd.DataFrame,
+        model_key: str,
+        train_window_days: int,
+        start_date: pd.Timestamp,
+        series_hash: str | None = None,
+        scope_hash: str | None = None,
+        chain_dates: list[pd.Timestamp] | None = None
+) -> str | None:
+    """
+        Ключ ячейки бэктеста в BacktestCache — один и тот же для бэктеста и для графиков policy.
+
+        :param df: ряд связки
+        :param series_hash: уже посчитанный hash_series_slice(df, конец месяца) (один на дату для всех моделей)
+        :param scope_hash: scope_series_hash для моделей, обучающихся не только на своём ряду
+        :param chain_dates: даты цепочки warm start (BACKTEST_DATES прогона) - более ранние из них входят
+                            в ключ warm start моделей: прогноз зависит от дообучения и фазы full_refit_every
+        :return: ключ или None (такой модели нужен scope_hash, а его нет - ячейка без кэша)
+    """
+
+    if model_key_scope(model_key) != KEY_SCOPE_SERIES and scope_hash is None:
+        return None
+
+    end_date = start_date + pd.offsets.MonthEnd(0)
+
+    hyperparams = model_cache_params(model_key)
 
+    # данные более ранних дат цепочки уже в хэше среза ряда (он до конца месяца ячейки)
+    if model_warm_start(model_key):
+        hyperparams = {
+            **hyperparams,
+            "chain": [str(date.date()) for date in warm_start_chain_before(chain_dates, start_date)]
+        }
+
+    return make_cell_key(
+        series_hash=series_hash or hash_series_slice(df, end_date),
+        model_key=model_key,
+        train_window_days=train_window_days,
+        start_date=start_date,
+        hyperparams=hyperparams,
+        scope_hash=scope_hash
+    )
 
 
 def run_monthly_backtests(
@@ -26,11 +100,34 @@ def run_monthly_backtests(
         full_sign: str,
         metric_name: str,
         train_window_days: int,
-        models_to_run: list[str]
+        models_to_run: list[str],
+        cache_file: str | None = None,
+        precomputed_forecasts: dict | None = None,
+        scope_hashes: dict | None = None,
+        chain_dates: list[pd.Timestamp] | None = None
 ) -> pd.DataFrame:
+    """
+        Бэктест моделей по списку дат: прогноз до конца месяца и WMAPE по каждой модели.
+
+        :param cache_file: файл кэша ячеек бэктеста (SQLite). Если задан —
+            уже посчитанные ячейки берутся из кэша, новые сразу сохраняются в него.
+        :param precomputed_forecasts: {(MODEL, START_DATE): [DDATE, FORECAST]} — прогнозы,
+            уже посчитанные пачкой по всем связкам (batch-модели); модель для них не вызывается.
+            Колонки FIT_INFO_COLUMNS прогноза (FIT_MODE, FIT_SECONDS) сохраняются вместе с метриками
+            и попадают в отчёт как <MODEL>_FIT_MODE / <MODEL>_FIT_SECONDS
+        :param scope_hashes: {(MODEL, START_DATE): scope_series_hash} для моделей, обучающихся не только
+            на своём ряду (глобальные); без него такие ячейки считаются мимо кэша
+        :param chain_dates: даты цепочки warm start моделей (BACKTEST_DATES прогона): прогноз и ключ ячейки
+            такой модели - по более ранним из них (None - каждая дата обучается полностью)
+        :return: DataFrame, одна строка на дату бэктеста
+    """
 
     results_backtest = []
 
+    cache = BacktestCache(cache_file) if cache_file else None
+
+    date_index = DateIndex(df)
+
     for start_date in forecast_backtest_dates:
 
         end_date = start_date + pd.offsets.MonthEnd(0)
@@ -44,10 +141,7 @@ def run_monthly_backtests(
 
 
         # ✅ Факт месяца
-        fact_df = df[
-            (df['DDATE'] >= start_date) &
-            (df['DDATE'] <= end_date)
-        ].copy()
+        fact_df = rows_between(df, start_date, end_date, date_index)
 
         row = {
             "START_DATE": start_date.date(),
@@ -61,30 +155,83 @@ def run_monthly_backtests(
 
         forecast_dict = {}
 
+        # хэш среза ряда считаем один раз на дату (одинаков для всех моделей)
+        series_hash = hash_series_slice(df, end_date) if cache is not None else None
+
         # Цикл по выбранным моделям
         for model_key in models_to_run:
 
             print(f'\n MODEL: {model_key}')
 
-            model_func = MODEL_REGISTRY[model_key]
+            cell_key = None
+            cached = None
 
-            forecast_df = model_func(
-                df=df,
-                start=start_date,
-                end=end_date,
-                window=train_window_days,
-                full_sign=full_sign,
-                metric_name=metric_name
-            )
+            if cache is not None:
+                cell_key = backtest_cell_key(
+                    df=df,
+                    model_key=model_key,
+                    train_window_days=train_window_days,
+                    start_date=start_date,
+                    series_hash=series_hash,
+                    scope_hash=(scope_hashes or {}).get((model_key, start_date)),
+                    chain_dates=chain_dates
+                )
 
-            metrics = calc_month_metrics(
-                fact_df=fact_df,
-                forecast_df=forecast_df
-            )
+            if cell_key is not None:
+                cached = cache.get(cell_key)
+
+            if cached is not None:
+                print(" ♻️ ячейка взята из кэша бэктеста")
+                forecast_df, metrics = cached
+
+            else:
+                forecast_df = (precomputed_forecasts or {}).get((model_key, start_date))
+
+                if forecast_df is None:
+                    model_func = MODEL_REGISTRY[model_key]
+
+                    # warm start - по той же цепочке, что в ключе ячейки
+                    chain_kwargs = {"chain_dates": chain_dates} if model_warm_start(model_key) else {}
+
+                    forecast_df = model_func(
+                        df=df,
+                        start=start_date,
+                        end=end_date,
+                        window=train_window_days,
+                        full_sign=full_sign,
+                        metric_name=metric_name,
+                        **chain_kwargs
+                    )
+
+                metrics = calc_month_metrics(
+                    fact_df=fact_df,
+                    forecast_df=forecast_df
+                )
+
+                if metrics is not None:
+                    for column in FIT_INFO_COLUMNS:
+                        if column in forecast_df.columns and len(forecast_df):
+                            metrics[column] = forecast_df[column].iloc[0]
+
+                if cell_key is not None:
+                    cache.put(
+                        cell_key=cell_key,
+                        full_sign=full_sign,
+                        metric_name=metric_name,
+                        model_key=model_key,
+                        train_window_days=train_window_days,
+                        start_date=start_date,
+                        forecast_df=forecast_df,
+                        metrics=metrics
+                    )
 
             wmape = round(metrics["WMAPE_MONTH"], 4)
 
             row[f"{model_key}_WMAPE"] = wmape
+
+            for column in FIT_INFO_COLUMNS:
+                if column in metrics:
+                    row[f"{model_key}_{column}"] = metrics[column]
             wmape_values[model_key] = wmape
 
             # печать по каждой модели
@@ -104,4 +251,7 @@ def run_monthly_backtests(
 
         results_backtest.append(row)
 
+    if cache is not None:
+        cache.close()
+
     return pd.DataFrame(results_backtest)
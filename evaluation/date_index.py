@@ -0,0 +1,142 @@
+# evaluation/date_index.py
+"""
+    Индекс дат ряда для быстрого временного разбиения.
+
+    Раньше каждый срез "последние N дней до даты d" / "даты в [start, end]"
+    был двумя сравнениями по всей колонке DDATE + .copy(),
+    а рекурсивные модели делали это на каждый день прогноза.
+
+    DateIndex строится один раз на ряд (отсортированные даты) и превращает такие срезы
+    в границы searchsorted -> df.iloc[a:b] (без маски и без копии).
+
+    Результат совпадает с прежними фильтрами один в один:
+    - если даты ряда строго возрастают — срез по границам
+    - иначе (несортированный ряд, дубли дат) — прежний фильтр по маске
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class DateIndex:
+    """
+        Отсортированные даты одного ряда (колонка DDATE).
+    """
+
+    def __init__(self, df: pd.DataFrame):
+
+        self.dates = df["DDATE"].values
+
+        self.is_sorted = bool(
+            len(self.dates) < 2 or
+            (self.dates[1:] > self.dates[:-1]).all()
+        )
+
+    def position(self, date, side: str = "left") -> int:
+        """
+            Позиция даты в ряду (np.searchsorted):
+            side="left"  - число строк с DDATE <  date
+            side="right" - число строк с DDATE <= date
+        """
+
+        return int(np.searchsorted(self.dates, pd.Timestamp(date).to_datetime64(), side=side))
+
+    def between(self, start, end) -> slice:
+        """
+            Строки с start <= DDATE <= end.
+        """
+
+        return slice(self.position(start, "left"), self.position(end, "right"))
+
+    def between_before(self, start, date) -> slice:
+        """
+            Строки с start <= DDATE < date.
+        """
+
+        return slice(self.position(start, "left"), self.position(date, "left"))
+
+    def tail_before(self, date, n_rows: int) -> slice:
+        """
+            Последние n_rows строк с DDATE < date.
+        """
+
+        stop = self.position(date, "left")
+
+        return slice(max(stop - n_rows, 0), stop)
+
+
+def _get_index(df: pd.DataFrame, date_index: DateIndex | None) -> DateIndex:
+    return date_index if date_index is not None else DateIndex(df)
+
+
+def rows_between(
+        df: pd.DataFrame,
+        start,
+        end,
+        date_index: DateIndex | None = None
+) -> pd.DataFrame:
+    """
+        То же, что df[(df["DDATE"] >= start) & (df["DDATE"] <= end)].
+
+        :param date_index: индекс дат df (если срезов по одному df много — строить один раз)
+    """
+
+    date_index = _get_index(df, date_index)
+
+    if date_index.is_sorted:
+        return df.iloc[date_index.between(start, end)]
+
+    return df[(df["DDATE"] >= start) & (df["DDATE"] <= end)]
+
+
+def rows_between_before(
+        df: pd.DataFrame,
+        start,
+        date,
+        date_index: DateIndex | None = None
+) -> pd.DataFrame:
+    """
+        То же, что df[(df["DDATE"] >= start) & (df["DDATE"] < date)] — окно обучения в днях до даты старта.
+    """
+
+    date_index = _get_index(df, date_index)
+
+    if date_index.is_sorted:
+        return df.iloc[date_index.between_before(start, date)]
+
+    return df[(df["DDATE"] >= start) & (df["DDATE"] < date)]
+
+
+def rows_tail_before(
+        df: pd.DataFrame,
+        date,
+        n_rows: int,
+        date_index: DateIndex | None = None
+) -> pd.DataFrame:
+    """
+        То же, что df[df["DDATE"] < date].tail(n_rows) — окно обучения direct-моделей (в строках).
+    """
+
+    date_index = _get_index(df, date_index)
+
+    if date_index.is_sorted:
+        return df.iloc[date_index.tail_before(date, n_rows)]
+
+    return df[df["DDATE"] < date].tail(n_rows)
+
+
+def history_before(
+        df: pd.DataFrame,
+        date,
+        date_index: DateIndex | None = None
+) -> pd.DataFrame:
+    """
+        То же, что df[df["DDATE"] < date].sort_values("DDATE") — история ряда до даты прогноза.
+    """
+
+    date_index = _get_index(df, date_index)
+
+    if date_index.is_sorted:
+        return df.iloc[:date_index.position(date, "left")]
+
+    return df[df["DDATE"] < date].sort_values("DDATE")
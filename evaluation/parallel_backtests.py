@@ -0,0 +1,387 @@
+# evaluation/parallel_backtests.py
+"""
+    Параллельный прогон сетки бэктестов.
+
+    Сетка main():
+        TRAIN_WINDOWS × FULL_SIGN × METRICS × BACKTEST_DATES × MODELS_TO_RUN
+
+    разбивается на независимые ячейки (окно, канал, метрика, дата бэктеста).
+    Каждая ячейка считается через тот же run_monthly_backtests (одна дата),
+    ячейки выполняются на пуле процессов.
+
+    Важно:
+    - итоговый final_report совпадает с последовательным прогоном,
+      в том же порядке строк (окно -> канал × метрика -> дата)
+    - каждому процессу ограничивается число потоков моделей,
+      чтобы процессы не делили между собой одни и те же ядра
+    - batch-модели (BATCH_MODEL_REGISTRY) считаются заранее сразу по всем ячейкам
+      (векторно по связкам / окнам / датам), ячейки получают готовые прогнозы;
+      ячейки, которые уже есть в кэше бэктеста, batch-модели не передаются
+    - если все модели лёгкие (ModelSpec.cost == COST_LIGHT), сетка считается в текущем процессе
+    - run_backtest_cells принимает ячейки со своим списком моделей
+      (racing-отбор, evaluation/racing_selection.py, считает только оставшихся кандидатов)
+    - глобальные модели (ModelSpec.key_scope != KEY_SCOPE_SERIES) обучаются на многих рядах,
+      ключ их ячейки в кэше включает хэш всех этих рядов (scope_series_hash)
+    - warm start модели (ModelSpec.warm_start) считаются по цепочке chain_dates (все BACKTEST_DATES прогона),
+      а не по датам текущего вызова: racing-раунд и сетка дают ячейке один прогноз и один ключ
+    - исключение из совпадения с последовательным прогоном: ранняя остановка
+      с переиспользованием числа итераций (models/early_stopping.py) зависит от того,
+      какая дата связки обучалась в процессе первой
+"""
+
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from data.series_store import SeriesStore
+from evaluation.backtest_cache import BacktestCache, hash_series_slice
+from evaluation.backtests_models_few_periods import backtest_cell_key, run_monthly_backtests, scope_series_hash
+from forecast.models_registry import (
+    BATCH_MODEL_REGISTRY,
+    COST_LIGHT,
+    KEY_SCOPE_SERIES,
+    KEY_SCOPE_STORE,
+    model_key_scope,
+    model_warm_start,
+    models_cost
+)
+from models.threads import limit_model_threads
+
+
+def build_backtest_grid(
+        full_signs: list[str],
+        metrics: list[str],
+        train_windows: list[int],
+        backtest_dates: list[pd.Timestamp]
+) -> list[tuple]:
+    """
+        Раскладывает сетку бэктестов на ячейки в детерминированном порядке:
+            окно -> (канал × метрика) -> дата
+
+        :return: список (train_window, full_sign, metric, start_date)
+    """
+
+    grid = []
+
+    for train_window in train_windows:
+        for full_sign, metric in itertools.product(full_signs, metrics):
+            for start_date in backtest_dates:
+                grid.append((train_window, full_sign, metric, start_date))
+
+    return grid
+
+
+def _init_backtest_worker(threads_per_worker: int):
+    # Выполняется один раз при старте процесса пула
+    limit_model_threads(threads_per_worker)
+
+
+def _run_backtest_cell(
+        work_df: pd.DataFrame,
+        train_window: int,
+        full_sign: str,
+        metric: str,
+        start_date: pd.Timestamp,
+        models_to_run: list[str],
+        cache_file: str | None,
+        precomputed_forecasts: dict | None = None,
+        scope_hashes: dict | None = None,
+        chain_dates: list[pd.Timestamp] | None = None
+) -> pd.DataFrame:
+    """
+        Одна ячейка сетки: все модели для (окно, канал, метрика, дата).
+    """
+
+    results_df = run_monthly_backtests(
+        df=work_df,
+        full_sign=full_sign,
+        metric_name=metric,
+        forecast_backtest_dates=[start_date],
+        train_window_days=train_window,
+        models_to_run=models_to_run,
+        cache_file=cache_file,
+        precomputed_forecasts=precomputed_forecasts,
+        scope_hashes=scope_hashes,
+        chain_dates=chain_dates
+    )
+
+    results_df["TRAIN_WINDOW_DAYS"] = train_window
+    results_df["FULL_SIGN"] = full_sign
+    results_df["METRIC_NAME"] = metric
+
+    return results_df
+
+
+def precompute_batch_forecasts(
+        series_store: SeriesStore,
+        grid: list[tuple],
+        models_to_run: list[str],
+        chain_dates: list[pd.Timestamp] | None = None
+) -> dict:
+    """
+        Прогнозы batch-моделей (BATCH_MODEL_REGISTRY) сразу по всем ячейкам сетки.
+
+        :param chain_dates: даты цепочки warm start моделей (BACKTEST_DATES прогона)
+        :return: {(окно, канал, метрика, дата): {(MODEL, START_DATE): [DDATE, FORECAST]}}
+    """
+
+    precomputed = {}
+
+    for model_key in models_to_run:
+
+        if model_key not in BATCH_MODEL_REGISTRY:
+            continue
+
+        chain_kwargs = {"chain_dates": chain_dates} if model_warm_start(model_key) else {}
+
+        forecasts = BATCH_MODEL_REGISTRY[model_key](series_store, grid, **chain_kwargs)
+
+        for cell, forecast_df in forecasts.items():
+            precomputed.setdefault(cell, {})[(model_key, cell[3])] = forecast_df
+
+    return precomputed
+
+
+def cells_scope_hashes(
+        series_store: SeriesStore,
+        cells: list[tuple]
+) -> dict:
+    """
+        Хэши рядов для ключей кэша моделей, обучающихся не только на ряду ячейки.
+        Хэш всего хранилища считается один раз на дату.
+
+        :param cells: список (train_window, full_sign, metric, start_date, models)
+        :return: {(окно, канал, метрика, дата): {(MODEL, START_DATE): scope_hash}}
+    """
+
+    memo = {}
+    scope_hashes = {}
+
+    for train_window, full_sign, metric, start_date, models in cells:
+        end_date = start_date + pd.offsets.MonthEnd(0)
+
+        for model_key in models:
+            scope = model_key_scope(model_key)
+
+            if scope == KEY_SCOPE_SERIES:
+                continue
+
+            memo_key = (scope, end_date) if scope == KEY_SCOPE_STORE else (scope, full_sign, end_date)
+
+            if memo_key not in memo:
+                memo[memo_key] = scope_series_hash(series_store, scope, full_sign, metric, end_date)
+
+            scope_hashes.setdefault(
+                (train_window, full_sign, metric, start_date), {}
+            )[(model_key, start_date)] = memo[memo_key]
+
+    return scope_hashes
+
+
+def cached_batch_cells(
+        series_store: SeriesStore,
+        cells: list[tuple],
+        scope_hashes: dict,
+        cache_file: str,
+        chain_dates: list[pd.Timestamp] | None = None
+) -> set[tuple]:
+    """
+        Ячейки batch-моделей, уже посчитанные в кэше бэктеста (тот же ключ, что в run_monthly_backtests).
+        Хэш среза ряда считается один раз на (канал, метрика, дата).
+
+        :param cells: список (train_window, full_sign, metric, start_date, models)
+        :return: {(MODEL, (окно, канал, метрика, дата))}
+    """
+
+    series_hashes = {}
+    cell_keys = {}
+
+    for train_window, full_sign, metric, start_date, models in cells:
+        cell = (train_window, full_sign, metric, start_date)
+
+        for model_key in models:
+
+            if model_key not in BATCH_MODEL_REGISTRY:
+                continue
+
+            series_hash_key = (full_sign, metric, start_date)
+
+            if series_hash_key not in series_hashes:
+                series_hashes[series_hash_key] = hash_series_slice(
+                    series_store.get(full_sign, metric),
+                    start_date + pd.offsets.MonthEnd(0)
+                )
+
+            cell_key = backtest_cell_key(
+                df=series_store.get(full_sign, metric),
+                model_key=model_key,
+                train_window_days=train_window,
+                start_date=start_date,
+                series_hash=series_hashes[series_hash_key],
+                scope_hash=scope_hashes.get(cell, {}).get((model_key, start_date)),
+                chain_dates=chain_dates
+            )
+
+            if cell_key is not None:
+                cell_keys[(model_key, cell)] = cell_key
+
+    if not cell_keys:
+        return set()
+
+    cache = BacktestCache(cache_file)
+
+    try:
+        found = cache.cached_keys(list(cell_keys.values()))
+    finally:
+        cache.close()
+
+    return {model_cell for model_cell, cell_key in cell_keys.items() if cell_key in found}
+
+
+def run_backtest_cells(
+        series_store: SeriesStore,
+        cells: list[tuple],
+        n_workers: int = 1,
+        threads_per_worker: int = 1,
+        cache_file: str | None = None,
+        chain_dates: list[pd.Timestamp] | None = None
+) -> pd.DataFrame:
+    """
+        Прогоняет ячейки бэктеста, у каждой ячейки свой список моделей
+        (сетка - все модели во всех ячейках, racing-отбор - только оставшиеся кандидаты).
+
+        :param cells: список (train_window, full_sign, metric, start_date, models)
+        :param chain_dates: все даты бэктеста прогона - цепочка warm start моделей
+                            (racing передаёт все даты, а не только даты раунда)
+        :return: строки ячеек в порядке cells
+    """
+
+    if not cells:
+        return pd.DataFrame()
+
+    all_models = list(dict.fromkeys(model_key for *_, models in cells for model_key in models))
+
+    scope_hashes = cells_scope_hashes(series_store, cells) if cache_file else {}
+
+    # ---- ячейки batch-моделей, уже лежащие в кэше: ячейка возьмёт их из кэша, пересчёт не нужен ----
+    cached_cells = (
+        cached_batch_cells(series_store, cells, scope_hashes, cache_file, chain_dates) if cache_file else set()
+    )
+
+    # ---- batch-модели: сразу по всем ячейкам, где модель есть и её нет в кэше ----
+    precomputed = {}
+
+    for model_key in all_models:
+
+        if model_key not in BATCH_MODEL_REGISTRY:
+            continue
+
+        model_grid = [
+            tuple(cell[:4]) for cell in cells
+            if model_key in cell[4] and (model_key, tuple(cell[:4])) not in cached_cells
+        ]
+
+        if not model_grid:
+            continue
+
+        for cell, forecasts in precompute_batch_forecasts(
+                series_store, model_grid, [model_key], chain_dates
+        ).items():
+            precomputed.setdefault(cell, {}).update(forecasts)
+
+    # ---- только лёгкие модели (numpy-baseline): запуск пула процессов дороже самих прогнозов ----
+    if models_cost(all_models) == COST_LIGHT:
+        n_workers = 1
+
+    if n_workers <= 1:
+        all_results = [
+            _run_backtest_cell(
+                series_store.get(full_sign, metric),
+                train_window,
+                full_sign,
+                metric,
+                start_date,
+                models,
+                cache_file,
+                precomputed.get((train_window, full_sign, metric, start_date)),
+                scope_hashes.get((train_window, full_sign, metric, start_date)),
+                chain_dates
+            )
+            for train_window, full_sign, metric, start_date, models in cells
+        ]
+
+    else:
+        print(f"\n✅ Параллельный бэктест: {len(cells)} ячеек, процессов: {n_workers}")
+
+        # spawn: чистые процессы, без копии состояния OpenMP родителя
+        with ProcessPoolExecutor(
+                max_workers=n_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_backtest_worker,
+                initargs=(threads_per_worker,)
+        ) as executor:
+
+            futures = [
+                executor.submit(
+                    _run_backtest_cell,
+                    series_store.get(full_sign, metric),
+                    train_window,
+                    full_sign,
+                    metric,
+                    start_date,
+                    models,
+                    cache_file,
+                    precomputed.get((train_window, full_sign, metric, start_date)),
+                    scope_hashes.get((train_window, full_sign, metric, start_date)),
+                    chain_dates
+                )
+                for train_window, full_sign, metric, start_date, models in cells
+            ]
+
+            # собираем строго в порядке ячеек, а не в порядке завершения
+            all_results = [future.result() for future in futures]
+
+    return pd.concat(all_results, ignore_index=True)
+
+
+def run_backtest_grid(
+        df: pd.DataFrame | SeriesStore,
+        full_signs: list[str],
+        metrics: list[str],
+        train_windows: list[int],
+        backtest_dates: list[pd.Timestamp],
+        models_to_run: list[str],
+        n_workers: int = 1,
+        threads_per_worker: int = 1,
+        cache_file: str | None = None
+) -> pd.DataFrame:
+    """
+        Прогоняет всю сетку бэктестов и возвращает final_report.
+
+        :param df: длинный датафрейм с календарными фичами (все каналы и метрики) или SeriesStore по нему
+        :param n_workers: число процессов (1 = последовательно в текущем процессе)
+        :param threads_per_worker: потоков на одну модель внутри процесса пула
+        :param cache_file: файл кэша ячеек бэктеста (None = без кэша)
+        :return: final_report (как в последовательном main)
+    """
+
+    grid = build_backtest_grid(
+        full_signs=full_signs,
+        metrics=metrics,
+        train_windows=train_windows,
+        backtest_dates=backtest_dates
+    )
+
+    # ---- ряды связок раскладываются один раз ----
+    series_store = SeriesStore.from_df(df)
+
+    return run_backtest_cells(
+        series_store,
+        [(*cell, models_to_run) for cell in grid],
+        n_workers=n_workers,
+        threads_per_worker=threads_per_worker,
+        cache_file=cache_file,
+        chain_dates=backtest_dates
+    )
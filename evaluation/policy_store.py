@@ -0,0 +1,303 @@
+# evaluation/policy_store.py
+"""
+    Хранилище policy (лучшая модель и окно на связку) в SQLite.
+
+    Раньше policy_model.json на каждом прогоне читался целиком, дополнялся и переписывался (indent=4),
+    а прогноз разбирал всю историю и сортировал её ради последней строки на связку —
+    оба шага дорожали с каждым запуском.
+
+    Таблицы:
+        policy_history  - все записи всех запусков (append-only), индекс по RUN_DATE
+        policy_latest   - текущая policy: одна строка на (FULL_SIGN, METRIC_NAME),
+                          обновляется в той же транзакции, что и запись в историю
+        policy_migrations - какие JSON-файлы уже перенесены (миграция выполняется один раз)
+
+    Запись = один запуск выбора policy, одна транзакция BEGIN IMMEDIATE (WAL + timeout на блокировку),
+    поэтому параллельные писатели не теряют и не перемешивают строки, а читатели видят запуск целиком.
+
+    Поля строки policy (BEST_MODEL, BEST_WINDOW, BEST_MEAN_WMAPE, ...) хранятся как JSON:
+    новые колонки отчёта не требуют смены схемы.
+"""
+
+import datetime as dt
+import json
+import os
+import sqlite3
+
+import pandas as pd
+
+POLICY_SCHEMA_VERSION = 1
+
+_KEY_COLUMNS = ["FULL_SIGN", "METRIC_NAME"]
+
+_RUN_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _to_builtin(value):
+    # numpy-числа -> int / float для json
+    if hasattr(value, "item"):
+        return value.item()
+
+    return value
+
+
+def _records_to_df(rows) -> pd.DataFrame:
+    # rows: (RUN_DATE, RECORD_JSON)
+    records = [{**json.loads(record_json), "RUN_DATE": run_date} for run_date, record_json in rows]
+
+    policy_df = pd.DataFrame(records)
+
+    if policy_df.empty:
+        return pd.DataFrame(columns=[*_KEY_COLUMNS, "RUN_DATE"])
+
+    policy_df["RUN_DATE"] = pd.to_datetime(policy_df["RUN_DATE"])
+
+    return policy_df
+
+
+class PolicyStore:
+    """
+        История policy и текущая policy по связкам в SQLite.
+
+        Безопасно для нескольких процессов (WAL + BEGIN IMMEDIATE).
+        Файл другой версии схемы не удаляется (это история выбора моделей) — ошибка.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+
+        self._conn = sqlite3.connect(filename, timeout=60)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+
+        with self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+
+            if version not in (0, POLICY_SCHEMA_VERSION):
+                raise RuntimeError(
+                    f"Хранилище policy {filename}: версия схемы {version}, ожидается {POLICY_SCHEMA_VERSION}"
+                )
+
+            self._conn.execute(f"PRAGMA user_version = {POLICY_SCHEMA_VERSION}")
+
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS policy_history (
+                    ID INTEGER PRIMARY KEY AUTOINCREMENT,
+                    RUN_DATE TEXT,
+                    FULL_SIGN TEXT,
+                    METRIC_NAME TEXT,
+                    RECORD_JSON TEXT
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS policy_history_run_date
+                ON policy_history (RUN_DATE)
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS policy_latest (
+                    FULL_SIGN TEXT,
+                    METRIC_NAME TEXT,
+                    RUN_DATE TEXT,
+                    HISTORY_ID INTEGER,
+                    RECORD_JSON TEXT,
+                    PRIMARY KEY (FULL_SIGN, METRIC_NAME)
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS policy_migrations (
+                    SOURCE TEXT PRIMARY KEY,
+                    N_RECORDS INTEGER,
+                    MIGRATED_AT TEXT
+                )
+                """
+            )
+
+    @staticmethod
+    def _now() -> str:
+        return dt.datetime.now().strftime(_RUN_DATE_FORMAT)
+
+    def _insert(self, run_date: str, record: dict):
+        # история + текущая policy связки (более поздний RUN_DATE побеждает, при равном - более поздняя запись)
+        record = {
+            name: _to_builtin(value)
+            for name, value in record.items()
+            if name != "RUN_DATE"
+        }
+
+        full_sign = record["FULL_SIGN"]
+        metric_name = record["METRIC_NAME"]
+        record_json = json.dumps(record, ensure_ascii=False)
+
+        history_id = self._conn.execute(
+            "INSERT INTO policy_history (RUN_DATE, FULL_SIGN, METRIC_NAME, RECORD_JSON) VALUES (?, ?, ?, ?)",
+            (run_date, full_sign, metric_name, record_json)
+        ).lastrowid
+
+        self._conn.execute(
+            """
+            INSERT INTO policy_latest VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (FULL_SIGN, METRIC_NAME) DO UPDATE SET
+                RUN_DATE = excluded.RUN_DATE,
+                HISTORY_ID = excluded.HISTORY_ID,
+                RECORD_JSON = excluded.RECORD_JSON
+            WHERE excluded.RUN_DATE >= policy_latest.RUN_DATE
+            """,
+            (full_sign, metric_name, run_date, history_id, record_json)
+        )
+
+    def append(
+            self,
+            policy_df: pd.DataFrame,
+            run_date: str | None = None
+    ) -> str:
+        """
+            Дописывает policy одного запуска (одна транзакция).
+
+            :param policy_df: BEST_MODEL_POLICY (FULL_SIGN, METRIC_NAME, BEST_WINDOW, BEST_MODEL, ...)
+            :param run_date: дата запуска (по умолчанию - сейчас)
+            :return: RUN_DATE записи
+        """
+
+        run_date = run_date or self._now()
+
+        with self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+
+            for record in policy_df.to_dict(orient="records"):
+                self._insert(run_date, record)
+
+        return run_date
+
+    def current(self, full_sign: str, metric_name: str) -> dict | None:
+        """
+            Текущая policy связки (поиск по первичному ключу, без разбора истории).
+
+            :return: запись policy с RUN_DATE или None
+        """
+
+        row = self._conn.execute(
+            "SELECT RUN_DATE, RECORD_JSON FROM policy_latest WHERE FULL_SIGN = ? AND METRIC_NAME = ?",
+            (full_sign, metric_name)
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        return {**json.loads(row[1]), "RUN_DATE": pd.Timestamp(row[0])}
+
+    def latest_policy(self) -> pd.DataFrame:
+        """
+            Текущая policy по всем связкам (последний запуск на каждую связку).
+        """
+
+        rows = self._conn.execute(
+            "SELECT RUN_DATE, RECORD_JSON FROM policy_latest ORDER BY HISTORY_ID"
+        ).fetchall()
+
+        return _records_to_df(rows)
+
+    def history(
+            self,
+            run_date_from=None,
+            run_date_to=None
+    ) -> pd.DataFrame:
+        """
+            Записи policy за период запусков (границы включительно, None - без границы).
+        """
+
+        conditions = []
+        params = []
+
+        if run_date_from is not None:
+            conditions.append("RUN_DATE >= ?")
+            params.append(pd.Timestamp(run_date_from).strftime(_RUN_DATE_FORMAT))
+
+        if run_date_to is not None:
+            conditions.append("RUN_DATE <= ?")
+            params.append(pd.Timestamp(run_date_to).strftime(_RUN_DATE_FORMAT))
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        rows = self._conn.execute(
+            f"SELECT RUN_DATE, RECORD_JSON FROM policy_history {where} ORDER BY RUN_DATE, ID",
+            params
+        ).fetchall()
+
+        return _records_to_df(rows)
+
+    def run_dates(self) -> list[pd.Timestamp]:
+        """
+            Даты всех запусков выбора policy.
+        """
+
+        rows = self._conn.execute(
+            "SELECT DISTINCT RUN_DATE FROM policy_history ORDER BY RUN_DATE"
+        ).fetchall()
+
+        return [pd.Timestamp(row[0]) for row in rows]
+
+    def migrate_json(self, json_file: str) -> int:
+        """
+            Однократный перенос истории из policy JSON (формат save_policy_json).
+            Повторный вызов для того же файла ничего не делает.
+
+            :return: сколько записей перенесено
+        """
+
+        if not os.path.exists(json_file):
+            return 0
+
+        source = os.path.abspath(json_file)
+
+        with self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+
+            done = self._conn.execute(
+                "SELECT 1 FROM policy_migrations WHERE SOURCE = ?",
+                (source,)
+            ).fetchone()
+
+            if done is not None:
+                return 0
+
+            with open(json_file, "r", encoding="utf-8") as f:
+                content = f.read().strip()
+
+            records = json.loads(content) if content else []
+
+            # порядок файла = порядок записи, RUN_DATE - из записи
+            for record in records:
+                self._insert(pd.Timestamp(record["RUN_DATE"]).strftime(_RUN_DATE_FORMAT), record)
+
+            self._conn.execute(
+                "INSERT INTO policy_migrations VALUES (?, ?, ?)",
+                (source, len(records), self._now())
+            )
+
+        print(f"✅ Policy из {json_file} перенесена в {self.filename}: {len(records)} записей")
+
+        return len(records)
+
+    def close(self):
+        self._conn.close()
+
+
+def migrate_policy_json(store_file: str, json_file: str) -> int:
+    """
+        Переносит старый policy JSON в хранилище (один раз; дальше - no-op).
+    """
+
+    store = PolicyStore(store_file)
+
+    try:
+        return store.migrate_json(json_file)
+    finally:
+        store.close()
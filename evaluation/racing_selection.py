@@ -0,0 +1,206 @@
+# evaluation/racing_selection.py
+"""
+    Выбор модели и окна гонкой на выбывание (successive halving) вместо полной сетки.
+
+    Полная сетка считает MODELS_TO_RUN × TRAIN_WINDOWS × BACKTEST_DATES на каждую связку,
+    даже если кандидат заметно проигрывает уже после первых дат.
+
+    Кандидат связки (FULL_SIGN × METRIC_NAME) = (модель, окно). Раунды:
+        1. все кандидаты считаются на первых first_dates датах бэктеста
+        2. по среднему WMAPE на всех посчитанных датах отбрасывается худшая доля drop_fraction
+           (остаётся хотя бы один кандидат)
+        3. оставшиеся считаются на следующих датах (число посчитанных дат удваивается), и так далее
+           до последней даты - победитель посчитан на всех BACKTEST_DATES, как в сетке
+
+    Ячейки раунда считаются тем же run_backtest_cells (пул процессов, кэш ячеек, batch-модели).
+
+    Отчёт в формате final_report: у выбывших кандидатов WMAPE поздних дат пустые (NaN).
+    build_summary_tables выбирает policy только среди кандидатов, посчитанных на всех датах связки,
+    поэтому BEST_MODEL_POLICY имеет тот же формат, что и после сетки.
+"""
+
+import math
+
+import pandas as pd
+
+from data.series_store import SeriesStore
+from evaluation.parallel_backtests import build_backtest_grid, run_backtest_cells, run_backtest_grid
+
+
+def racing_rounds(n_dates: int, first_dates: int = 2) -> list[int]:
+    """
+        Сколько дат посчитано к концу каждого раунда: first_dates, затем удваивается до n_dates.
+
+        Например: 9 дат, first_dates=2 -> [2, 4, 8, 9]
+    """
+
+    rounds = []
+    n_done = min(max(first_dates, 1), n_dates)
+
+    while True:
+        rounds.append(n_done)
+
+        if n_done >= n_dates:
+            return rounds
+
+        n_done = min(n_done * 2, n_dates)
+
+
+def _survivors(
+        round_report: pd.DataFrame,
+        candidates: list[tuple],
+        drop_fraction: float
+) -> list[tuple]:
+    # лучшие (1 - drop_fraction) кандидатов связки по среднему WMAPE всех посчитанных дат
+    scores = []
+
+    for order, (model_key, train_window) in enumerate(candidates):
+        wmape = round_report.loc[round_report["TRAIN_WINDOW_DAYS"] == train_window, f"{model_key}_WMAPE"]
+        scores.append((wmape.mean(), order, (model_key, train_window)))
+
+    # NaN (модель не посчиталась ни на одной дате) - в конец
+    scores.sort(key=lambda score: (math.isnan(score[0]), score[0], score[1]))
+
+    n_keep = max(1, math.ceil(len(candidates) * (1 - drop_fraction)))
+
+    # в исходном порядке кандидатов (порядок моделей в ячейке как в сетке)
+    return [candidate for _, _, candidate in sorted(scores[:n_keep], key=lambda score: score[1])]
+
+
+def run_racing_selection(
+        df: pd.DataFrame | SeriesStore,
+        full_signs: list[str],
+        metrics: list[str],
+        train_windows: list[int],
+        backtest_dates: list[pd.Timestamp],
+        models_to_run: list[str],
+        n_workers: int = 1,
+        threads_per_worker: int = 1,
+        cache_file: str | None = None,
+        first_dates: int = 2,
+        drop_fraction: float = 0.5
+) -> pd.DataFrame:
+    """
+        Бэктест гонкой на выбывание.
+
+        :param first_dates: на скольких первых датах считаются все кандидаты
+        :param drop_fraction: доля худших кандидатов связки, выбывающих после каждого раунда
+        :return: final_report (формат run_backtest_grid, у выбывших кандидатов поздние даты - NaN)
+    """
+
+    series_store = SeriesStore.from_df(df)
+
+    series = [(full_sign, metric) for full_sign in full_signs for metric in metrics]
+
+    # кандидаты связки: (модель, окно)
+    candidates = {
+        key: [(model_key, train_window) for train_window in train_windows for model_key in models_to_run]
+        for key in series
+    }
+
+    reports = []
+    n_fits = 0
+    n_done = 0
+
+    for n_round, n_dates in enumerate(racing_rounds(len(backtest_dates), first_dates), start=1):
+
+        round_dates = backtest_dates[n_done:n_dates]
+
+        # ячейки раунда: окно × связка × дата, в ячейке - оставшиеся модели с этим окном
+        cells = []
+
+        for train_window, full_sign, metric, start_date in build_backtest_grid(
+                full_signs, metrics, train_windows, round_dates
+        ):
+            models = [
+                model_key
+                for model_key, window in candidates[(full_sign, metric)]
+                if window == train_window
+            ]
+
+            if models:
+                cells.append((train_window, full_sign, metric, start_date, models))
+
+        round_fits = sum(len(cell[4]) for cell in cells)
+        n_fits += round_fits
+
+        print(
+            f"\n🏁 Racing раунд {n_round}: даты {n_done + 1}-{n_dates} из {len(backtest_dates)}, "
+            f"кандидатов {sum(len(c) for c in candidates.values())}, прогнозов {round_fits}"
+        )
+
+        reports.append(
+            run_backtest_cells(
+                series_store,
+                cells,
+                n_workers=n_workers,
+                threads_per_worker=threads_per_worker,
+                cache_file=cache_file,
+                # цепочка warm start - по всем датам бэктеста, как в полной сетке
+                chain_dates=backtest_dates
+            )
+        )
+
+        n_done = n_dates
+
+        if n_done >= len(backtest_dates):
+            break
+
+        # ---- выбывание по всем посчитанным датам ----
+        report_so_far = pd.concat(reports, ignore_index=True)
+
+        for (full_sign, metric), series_candidates in candidates.items():
+            series_report = report_so_far[
+                (report_so_far["FULL_SIGN"] == full_sign) & (report_so_far["METRIC_NAME"] == metric)
+            ]
+
+            candidates[(full_sign, metric)] = _survivors(series_report, series_candidates, drop_fraction)
+
+    n_grid_fits = len(series) * len(train_windows) * len(models_to_run) * len(backtest_dates)
+
+    print(
+        f"\n✅ Racing: прогнозов {n_fits} из {n_grid_fits} полной сетки, "
+        f"сэкономлено {n_grid_fits - n_fits} ({(n_grid_fits - n_fits) / max(n_grid_fits, 1):.0%})"
+    )
+
+    final_report = pd.concat(reports, ignore_index=True)
+
+    # порядок строк - как в сетке: окно -> (канал × метрика) -> дата
+    grid_order = {
+        cell: i
+        for i, cell in enumerate(build_backtest_grid(full_signs, metrics, train_windows, backtest_dates))
+    }
+
+    order = [
+        grid_order[(row.TRAIN_WINDOW_DAYS, row.FULL_SIGN, row.METRIC_NAME, pd.Timestamp(row.START_DATE))]
+        for row in final_report[["TRAIN_WINDOW_DAYS", "FULL_SIGN", "METRIC_NAME", "START_DATE"]].itertuples()
+    ]
+
+    return (
+        final_report
+        .iloc[sorted(range(len(order)), key=order.__getitem__)]
+        .reset_index(drop=True)
+    )
+
+
+def run_model_selection(
+        selection_mode: str = "grid",
+        first_dates: int = 2,
+        drop_fraction: float = 0.5,
+        **grid_kwargs
+) -> pd.DataFrame:
+    """
+        Бэктест для выбора policy по SELECTION_MODE.
+
+        :param selection_mode: "grid" (run_backtest_grid) или "racing" (run_racing_selection)
+        :param grid_kwargs: аргументы run_backtest_grid (df, full_signs, metrics, ...)
+        :return: final_report
+    """
+
+    if selection_mode == "grid":
+        return run_backtest_grid(**grid_kwargs)
+
+    if selection_mode == "racing":
+        return run_racing_selection(first_dates=first_dates, drop_fraction=drop_fraction, **grid_kwargs)
+
+    raise ValueError(f"Неизвестный SELECTION_MODE: {selection_mode} (grid | racing)")
@@ -12,39 +12,31 @@
 - какие метрики нестабильны
 - худшие ошибки модели
 """
-import json
-import datetime as dt
 import pandas as pd
 
-def save_policy_json(
+from data.series_store import SeriesStore
+from evaluation.backtest_cache import BacktestCache
+from evaluation.backtests_models_few_periods import backtest_cell_key
+from evaluation.parallel_backtests import cells_scope_hashes
+from evaluation.policy_store import PolicyStore
+
+def save_policy(
         policy_df: pd.DataFrame,
-        filename="policy_model.json"
+        filename="policy_store.sqlite"
 ):
+    """
+        Дописывает policy запуска в хранилище (evaluation/policy_store.py):
+        история + текущая policy по связкам, одна транзакция без перезаписи старых запусков.
+    """
 
-    date_run = dt.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-    policy_df['RUN_DATE'] = date_run
-
-    new_policy_records = policy_df.to_dict(orient="records")
-
-    # =========================
-    # Читаем старый policy
-    # =========================
-    with open(filename, "r", encoding="utf-8") as f:
-        content = f.read().strip()
-
-        if not content:
-            old_records = []
-        else:
-            old_records = json.loads(content)
-
-    all_records = old_records + new_policy_records
+    store = PolicyStore(filename)
 
-    # Дозаписываем новые данные в старый json
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(all_records, f, ensure_ascii=False, indent=4)
+    try:
+        run_date = store.append(policy_df)
+    finally:
+        store.close()
 
-    print(f"Файл policy дополнен, история сохранена в: {filename}")
+    print(f"Policy запуска {run_date} сохранена в: {filename}")
 
 
 def build_summary_tables(
@@ -87,7 +79,7 @@ def build_summary_tables(
     tables["SUMMARY_BY_WINDOW"] = summary_by_window
 
     # =================================================================================
-    # ✅ 3) Нужно определить лучшее ОКНО + КАНАЛ + МЕТРИКА и записать эти данные в json
+    # ✅ 3) Нужно определить лучшее ОКНО + КАНАЛ + МЕТРИКА и записать эти данные в хранилище policy
     # Чтобы далее прогнозировать на новый месяц с учетом нескольких моделей
     # ==================================================================================
     melted = df.melt(
@@ -101,10 +93,16 @@ def build_summary_tables(
     avg_scores = (
         melted
         .groupby(["FULL_SIGN", "METRIC_NAME", "TRAIN_WINDOW_DAYS", "MODEL"])
-        .agg(WMAPE_MEAN=("WMAPE", "mean"))
+        .agg(WMAPE_MEAN=("WMAPE", "mean"), N_DATES=("WMAPE", "count"))
         .reset_index()
     )
 
+    # racing-отбор (evaluation/racing_selection.py): выбывшие кандидаты посчитаны не на всех датах связки
+    # и в policy не попадают; в полной сетке все кандидаты связки посчитаны на одинаковом числе дат
+    avg_scores = avg_scores[
+        avg_scores["N_DATES"] == avg_scores.groupby(["FULL_SIGN", "METRIC_NAME"])["N_DATES"].transform("max")
+    ].drop(columns="N_DATES")
+
     best_policy = (
         avg_scores
         .sort_values("WMAPE_MEAN")
@@ -158,6 +156,82 @@ def build_summary_tables(
     return tables
 
 
+# ============================================================
+# Дневные прогнозы policy из кэша бэктеста
+# ============================================================
+def build_policy_daily_forecasts(
+    policy_df: pd.DataFrame,
+    df: pd.DataFrame | SeriesStore,
+    forecast_store_file: str,
+    backtest_dates: list
+) -> pd.DataFrame:
+    """
+    Дневные прогнозы лучшей модели и окна каждой связки по датам текущего бэктеста.
+
+    Прогноз ищется по ключу ячейки бэктеста (backtest_cell_key, для глобальных моделей -
+    с хэшем рядов хранилища), как на графиках policy: берётся прогноз именно по текущим
+    данным и коду, а не последний записанный в кэш (после смены A → B → A это был бы прогноз B).
+
+    :param df: длинный датафрейм с признаками или SeriesStore по нему (данные бэктеста)
+    :param backtest_dates: даты бэктеста отчёта (прогнозы других дат в кэше не читаются)
+    :return: FULL_SIGN | METRIC_NAME | MODEL | TRAIN_WINDOW_DAYS | START_DATE | DDATE | FORECAST
+    """
+
+    series_store = SeriesStore.from_df(df)
+
+    # ячейки отчёта: (окно, канал, метрика, дата, [модель])
+    cells = [
+        (int(row.BEST_WINDOW), row.FULL_SIGN, row.METRIC_NAME, pd.Timestamp(start_date),
+         [row.BEST_MODEL.replace("_WMAPE", "")])
+        for row in policy_df.itertuples()
+        for start_date in sorted(backtest_dates)
+    ]
+
+    scope_hashes = cells_scope_hashes(series_store, cells)
+
+    forecast_store = BacktestCache(forecast_store_file)
+    frames = []
+
+    try:
+        for train_window, full_sign, metric, start_date, (model_key,) in cells:
+
+            forecast_df = forecast_store.get_forecast(
+                backtest_cell_key(
+                    df=series_store.get(full_sign, metric),
+                    model_key=model_key,
+                    train_window_days=train_window,
+                    start_date=start_date,
+                    scope_hash=scope_hashes.get(
+                        (train_window, full_sign, metric, start_date), {}
+                    ).get((model_key, start_date)),
+                    chain_dates=backtest_dates
+                )
+            )
+
+            if forecast_df is None:
+                continue
+
+            forecast_df.insert(0, "FULL_SIGN", full_sign)
+            forecast_df.insert(1, "METRIC_NAME", metric)
+            forecast_df.insert(2, "MODEL", model_key)
+            forecast_df.insert(3, "TRAIN_WINDOW_DAYS", train_window)
+            forecast_df.insert(4, "START_DATE", start_date)
+
+            frames.append(forecast_df)
+
+    finally:
+        forecast_store.close()
+
+    if not frames:
+        return pd.DataFrame(columns=[
+            "FULL_SIGN", "METRIC_NAME", "MODEL", "TRAIN_WINDOW_DAYS", "START_DATE", "DDATE", "FORECAST"
+        ])
+
+    return pd.concat(frames, ignore_index=True).sort_values(
+        ["FULL_SIGN", "METRIC_NAME", "START_DATE", "DDATE"]
+    ).reset_index(drop=True)
+
+
 # ============================================================
 # Экспорт Excel
 # ============================================================
@@ -165,7 +239,9 @@ def export_report_excel_n_dump_policy(
     report_df: pd.DataFrame,
     models_list: list[str],
     file_policy,
-    filename_for_report
+    filename_for_report,
+    forecast_store_file: str | None = None,
+    df: pd.DataFrame | SeriesStore | None = None
 ):
     """
     Экспортирует полный аналитический Excel-отчёт.
@@ -179,6 +255,8 @@ def export_report_excel_n_dump_policy(
         - WORST_CASES
         - BEST_CASES
         - DAILY_CHART (главный график)
+        - DAILY_FORECASTS (дневные прогнозы лучшей модели/окна из кэша бэктеста,
+          если заданы forecast_store_file и df - данные бэктеста для ключей ячеек)
 
     Дополнительно:
         Вставляет график Fact vs Baseline vs CatBoost.
@@ -201,10 +279,19 @@ def export_report_excel_n_dump_policy(
         for sheet, df in tables.items():
             df.to_excel(writer, sheet_name=sheet, index=False)
 
+        # ✅ дневные прогнозы победителей — из кэша бэктеста, без повторного прогона моделей
+        if forecast_store_file and df is not None:
+            build_policy_daily_forecasts(
+                policy_df=tables["BEST_MODEL_POLICY"],
+                df=df,
+                forecast_store_file=forecast_store_file,
+                backtest_dates=pd.to_datetime(report_df["START_DATE"]).unique()
+            ).to_excel(writer, sheet_name="DAILY_FORECASTS", index=False)
+
 
     print(f"\n✅ Полный Excel отчёт сохранён: {filename_for_report}")
 
-    save_policy_json(
+    save_policy(
         tables["BEST_MODEL_POLICY"],
         filename=file_policy
     )
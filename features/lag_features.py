@@ -1,6 +1,22 @@
 # features/lag_features.py
+import math
+from collections import deque
+
+import numpy as np
 import pandas as pd
 
+from evaluation.date_index import history_before
+
+# Окна скользящих средних и лаги (в днях), общие для batch и инкрементального расчёта
+ROLL_MEAN_WINDOWS = [3, 7, 14, 28]
+LAG_DAYS = [1, 2, 3, 7, 14, 21, 28]
+
+# Порядок колонок такой же, как их добавляет add_lags_means_for_model
+LAG_FEATURE_COLUMNS = (
+    [f"ROLL_MEAN_{window}" for window in ROLL_MEAN_WINDOWS] +
+    [f"LAG_{lag}D" for lag in LAG_DAYS]
+)
+
 def add_lags_means_for_model(
     df: pd.DataFrame
 ) -> pd.DataFrame:
@@ -21,7 +37,7 @@ def add_lags_means_for_model(
 
     # ФИЧИ УРОВНЯ (LEVEL FEATURES)
     # Скользящие средние за 7, 14, 28. 3 линии тренда усредненные
-    for window in [3, 7, 14, 28]:
+    for window in ROLL_MEAN_WINDOWS:
         df[f"ROLL_MEAN_{window}"] = (
             df["METRIC_VALUE"]
             .shift(1)
@@ -30,10 +46,143 @@ def add_lags_means_for_model(
         )
 
     # Добавляем лаги от 1 до 28 дней. Продажи 1 день назад, 7, 14, 28 дней назад.
-    for lag in [1, 2, 3, 7, 14, 21, 28]:
+    for lag in LAG_DAYS:
         df[f'LAG_{lag}D'] = df['METRIC_VALUE'].shift(lag)
 
     # Удаляем строки без лагов
     df = df.dropna().reset_index(drop=True)
 
-    return df
\ No newline at end of file
+    return df
+
+
+class _RollingMeanState:
+    '''
+    Скользящее среднее на running sums.
+
+    Сумма ведётся с компенсацией Кэхэна отдельно для добавлений и удалений,
+    так же как это делает pandas в rolling().mean(), поэтому значения
+    совпадают с batch-расчётом бит в бит, а не "примерно".
+    '''
+
+    def __init__(self, window: int):
+        self.window = window
+        self.nobs = 0
+        self.neg_ct = 0
+        self.sum_x = 0.0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.num_consecutive_same_value = 0
+        self.prev_value = math.nan
+
+    def add(self, val: float):
+        if val != val:
+            return
+
+        self.nobs += 1
+        y = val - self.compensation_add
+        t = self.sum_x + y
+        self.compensation_add = t - self.sum_x - y
+        self.sum_x = t
+        if math.copysign(1.0, val) < 0:
+            self.neg_ct += 1
+
+        # одинаковые значения подряд -> среднее равно самому значению (без артефактов float)
+        if val == self.prev_value:
+            self.num_consecutive_same_value += 1
+        else:
+            self.num_consecutive_same_value = 1
+        self.prev_value = val
+
+    def remove(self, val: float):
+        if val != val:
+            return
+
+        self.nobs -= 1
+        y = - val - self.compensation_remove
+        t = self.sum_x + y
+        self.compensation_remove = t - self.sum_x - y
+        self.sum_x = t
+        if math.copysign(1.0, val) < 0:
+            self.neg_ct -= 1
+
+    def mean(self) -> float:
+        if self.nobs < self.window:
+            return math.nan
+
+        result = self.sum_x / self.nobs
+        if self.num_consecutive_same_value >= self.nobs:
+            result = self.prev_value
+        elif self.neg_ct == 0 and result < 0:
+            result = 0.0
+        elif self.neg_ct == self.nobs and result > 0:
+            result = 0.0
+
+        return result
+
+
+class IncrementalLagFeatures:
+    '''
+    Инкрементальный расчёт LAG_*D и ROLL_MEAN_* для рекурсивного прогноза.
+
+    Вместо пересчёта add_lags_means_for_model по всему work_df на каждом шаге:
+    - хранит кольцевой буфер последних значений ряда (для лагов)
+    - хранит running sums по каждому окну rolling
+    - после append(value) признаки следующего дня считаются за O(1)
+
+    Признаки совпадают с add_lags_means_for_model для той же истории
+    (включая подставленные прогнозы).
+    '''
+
+    def __init__(self, values=()):
+        self._buffer = deque(maxlen=max(max(LAG_DAYS), max(ROLL_MEAN_WINDOWS)) + 1)
+        self._rolling = {window: _RollingMeanState(window) for window in ROLL_MEAN_WINDOWS}
+
+        for value in values:
+            self.append(value)
+
+    @classmethod
+    def from_history(
+            cls,
+            df: pd.DataFrame,
+            forecast_start_date: pd.Timestamp
+    ) -> "IncrementalLagFeatures":
+        '''
+        Создаёт состояние по истории связки ДО forecast_start_date (НЕ ВКЛЮЧАЯ).
+        '''
+
+        history = history_before(df, forecast_start_date)
+
+        return cls(history["METRIC_VALUE"].to_numpy(dtype=np.float64))
+
+    def append(self, value: float):
+        '''
+        Добавляет значение очередного дня (факт или прогноз).
+        '''
+
+        value = float(value)
+
+        for window, state in self._rolling.items():
+            # значение, которое выходит из окна rolling после добавления нового
+            if len(self._buffer) >= window:
+                state.remove(self._buffer[-window])
+            state.add(value)
+
+        self._buffer.append(value)
+
+    def features(self) -> dict:
+        '''
+        Признаки следующего (ещё не добавленного) дня:
+            {ROLL_MEAN_3: ..., ..., LAG_28D: ...}
+        '''
+
+        result = {}
+
+        for window, state in self._rolling.items():
+            result[f"ROLL_MEAN_{window}"] = state.mean()
+
+        for lag in LAG_DAYS:
+            result[f"LAG_{lag}D"] = (
+                self._buffer[-lag] if len(self._buffer) >= lag else math.nan
+            )
+
+        return result
@@ -2,29 +2,64 @@
 import pandas as pd
 import numpy as np
 
+from evaluation.date_index import history_before
+from models.artifact_store import train_or_load
 from statsmodels.tsa.holtwinters import (
     SimpleExpSmoothing,
     Holt,
     ExponentialSmoothing
 )
 
+# Параметры Holt-Winters (weekly = 7)
+HOLT_WINTERS_PARAMS = dict(
+    trend="add",
+    seasonal="add",
+    seasonal_periods=7
+)
+
+
+# ---- обучение (X не используется: модели только по ряду) ----
+def _fit_simple_expon(_, y):
+    return SimpleExpSmoothing(y).fit()
+
+
+def _fit_holt(_, y):
+    return Holt(y).fit()
+
+
+def _fit_holt_winters(_, y):
+    return ExponentialSmoothing(y, **HOLT_WINTERS_PARAMS).fit()
+
+
 def baseline_simple_expon_forecast(
     df: pd.DataFrame,
     forecast_start_date: pd.Timestamp,
     forecast_end_date: pd.Timestamp,
-    train_window_days: int
+    train_window_days: int,
+    full_sign: str | None = None,
+    metric_name: str | None = None
 ) -> pd.DataFrame:
     """
     ✅ Simple Exponential Smoothing baseline
     Только уровень (без тренда)
     """
 
-    history = df[df["DDATE"] < forecast_start_date].sort_values("DDATE")
+    history = history_before(df, forecast_start_date)
     train = history.tail(train_window_days)
 
     y = train["METRIC_VALUE"].values
 
-    model = SimpleExpSmoothing(y).fit()
+    model = train_or_load(
+        model_name="SIMPLE_EXPON",
+        train_func=_fit_simple_expon,
+        X_train=None,
+        y_train=y,
+        hyperparams={},
+        train_window_days=train_window_days,
+        train_end=forecast_start_date - pd.Timedelta(days=1),
+        full_sign=full_sign,
+        metric_name=metric_name
+    )
 
     horizon = (forecast_end_date - forecast_start_date).days + 1
     preds = model.forecast(horizon)
@@ -41,19 +76,31 @@ def baseline_holt_forecast(
     df: pd.DataFrame,
     forecast_start_date: pd.Timestamp,
     forecast_end_date: pd.Timestamp,
-    train_window_days: int
+    train_window_days: int,
+    full_sign: str | None = None,
+    metric_name: str | None = None
 ) -> pd.DataFrame:
     """
     ✅ Holt Linear Trend baseline
     Уровень + тренд
     """
 
-    history = df[df["DDATE"] < forecast_start_date].sort_values("DDATE")
+    history = history_before(df, forecast_start_date)
     train = history.tail(train_window_days)
 
     y = train["METRIC_VALUE"].values
 
-    model = Holt(y).fit()
+    model = train_or_load(
+        model_name="HOLT",
+        train_func=_fit_holt,
+        X_train=None,
+        y_train=y,
+        hyperparams={},
+        train_window_days=train_window_days,
+        train_end=forecast_start_date - pd.Timedelta(days=1),
+        full_sign=full_sign,
+        metric_name=metric_name
+    )
 
     horizon = (forecast_end_date - forecast_start_date).days + 1
     preds = model.forecast(horizon)
@@ -70,24 +117,31 @@ def baseline_holt_winters_forecast(
     df: pd.DataFrame,
     forecast_start_date: pd.Timestamp,
     forecast_end_date: pd.Timestamp,
-    train_window_days: int
+    train_window_days: int,
+    full_sign: str | None = None,
+    metric_name: str | None = None
 ) -> pd.DataFrame:
     """
     ✅ Holt-Winters baseline
     Уровень + тренд + сезонность (weekly = 7)
     """
 
-    history = df[df["DDATE"] < forecast_start_date].sort_values("DDATE")
+    history = history_before(df, forecast_start_date)
     train = history.tail(train_window_days)
 
     y = train["METRIC_VALUE"].values
 
-    model = ExponentialSmoothing(
-        y,
-        trend="add",
-        seasonal="add",
-        seasonal_periods=7
-    ).fit()
+    model = train_or_load(
+        model_name="HOLT_WINTERS",
+        train_func=_fit_holt_winters,
+        X_train=None,
+        y_train=y,
+        hyperparams=HOLT_WINTERS_PARAMS,
+        train_window_days=train_window_days,
+        train_end=forecast_start_date - pd.Timedelta(days=1),
+        full_sign=full_sign,
+        metric_name=metric_name
+    )
 
     horizon = (forecast_end_date - forecast_start_date).days + 1
     preds = model.forecast(horizon)
@@ -25,6 +25,8 @@
 import numpy as np
 import pandas as pd
 
+from evaluation.date_index import history_before
+
 # TREND_METHOD_OLS = "ols"
 
 def calc_trend_coef_weekly(
@@ -99,11 +101,7 @@ def baseline_forecast(
         :return: DataFrame [DDATE, FORECAST]
     """
 
-    history_df = (
-        df[df['DDATE'] < forecast_start_date]
-        .sort_values("DDATE")
-        .copy()
-    )
+    history_df = history_before(df, forecast_start_date)
 
     train_df = history_df.tail(train_window_days)
 
@@ -0,0 +1,213 @@
+# forecast/baseline_ols_prefix.py
+"""
+    BASELINE_OLS сразу для всех окон обучения и всех дат старта по одному ряду.
+
+    Эталон — forecast.baseline_month.baseline_forecast (Weekly Naive × недельный OLS-тренд):
+    там на каждое окно заново берётся хвост истории, groupby по дню недели и np.polyfit.
+
+    Здесь ряд один раз превращается в префиксные суммы, после чего для любого окна [a, b):
+    - среднее по дню недели      = (S_dow[b] - S_dow[a]) / (C_dow[b] - C_dow[a])
+    - сумма недельных сумм       = P[b] - P[a]
+    - Σ j·W_j (j - номер недели) = (K-1)·P[b] - Σ_{j=1..K-1} P[a + 7j]
+      (последняя сумма — через префикс P с шагом 7: Q[i] = P[i] + Q[i-7])
+    - наклон OLS по неделям      = (Σ j·W_j - j̄·Σ W_j) / Σ (j - j̄)², j̄ = (K-1)/2, Σ (j - j̄)² = K(K²-1)/12
+
+    Все окна × даты считаются одним набором векторных операций.
+    Результат совпадает с эталоном (с точностью до порядка суммирования float),
+    ячейки с пропусками в окне или короче двух недель считаются эталоном.
+"""
+
+import numpy as np
+import pandas as pd
+
+from data.series_store import SeriesStore
+from evaluation.date_index import DateIndex
+from forecast.baseline_month import baseline_forecast
+
+# как в calc_trend_coef_weekly
+MIN_TREND_COEF = 0.7
+
+# меньше двух недель в окне -> наклон по одной неделе не определён, считает эталон
+MIN_PREFIX_WINDOW_DAYS = 8
+
+
+def _strided_prefix(P: np.ndarray, step: int = 7) -> np.ndarray:
+    """
+        Q[i] = P[i] + P[i - step] + P[i - 2·step] + ...
+    """
+
+    Q = np.empty_like(P)
+
+    for r in range(step):
+        Q[r::step] = np.cumsum(P[r::step])
+
+    return Q
+
+
+def baseline_ols_all_windows(
+        df: pd.DataFrame,
+        forecast_start_dates: list[pd.Timestamp],
+        forecast_end_dates: list[pd.Timestamp],
+        train_windows: list[int]
+) -> dict[tuple[int, pd.Timestamp], pd.DataFrame]:
+    """
+        BASELINE_OLS по одному ряду для всех окон и дат старта.
+
+        :param df: ряд одной связки (DDATE, DAY_OF_WEEK, METRIC_VALUE)
+        :param forecast_start_dates: даты старта прогноза
+        :param forecast_end_dates: даты конца прогноза (той же длины)
+        :param train_windows: окна обучения (дней)
+        :return: {(окно, дата старта): DataFrame [DDATE, FORECAST]}
+    """
+
+    starts = [pd.Timestamp(d) for d in forecast_start_dates]
+    ends = [pd.Timestamp(d) for d in forecast_end_dates]
+    windows = np.asarray(train_windows, dtype=np.int64)
+
+    date_index = DateIndex(df)
+
+    # несортированный ряд / дубли дат — только эталон
+    if not date_index.is_sorted:
+        return {
+            (int(window), start): baseline_forecast(df, start, end, int(window))
+            for start, end in zip(starts, ends)
+            for window in windows
+        }
+
+    # ---- префиксные суммы ряда ----
+    y = df["METRIC_VALUE"].to_numpy(dtype=float)
+    dow = df["DAY_OF_WEEK"].to_numpy()
+
+    valid = ~np.isnan(y)
+    y_filled = np.where(valid, y, 0.0)
+
+    P = np.concatenate([[0.0], np.cumsum(y_filled)])
+    N = np.concatenate([[0], np.cumsum(valid)])
+    Q = _strided_prefix(P)
+
+    dow_onehot = dow[None, :] == np.arange(7)[:, None]
+
+    S_dow = np.concatenate([np.zeros((7, 1)), np.cumsum(y_filled * dow_onehot, axis=1)], axis=1)
+    C_dow = np.concatenate([np.zeros((7, 1)), np.cumsum(valid * dow_onehot, axis=1)], axis=1)
+
+    # ---- границы окон: [a, b) — (даты × окна) ----
+    b = np.array([date_index.position(start, "left") for start in starts])[:, None]
+    a = np.maximum(b - windows[None, :], 0)
+    n_rows = b - a
+
+    # ---- недельный OLS-тренд ----
+    K = (n_rows + 6) // 7
+    K_safe = np.maximum(K, 2)
+
+    sum_w = P[b] - P[a]
+    last_week_start = np.minimum(a + 7 * (K_safe - 1), len(P) - 1)
+
+    sum_jw = (K_safe - 1) * P[b] - (Q[last_week_start] - Q[a])
+
+    j_mean = (K_safe - 1) / 2
+    j_var = K_safe * (K_safe ** 2 - 1) / 12
+
+    slope = (sum_jw - j_mean * sum_w) / j_var
+    mean_level = sum_w / K_safe
+
+    horizon_days = np.array([(end - start).days + 1 for start, end in zip(starts, ends)])
+    horizon_weeks = np.ceil(horizon_days / 7)[:, None]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        raw_coef = 1 + (slope * horizon_weeks) / mean_level
+
+    # ---- средние по дню недели: (7, даты, окна) ----
+    dow_sum = S_dow[:, b] - S_dow[:, a]
+    dow_count = C_dow[:, b] - C_dow[:, a]
+
+    # нет такого дня недели в окне -> среднее всей истории до даты (как в эталоне)
+    history_mean = P[b] / np.maximum(N[b], 1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dow_mean = np.where(dow_count > 0, dow_sum / dow_count, history_mean[None, :, :])
+
+    # ячейки, которые считает эталон: пропуски в окне или меньше двух недель
+    use_reference = (N[b] - N[a] < n_rows) | (n_rows < MIN_PREFIX_WINDOW_DAYS)
+
+    # ---- прогнозы ----
+    forecasts = {}
+
+    for i, (start, end) in enumerate(zip(starts, ends)):
+
+        forecast_dates = pd.date_range(start=start, end=end, freq="D")
+        forecast_dow = forecast_dates.dayofweek.to_numpy()
+
+        for j, window in enumerate(windows):
+
+            if use_reference[i, j]:
+                forecasts[(int(window), start)] = baseline_forecast(df, start, end, int(window))
+                continue
+
+            # округление как в calc_trend_coef_weekly (round по одному числу)
+            trend_coef = 1.0 if mean_level[i, j] == 0 else max(
+                round(float(raw_coef[i, j]), 3), MIN_TREND_COEF
+            )
+
+            forecasts[(int(window), start)] = pd.DataFrame({
+                "DDATE": forecast_dates,
+                "FORECAST": dow_mean[forecast_dow, i, j] * trend_coef
+            })
+
+    return forecasts
+
+
+def baseline_ols_prefix_forecast(
+        df: pd.DataFrame,
+        forecast_start_date: pd.Timestamp,
+        forecast_end_date: pd.Timestamp,
+        train_window_days: int
+) -> pd.DataFrame:
+    """
+        BASELINE_OLS на префиксных суммах для одного окна и одной даты.
+    """
+
+    return baseline_ols_all_windows(
+        df,
+        forecast_start_dates=[forecast_start_date],
+        forecast_end_dates=[forecast_end_date],
+        train_windows=[train_window_days]
+    )[(int(train_window_days), pd.Timestamp(forecast_start_date))]
+
+
+def baseline_ols_prefix_cells(
+        df: pd.DataFrame | SeriesStore,
+        cells: list[tuple]
+) -> dict[tuple, pd.DataFrame]:
+    """
+        Прогнозы для ячеек сетки бэктеста: по одному проходу на связку (все окна × даты сразу).
+
+        :param cells: [(окно, канал, метрика, дата старта)]
+        :return: {ячейка: DataFrame [DDATE, FORECAST]}
+    """
+
+    series_store = SeriesStore.from_df(df)
+
+    cells_by_series = {}
+
+    for cell in cells:
+        _, full_sign, metric, _ = cell
+        cells_by_series.setdefault((full_sign, metric), []).append(cell)
+
+    forecasts = {}
+
+    for key, series_cells in cells_by_series.items():
+
+        start_dates = sorted({pd.Timestamp(cell[3]) for cell in series_cells})
+        windows = sorted({int(cell[0]) for cell in series_cells})
+
+        series_forecasts = baseline_ols_all_windows(
+            series_store.get(*key),
+            forecast_start_dates=start_dates,
+            forecast_end_dates=[start + pd.offsets.MonthEnd(0) for start in start_dates],
+            train_windows=windows
+        )
+
+        for cell in series_cells:
+            forecasts[cell] = series_forecasts[(int(cell[0]), pd.Timestamp(cell[3]))]
+
+    return forecasts
@@ -0,0 +1,192 @@
+# forecast/baseline_smoothing_batch_forecast.py
+"""
+    Быстрые baseline-ы экспоненциального сглаживания (SES / Holt / Holt-Winters, m = 7)
+    на векторизованном движке models.batch_smoothing вместо statsmodels.
+
+    Два способа вызова:
+    - по одному ряду (ключи реестра BASELINE_*_FAST) — та же сигнатура, что у остальных моделей
+    - пачкой по многим рядам (batch_smoothing_forecast) — один проход движка на все ряды
+      с одинаковой длиной истории; сетка бэктеста вызывает его через batch_smoothing_cells
+
+    Ряд короче min_series_length в пачку не попадает (его прогноза нет в результате):
+    ячейку считает по одному ряду сам бэктест, и короткая история не роняет прогноз остальных рядов.
+"""
+
+import numpy as np
+import pandas as pd
+
+from data.series_store import SeriesStore
+from evaluation.date_index import history_before
+from models.batch_smoothing import (
+    SES,
+    HOLT,
+    HOLT_WINTERS,
+    BATCH_SMOOTHING_PARAMS,
+    forecast_smoothing_batch,
+    min_series_length
+)
+
+
+def batch_smoothing_forecast(
+    df: pd.DataFrame | SeriesStore,
+    keys: list[tuple[str, str]],
+    forecast_start_date: pd.Timestamp,
+    forecast_end_date: pd.Timestamp,
+    train_window_days: int,
+    method: str
+) -> dict[tuple[str, str], pd.DataFrame]:
+    """
+    Прогноз до конца месяца сразу для многих рядов.
+
+    :param df: длинный датафрейм или SeriesStore по нему
+    :param keys: связки (FULL_SIGN, METRIC_NAME)
+    :param method: SES / HOLT / HOLT_WINTERS
+    :return: {(FULL_SIGN, METRIC_NAME): DataFrame [DDATE, FORECAST]} (без рядов короче min_series_length)
+    """
+
+    series_store = SeriesStore.from_df(df)
+
+    forecast_dates = pd.date_range(forecast_start_date, forecast_end_date)
+
+    # ряды группируются по длине окна (короткая история -> своя матрица)
+    by_length = {}
+
+    for key in keys:
+
+        history = history_before(series_store.get(*key), forecast_start_date)
+        y = history["METRIC_VALUE"].values[-train_window_days:]
+
+        # короткий ряд -> прогноз по одному ряду (вне пачки)
+        if len(y) < min_series_length(method, BATCH_SMOOTHING_PARAMS["seasonal_periods"]):
+            continue
+
+        by_length.setdefault(len(y), []).append((key, y))
+
+    forecasts = {}
+
+    for series in by_length.values():
+
+        Y = np.vstack([y for _, y in series]).astype(float)
+
+        preds, _ = forecast_smoothing_batch(
+            Y,
+            horizon=len(forecast_dates),
+            method=method,
+            params=BATCH_SMOOTHING_PARAMS
+        )
+
+        for (key, _), pred in zip(series, preds):
+            forecasts[key] = pd.DataFrame({
+                "DDATE": forecast_dates,
+                "FORECAST": pred
+            })
+
+    return forecasts
+
+
+def batch_smoothing_cells(
+    df: pd.DataFrame | SeriesStore,
+    cells: list[tuple],
+    method: str
+) -> dict[tuple, pd.DataFrame]:
+    """
+    Прогнозы для ячеек сетки бэктеста: один вызов движка на (окно, дата) по всем связкам.
+
+    :param cells: [(окно, канал, метрика, дата старта)]
+    :return: {ячейка: DataFrame [DDATE, FORECAST]} (ячейки коротких рядов не входят)
+    """
+
+    cells_by_window_date = {}
+
+    for cell in cells:
+        train_window, full_sign, metric, start_date = cell
+        cells_by_window_date.setdefault((train_window, start_date), []).append(cell)
+
+    forecasts = {}
+
+    for (train_window, start_date), window_cells in cells_by_window_date.items():
+
+        key_forecasts = batch_smoothing_forecast(
+            df=df,
+            keys=[(cell[1], cell[2]) for cell in window_cells],
+            forecast_start_date=start_date,
+            forecast_end_date=start_date + pd.offsets.MonthEnd(0),
+            train_window_days=train_window,
+            method=method
+        )
+
+        for cell in window_cells:
+            if (cell[1], cell[2]) in key_forecasts:
+                forecasts[cell] = key_forecasts[(cell[1], cell[2])]
+
+    return forecasts
+
+
+def _smoothing_fast_forecast(
+    df: pd.DataFrame,
+    forecast_start_date: pd.Timestamp,
+    forecast_end_date: pd.Timestamp,
+    train_window_days: int,
+    method: str
+) -> pd.DataFrame:
+
+    history = history_before(df, forecast_start_date)
+    train = history.tail(train_window_days)
+
+    y = train["METRIC_VALUE"].values.astype(float)
+
+    horizon = (forecast_end_date - forecast_start_date).days + 1
+
+    preds, _ = forecast_smoothing_batch(
+        y[None, :],
+        horizon=horizon,
+        method=method,
+        params=BATCH_SMOOTHING_PARAMS
+    )
+
+    return pd.DataFrame({
+        "DDATE": pd.date_range(forecast_start_date, forecast_end_date),
+        "FORECAST": preds[0]
+    })
+
+
+def baseline_simple_expon_fast_forecast(
+    df: pd.DataFrame,
+    forecast_start_date: pd.Timestamp,
+    forecast_end_date: pd.Timestamp,
+    train_window_days: int
+) -> pd.DataFrame:
+    """
+    ✅ Simple Exponential Smoothing (векторизованный движок)
+    Только уровень (без тренда)
+    """
+
+    return _smoothing_fast_forecast(df, forecast_start_date, forecast_end_date, train_window_days, SES)
+
+
+def baseline_holt_fast_forecast(
+    df: pd.DataFrame,
+    forecast_start_date: pd.Timestamp,
+    forecast_end_date: pd.Timestamp,
+    train_window_days: int
+) -> pd.DataFrame:
+    """
+    ✅ Holt Linear Trend (векторизованный движок)
+    Уровень + тренд
+    """
+
+    return _smoothing_fast_forecast(df, forecast_start_date, forecast_end_date, train_window_days, HOLT)
+
+
+def baseline_holt_winters_fast_forecast(
+    df: pd.DataFrame,
+    forecast_start_date: pd.Timestamp,
+    forecast_end_date: pd.Timestamp,
+    train_window_days: int
+) -> pd.DataFrame:
+    """
+    ✅ Holt-Winters (векторизованный движок)
+    Уровень + тренд + сезонность (weekly = 7)
+    """
+
+    return _smoothing_fast_forecast(df, forecast_start_date, forecast_end_date, train_window_days, HOLT_WINTERS)
@@ -2,15 +2,17 @@
 
 import pandas as pd
 
-from features.lag_features import add_lags_means_for_model
-from evaluation.backtest import split_X_y
-from models.catboost_model import train_catboost
+from features.series_dataset import get_series_dataset
+from models.catboost_model import train_catboost, CATBOOST_PARAMS
+from models.artifact_store import train_or_load
 
 def catboost_forecast_direct_to_month_end(
     df: pd.DataFrame,
     forecast_start_date: pd.Timestamp,
     forecast_end_date: pd.Timestamp,
-    train_window_days: int
+    train_window_days: int,
+    full_sign: str | None = None,
+    metric_name: str | None = None
 ) -> pd.DataFrame:
     """
        ✅ Direct Multi-Step Forecast (без рекурсии)
@@ -25,35 +27,32 @@ def catboost_forecast_direct_to_month_end(
     """
 
 
-    # ✅ строим лаги один раз
-    df_model = add_lags_means_for_model(df)
+    # ✅ лаги и X / y строятся один раз на ряд (общие для всех окон и дат)
+    dataset = get_series_dataset(df)
 
     # ✅ train = только история до старта
-    train_df = df_model[df_model["DDATE"] < forecast_start_date]
-    train_df = train_df.tail(train_window_days)
-
-    # ✅ future даты месяца
-    future_dates = pd.date_range(
-        start=forecast_start_date,
-        end=forecast_end_date
+    X_train, y_train = dataset.train_data(forecast_start_date, train_window_days)
+
+    # ✅ обучаем один раз (или берём уже обученную на тех же данных из хранилища моделей)
+    model = train_or_load(
+        model_name="CATBOOST",
+        train_func=train_catboost,
+        X_train=X_train,
+        y_train=y_train,
+        hyperparams=CATBOOST_PARAMS,
+        train_window_days=train_window_days,
+        train_end=forecast_start_date - pd.Timedelta(days=1),
+        full_sign=full_sign,
+        metric_name=metric_name
     )
 
-    # ✅ будущие строки
-    future_df = df_model[df_model["DDATE"].isin(future_dates)].copy()
-
-    # ✅ train split
-    X_train, y_train = split_X_y(train_df)
-
-    # ✅ обучаем один раз
-    model = train_catboost(X_train, y_train)
-
-    # ✅ прогноз сразу на месяц
-    X_future, _ = split_X_y(future_df)
+    # ✅ прогноз сразу на месяц (будущие строки - даты месяца)
+    future_dates, X_future = dataset.future_data(forecast_start_date, forecast_end_date)
 
     preds = model.predict(X_future)
 
     forecast_df = pd.DataFrame({
-        "DDATE": future_df["DDATE"],
+        "DDATE": future_dates,
         "FORECAST": preds
     })
 
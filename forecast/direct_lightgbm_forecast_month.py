@@ -1,15 +1,17 @@
 
 import pandas as pd
 
-from features.lag_features import add_lags_means_for_model
-from evaluation.backtest import split_X_y
-from models.light_gbm import train_lightgbm
+from features.series_dataset import get_series_dataset
+from models.light_gbm import train_lightgbm, LIGHTGBM_PARAMS
+from models.artifact_store import train_or_load
 
 def lightgbm_forecast_to_month_end(
         df: pd.DataFrame,
         forecast_start_date: pd.Timestamp,
         forecast_end_date: pd.Timestamp,
-        train_window_days: int
+        train_window_days: int,
+        full_sign: str | None = None,
+        metric_name: str | None = None
 ):
     """
         Direct прогноз LightGBM:
@@ -18,34 +20,30 @@ def lightgbm_forecast_to_month_end(
         (без рекурсии)
     """
 
-    # ✅ создаём фичи
-    df_model = add_lags_means_for_model(df)
+    # ✅ фичи ряда (один раз на связку, общие для всех окон и дат)
+    dataset = get_series_dataset(df)
 
     # ✅ train/test split
-    train_df = df_model[df_model["DDATE"] < forecast_start_date].tail(train_window_days)
-
-    # ✅ создаём фичи
-    df_model = add_lags_means_for_model(df)
-
-    # ✅ train/test split
-    train_df = df_model[df_model["DDATE"] < forecast_start_date].tail(train_window_days)
-
-    test_df = df_model[
-        (df_model["DDATE"] >= forecast_start_date) &
-        (df_model["DDATE"] <= forecast_end_date)
-        ]
-
-    # ✅ split X/y
-    X_train, y_train = split_X_y(train_df)
-    X_test, _ = split_X_y(test_df)
-
-    # ✅ обучение LightGBM
-    model = train_lightgbm(X_train, y_train)
+    X_train, y_train = dataset.train_data(forecast_start_date, train_window_days)
+    test_dates, X_test = dataset.future_data(forecast_start_date, forecast_end_date)
+
+    # ✅ обучение LightGBM (или готовая модель из хранилища)
+    model = train_or_load(
+        model_name="LIGHTGBM",
+        train_func=train_lightgbm,
+        X_train=X_train,
+        y_train=y_train,
+        hyperparams=LIGHTGBM_PARAMS,
+        train_window_days=train_window_days,
+        train_end=forecast_start_date - pd.Timedelta(days=1),
+        full_sign=full_sign,
+        metric_name=metric_name
+    )
 
     y_pred = model.predict(X_test)
 
     forecast_df = pd.DataFrame({
-        "DDATE": test_df["DDATE"].values,
+        "DDATE": test_dates,
         "FORECAST": y_pred
     })
 
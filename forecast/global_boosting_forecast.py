@@ -0,0 +1,234 @@
+# forecast/global_boosting_forecast.py
+"""
+    Глобальная модель: один CatBoost / LightGBM на (окно, дата) по всем связкам сразу.
+
+    Обычные ML-модели обучаются на каждую (FULL_SIGN, METRIC_NAME) отдельно:
+    число обучений = каналы × метрики × окна × даты.
+    Здесь строки всех связок складываются в одну обучающую выборку,
+    связка передаётся модели категориальными признаками FULL_SIGN и METRIC_NAME,
+    число обучений делится на число связок.
+
+    Логика как у CATBOOST_DIRECT / LIGHTGBM_DIRECT (direct-прогноз на весь месяц одним predict):
+    1) лаги и rolling строятся по каждой связке отдельно (один раз на связку)
+    2) train — последние train_window_days строк каждой связки до даты прогноза
+    3) при scaling="mean" ряд связки (таргет, лаги, rolling) делится на среднее |METRIC_VALUE|
+       её train-окна, прогноз умножается обратно — связки разного масштаба (выручка / прибыль)
+       учатся в одних единицах
+    4) одна модель на все связки, прогноз по каждой связке
+
+    Обучается на всех связках, которые есть во входе (SeriesStore / длинный df).
+    Вызов по одному ряду (MODEL_REGISTRY) обучает модель только на этом ряду.
+"""
+
+import numpy as np
+import pandas as pd
+
+from data.series_store import SeriesStore
+from evaluation.backtest import split_X_y
+from evaluation.date_index import DateIndex, rows_between, rows_tail_before
+from features.lag_features import add_lags_means_for_model, LAG_FEATURE_COLUMNS
+from models.artifact_store import train_or_load
+from models.catboost_model import train_catboost, CATBOOST_PARAMS
+from models.light_gbm import train_lightgbm, LIGHTGBM_PARAMS
+
+# ========= Параметры глобальной модели (входят в ключ кэша бэктеста) ====================
+GLOBAL_MODEL_PARAMS = dict(
+    # "mean" - деление связки на среднее |факта| train-окна, "none" - без масштабирования
+    scaling="mean"
+)
+
+# трейнер и его гиперпараметры
+GLOBAL_BOOSTING_MODELS = {
+    "CATBOOST": (train_catboost, CATBOOST_PARAMS),
+    "LIGHTGBM": (train_lightgbm, LIGHTGBM_PARAMS),
+}
+
+SERIES_FEATURES = ["FULL_SIGN", "METRIC_NAME"]
+
+# колонки, которые масштабируются вместе с таргетом
+_SCALED_COLUMNS = ["METRIC_VALUE"] + LAG_FEATURE_COLUMNS
+
+
+def series_scale(train_df: pd.DataFrame, scaling: str) -> float:
+    """
+        Масштаб ряда по train-окну: среднее |METRIC_VALUE| ("mean") или 1.0 ("none").
+    """
+
+    if scaling == "none":
+        return 1.0
+
+    scale = train_df["METRIC_VALUE"].abs().mean()
+
+    # пустое / нулевое окно -> без масштабирования
+    if not np.isfinite(scale) or scale == 0:
+        return 1.0
+
+    return float(scale)
+
+
+def _to_global_X(df: pd.DataFrame, series_keys: list[tuple[str, str]]) -> tuple[pd.DataFrame, pd.Series]:
+    """
+        split_X_y + категориальные признаки связки (одинаковый набор категорий в train и predict).
+    """
+
+    X, y = split_X_y(df)
+
+    for position, column in enumerate(SERIES_FEATURES):
+        X[column] = pd.Categorical(
+            df[column].values,
+            categories=sorted({key[position] for key in series_keys})
+        )
+
+    return X, y
+
+
+def global_boosting_fit_predict(
+        series_features: dict[tuple[str, str], pd.DataFrame],
+        keys_to_predict: list[tuple[str, str]],
+        forecast_start_date: pd.Timestamp,
+        forecast_end_date: pd.Timestamp,
+        train_window_days: int,
+        model_name: str,
+        params: dict | None = None
+) -> dict[tuple[str, str], pd.DataFrame]:
+    """
+        Одна модель на все связки для одного окна и одной даты.
+
+        :param series_features: {(FULL_SIGN, METRIC_NAME): ряд с лагами (add_lags_means_for_model)}
+                                — на всех этих связках модель обучается
+        :param keys_to_predict: связки, по которым нужен прогноз
+        :param model_name: CATBOOST / LIGHTGBM
+        :return: {(FULL_SIGN, METRIC_NAME): DataFrame [DDATE, FORECAST]}
+    """
+
+    params = params or GLOBAL_MODEL_PARAMS
+    train_func, hyperparams = GLOBAL_BOOSTING_MODELS[model_name]
+
+    series_keys = list(series_features)
+
+    train_parts = []
+    future_parts = {}
+    scales = {}
+
+    for key, df_model in series_features.items():
+
+        date_index = DateIndex(df_model)
+
+        train_df = rows_tail_before(df_model, forecast_start_date, train_window_days, date_index)
+
+        scales[key] = series_scale(train_df, params["scaling"])
+
+        train_df = train_df.copy()
+        train_df[_SCALED_COLUMNS] = train_df[_SCALED_COLUMNS] / scales[key]
+        train_parts.append(train_df)
+
+        if key in keys_to_predict:
+            future_df = rows_between(df_model, forecast_start_date, forecast_end_date, date_index).copy()
+            future_df[_SCALED_COLUMNS] = future_df[_SCALED_COLUMNS] / scales[key]
+            future_parts[key] = future_df
+
+    X_train, y_train = _to_global_X(pd.concat(train_parts, ignore_index=True), series_keys)
+
+    # ✅ одна модель на все связки (или готовая из хранилища моделей)
+    model = train_or_load(
+        model_name=f"{model_name}_GLOBAL",
+        train_func=train_func,
+        X_train=X_train,
+        y_train=y_train,
+        hyperparams={**hyperparams, **params},
+        train_window_days=train_window_days,
+        train_end=forecast_start_date - pd.Timedelta(days=1)
+    )
+
+    forecasts = {}
+
+    for key in keys_to_predict:
+
+        future_df = future_parts[key]
+        X_future, _ = _to_global_X(future_df, series_keys)
+
+        preds = model.predict(X_future) if len(future_df) else np.array([])
+
+        forecasts[key] = pd.DataFrame({
+            "DDATE": future_df["DDATE"].values,
+            "FORECAST": preds * scales[key]
+        })
+
+    return forecasts
+
+
+def global_boosting_cells(
+        df: pd.DataFrame | SeriesStore,
+        cells: list[tuple],
+        model_name: str
+) -> dict[tuple, pd.DataFrame]:
+    """
+        Прогнозы для ячеек сетки бэктеста: одно обучение на (окно, дата) по всем связкам хранилища.
+
+        :param cells: [(окно, канал, метрика, дата старта)]
+        :return: {ячейка: DataFrame [DDATE, FORECAST]}
+    """
+
+    series_store = SeriesStore.from_df(df)
+
+    # ✅ лаги строятся один раз на связку (от окна и даты не зависят)
+    series_features = {
+        key: add_lags_means_for_model(series_store.get(*key))
+        for key in series_store.keys()
+    }
+
+    cells_by_window_date = {}
+
+    for cell in cells:
+        train_window, full_sign, metric, start_date = cell
+        cells_by_window_date.setdefault((train_window, start_date), []).append(cell)
+
+    forecasts = {}
+
+    for (train_window, start_date), window_cells in cells_by_window_date.items():
+
+        key_forecasts = global_boosting_fit_predict(
+            series_features=series_features,
+            keys_to_predict=[(cell[1], cell[2]) for cell in window_cells],
+            forecast_start_date=start_date,
+            forecast_end_date=start_date + pd.offsets.MonthEnd(0),
+            train_window_days=train_window,
+            model_name=model_name
+        )
+
+        for cell in window_cells:
+            forecasts[cell] = key_forecasts[(cell[1], cell[2])]
+
+    return forecasts
+
+
+def global_boosting_forecast(
+        df: pd.DataFrame,
+        forecast_start_date: pd.Timestamp,
+        forecast_end_date: pd.Timestamp,
+        train_window_days: int,
+        model_name: str,
+        full_sign: str | None = None,
+        metric_name: str | None = None
+) -> pd.DataFrame:
+    """
+        Прогноз одной связки: модель обучается на всех связках, которые есть в df.
+    """
+
+    series_store = SeriesStore.from_df(df)
+
+    key = (full_sign, metric_name) if (full_sign, metric_name) in series_store else series_store.keys()[0]
+
+    series_features = {
+        series_key: add_lags_means_for_model(series_store.get(*series_key))
+        for series_key in series_store.keys()
+    }
+
+    return global_boosting_fit_predict(
+        series_features=series_features,
+        keys_to_predict=[key],
+        forecast_start_date=forecast_start_date,
+        forecast_end_date=forecast_end_date,
+        train_window_days=train_window_days,
+        model_name=model_name
+    )[key]
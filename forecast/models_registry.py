@@ -8,21 +8,74 @@
     [DDATE, FORECAST]
 
 Нужно чтобы автоматически без лишнего комментирования сравнивать ЛЮБЫЕ модели, которые хочу
+
+Реестр ленивый: импорт модуля реестра не тянет catboost / lightgbm / xgboost / sklearn / statsmodels.
+Адаптер модели импортирует свой прогноз при первом вызове, batch-функции и гиперпараметры
+заданы ссылками "модуль:имя" и резолвятся при первом обращении. Поэтому бэктест только по BASELINE_OLS
+(и каждый процесс пула) не платит за импорт бустингов.
+
+Описание модели (ModelSpec) кроме функции прогноза содержит метаданные, по которым
+планировщики решают без импорта модели: бэкенд, класс стоимости, потоки, warm start, batch-прогноз.
 """
 
-from forecast.baseline_month import baseline_forecast
-from forecast.baseline_exponential_holt_winters_forecast import (
-    baseline_simple_expon_forecast,
-    baseline_holt_forecast,
-    baseline_holt_winters_forecast
-)
+import functools
+import importlib
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from models.early_stopping import early_stopping_signature
+
+# ---- классы стоимости одного прогноза ячейки (связка × окно × дата) ----
+# LIGHT  - numpy, миллисекунды
+# MEDIUM - statsmodels / RandomForest / LightGBM, десятки-сотни миллисекунд
+# HEAVY  - CatBoost / XGBoost / рекурсия / глобальные модели, секунды
+COST_LIGHT = "LIGHT"
+COST_MEDIUM = "MEDIUM"
+COST_HEAVY = "HEAVY"
+
+# ---- от каких рядов зависит прогноз ячейки (ключ кэша бэктеста) ----
+# SERIES - только от своего ряда
+# STORE  - от всех рядов хранилища (глобальные модели обучаются по всем связкам)
+# CHANNEL - от всех метрик своего канала FULL_SIGN (multi-target модель)
+KEY_SCOPE_SERIES = "SERIES"
+KEY_SCOPE_STORE = "STORE"
+KEY_SCOPE_CHANNEL = "CHANNEL"
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    """
+        Описание модели реестра.
+
+        :param forecast: адаптер (df, start, end, window, full_sign=None, metric_name=None) -> [DDATE, FORECAST]
+        :param backend: библиотека модели (numpy / statsmodels / sklearn / catboost / lightgbm / xgboost)
+        :param cost: класс стоимости (COST_LIGHT / COST_MEDIUM / COST_HEAVY)
+        :param threaded: модель использует потоки (models/threads.py: thread_count / n_jobs)
+        :param warm_start: дообучение по цепочке дат (forecast/warm_start_direct_forecast.py)
+        :param early_stopping: обучение меняет ранняя остановка (models/early_stopping.py)
+        :param params: гиперпараметры для ключа кэша - ссылки "модуль:имя" на dict, сливаются по порядку
+        :param batch: batch-прогноз по многим ячейкам сетки - ссылка "модуль:функция" (None = нет)
+        :param batch_kwargs: фиксированные аргументы batch-функции
+        :param key_scope: от каких рядов зависит прогноз ячейки (KEY_SCOPE_*), хэш этих рядов входит в ключ кэша
+    """
+
+    forecast: object
+    backend: str
+    cost: str
+    threaded: bool = False
+    warm_start: bool = False
+    early_stopping: bool = False
+    params: tuple = ()
+    batch: str | None = None
+    batch_kwargs: dict = field(default_factory=dict)
+    key_scope: str = KEY_SCOPE_SERIES
+
 
-from forecast.direct_catboost_forecast_month import catboost_forecast_direct_to_month_end
-from forecast.recursive_catboost_forecast_month import recursive_catboost_forecast_to_month_end
-from forecast.direct_lightgbm_forecast_month import lightgbm_forecast_to_month_end
-from forecast.recursive_lightGBM_forecast import recursive_lightGBM_forecast_to_month_end
-from forecast.random_forest_forecast_month import random_forest_forecast_direct_to_month_end
-from forecast.xgboost_forecast_direct_month import xgboost_forecast_direct_to_month_end
+def _resolve(target: str):
+    # "модуль:имя" -> объект (модуль импортируется при первом обращении)
+    module_name, name = target.split(":")
+    return getattr(importlib.import_module(module_name), name)
 
 
 # =========================================================
@@ -31,6 +84,8 @@ from forecast.xgboost_forecast_direct_month import xgboost_forecast_direct_to_mo
 
 def model_baseline_ols(df, start, end, window, **kwargs):
     # Baseline OLS Weekly Naive + Trend
+    from forecast.baseline_month import baseline_forecast
+
     return baseline_forecast(
         df=df,
         forecast_start_date=start,
@@ -38,27 +93,81 @@ def model_baseline_ols(df, start, end, window, **kwargs):
         train_window_days=window
     )
 
-def model_baseline_simple_smooth(df, start, end, window, **kwargs):
+def model_baseline_ols_prefix(df, start, end, window, **kwargs):
+    # Тот же Baseline OLS на префиксных суммах (сетка бэктеста считает все окна × даты связки за раз)
+    from forecast.baseline_ols_prefix import baseline_ols_prefix_forecast
+
+    return baseline_ols_prefix_forecast(
+        df=df,
+        forecast_start_date=start,
+        forecast_end_date=end,
+        train_window_days=window
+    )
+
+def model_baseline_simple_smooth(df, start, end, window, full_sign=None, metric_name=None, **kwargs):
     # Simple Exponential Smoothing
+    from forecast.baseline_exponential_holt_winters_forecast import baseline_simple_expon_forecast
+
     return baseline_simple_expon_forecast(
         df=df,
         forecast_start_date=start,
         forecast_end_date=end,
-        train_window_days=window
+        train_window_days=window,
+        full_sign=full_sign,
+        metric_name=metric_name
     )
 
-def model_baseline_holt_smooth(df, start, end, window, **kwargs):
+def model_baseline_holt_smooth(df, start, end, window, full_sign=None, metric_name=None, **kwargs):
     # Holt двойное экспоненц сглаживание
+    from forecast.baseline_exponential_holt_winters_forecast import baseline_holt_forecast
+
     return baseline_holt_forecast(
         df=df,
         forecast_start_date=start,
         forecast_end_date=end,
-        train_window_days=window
+        train_window_days=window,
+        full_sign=full_sign,
+        metric_name=metric_name
     )
 
-def model_baseline_holt_winters(df, start, end, window, **kwargs):
+def model_baseline_holt_winters(df, start, end, window, full_sign=None, metric_name=None, **kwargs):
     # Holt-Winters тройное экспоненц сглаживание
+    from forecast.baseline_exponential_holt_winters_forecast import baseline_holt_winters_forecast
+
     return baseline_holt_winters_forecast(
+        df=df,
+        forecast_start_date=start,
+        forecast_end_date=end,
+        train_window_days=window,
+        full_sign=full_sign,
+        metric_name=metric_name
+    )
+
+# ---- те же сглаживания на векторизованном движке (без statsmodels) ----
+def model_baseline_simple_smooth_fast(df, start, end, window, **kwargs):
+    from forecast.baseline_smoothing_batch_forecast import baseline_simple_expon_fast_forecast
+
+    return baseline_simple_expon_fast_forecast(
+        df=df,
+        forecast_start_date=start,
+        forecast_end_date=end,
+        train_window_days=window
+    )
+
+def model_baseline_holt_smooth_fast(df, start, end, window, **kwargs):
+    from forecast.baseline_smoothing_batch_forecast import baseline_holt_fast_forecast
+
+    return baseline_holt_fast_forecast(
+        df=df,
+        forecast_start_date=start,
+        forecast_end_date=end,
+        train_window_days=window
+    )
+
+def model_baseline_holt_winters_fast(df, start, end, window, **kwargs):
+    from forecast.baseline_smoothing_batch_forecast import baseline_holt_winters_fast_forecast
+
+    return baseline_holt_winters_fast_forecast(
         df=df,
         forecast_start_date=start,
         forecast_end_date=end,
@@ -68,13 +177,17 @@ def model_baseline_holt_winters(df, start, end, window, **kwargs):
 # =========================================================
 # ✅ RANDOM FOREST
 # =========================================================
-def model_random_forest(df, start, end, window, **kwargs):
+def model_random_forest(df, start, end, window, full_sign=None, metric_name=None, **kwargs):
     # Random Forest Direct Forecast (МЛ моделька Слечайные лес, строит несколько деревьев и берет среднее значение по их результатам)
+    from forecast.random_forest_forecast_month import random_forest_forecast_direct_to_month_end
+
     return random_forest_forecast_direct_to_month_end(
         df=df,
         forecast_start_date=start,
         forecast_end_date=end,
-        train_window_days=window
+        train_window_days=window,
+        full_sign=full_sign,
+        metric_name=metric_name
     )
 
 # =========================================================
@@ -82,22 +195,37 @@ def model_random_forest(df, start, end, window, **kwargs):
 # =========================================================
 def model_catboost_recursive(df, start, end, window, full_sign=None, metric_name=None, **kwargs):
     # ✅ CatBoost рекурсивно (прогноз подставляется как факт)
+    from forecast.recursive_catboost_forecast_month import recursive_catboost_forecast_to_month_end
+
     return recursive_catboost_forecast_to_month_end(
         df=df,
-        full_sign=full_sign,
-        metric_name=metric_name,
         forecast_start_date=start,
         forecast_end_date=end,
         train_window_days=window
     )
 
-def model_catboost_direct(df, start, end, window, **kwargs):
+def model_catboost_recursive_one_fit(df, start, end, window, full_sign=None, metric_name=None, **kwargs):
+    # ✅ CatBoost рекурсивно, но обучение ОДИН раз до старта прогноза
+    from forecast.recursive_catboost_forecast_month import recursive_catboost_one_fit_forecast_to_month_end
+
+    return recursive_catboost_one_fit_forecast_to_month_end(
+        df=df,
+        forecast_start_date=start,
+        forecast_end_date=end,
+        train_window_days=window
+    )
+
+def model_catboost_direct(df, start, end, window, full_sign=None, metric_name=None, **kwargs):
     # ✅ CatBoost сразу на весь месяц
+    from forecast.direct_catboost_forecast_month import catboost_forecast_direct_to_month_end
+
     return catboost_forecast_direct_to_month_end(
         df=df,
         forecast_start_date=start,
         forecast_end_date=end,
-        train_window_days=window
+        train_window_days=window,
+        full_sign=full_sign,
+        metric_name=metric_name
     )
 
  # =========================================================
@@ -105,54 +233,361 @@ def model_catboost_direct(df, start, end, window, **kwargs):
 # =========================================================
 def model_lightgbm_recursive(df, start, end, window, full_sign=None, metric_name=None, **kwargs):
     # ✅ CatBoost рекурсивно (прогноз подставляется как факт)
+    from forecast.recursive_lightGBM_forecast import recursive_lightGBM_forecast_to_month_end
+
     return recursive_lightGBM_forecast_to_month_end(
         df=df,
-        full_sign=full_sign,
-        metric_name=metric_name,
         forecast_start_date=start,
         forecast_end_date=end,
         train_window_days=window
     )
 
-def model_lightgbm_direct(df, start, end, window, **kwargs):
+def model_lightgbm_recursive_one_fit(df, start, end, window, full_sign=None, metric_name=None, **kwargs):
+    # ✅ LightGBM рекурсивно, но обучение ОДИН раз до старта прогноза
+    from forecast.recursive_lightGBM_forecast import recursive_lightGBM_one_fit_forecast_to_month_end
+
+    return recursive_lightGBM_one_fit_forecast_to_month_end(
+        df=df,
+        forecast_start_date=start,
+        forecast_end_date=end,
+        train_window_days=window
+    )
+
+def model_lightgbm_direct(df, start, end, window, full_sign=None, metric_name=None, **kwargs):
     # ✅ CatBoost сразу на весь месяц
+    from forecast.direct_lightgbm_forecast_month import lightgbm_forecast_to_month_end
+
     return lightgbm_forecast_to_month_end(
         df=df,
         forecast_start_date=start,
         forecast_end_date=end,
-        train_window_days=window
+        train_window_days=window,
+        full_sign=full_sign,
+        metric_name=metric_name
     )
 
 # =========================================================
 # ✅ XGBOOST
 # =========================================================
-def model_xgb_direct(df, start, end, window, **kwargs):
+def model_xgb_direct(df, start, end, window, full_sign=None, metric_name=None, **kwargs):
     # ✅ CatBoost сразу на весь месяц
+    from forecast.xgboost_forecast_direct_month import xgboost_forecast_direct_to_month_end
+
     return xgboost_forecast_direct_to_month_end(
         df=df,
         forecast_start_date=start,
         forecast_end_date=end,
-        train_window_days=window
+        train_window_days=window,
+        full_sign=full_sign,
+        metric_name=metric_name
+    )
+
+# =========================================================
+# ✅ ГЛОБАЛЬНЫЕ МОДЕЛИ (одна модель на все связки, FULL_SIGN / METRIC_NAME - категориальные признаки)
+# сетка бэктеста и прогноз по policy считают их через BATCH_MODEL_REGISTRY по всем связкам,
+# вызов по одному ряду обучает модель только на этом ряду
+# =========================================================
+def model_catboost_global(df, start, end, window, full_sign=None, metric_name=None, **kwargs):
+    from forecast.global_boosting_forecast import global_boosting_forecast
+
+    return global_boosting_forecast(
+        df=df,
+        forecast_start_date=start,
+        forecast_end_date=end,
+        train_window_days=window,
+        model_name="CATBOOST",
+        full_sign=full_sign,
+        metric_name=metric_name
+    )
+
+def model_lightgbm_global(df, start, end, window, full_sign=None, metric_name=None, **kwargs):
+    from forecast.global_boosting_forecast import global_boosting_forecast
+
+    return global_boosting_forecast(
+        df=df,
+        forecast_start_date=start,
+        forecast_end_date=end,
+        train_window_days=window,
+        model_name="LIGHTGBM",
+        full_sign=full_sign,
+        metric_name=metric_name
+    )
+
+# =========================================================
+# ✅ MULTI-TARGET (все метрики канала одной моделью CatBoost MultiRMSE)
+# сетка бэктеста и прогноз по policy считают её через BATCH_MODEL_REGISTRY по всем метрикам канала
+# =========================================================
+def model_catboost_multi_target(df, start, end, window, full_sign=None, metric_name=None, **kwargs):
+    from forecast.multi_target_catboost_forecast import catboost_multi_target_forecast
+
+    return catboost_multi_target_forecast(
+        df=df,
+        forecast_start_date=start,
+        forecast_end_date=end,
+        train_window_days=window,
+        full_sign=full_sign,
+        metric_name=metric_name
+    )
+
+# =========================================================
+# ✅ WARM START (direct-модели, дообучение по цепочке дат бэктеста)
+# сетка бэктеста считает цепочку через BATCH_MODEL_REGISTRY, вызов на одну дату = полное обучение
+# (с chain_dates - цепочка по более ранним датам chain_dates и дате прогноза)
+# =========================================================
+def model_catboost_direct_warm(df, start, end, window, full_sign=None, metric_name=None, **kwargs):
+    from forecast.warm_start_direct_forecast import warm_start_direct_forecast
+
+    return warm_start_direct_forecast(
+        df=df,
+        forecast_start_date=start,
+        forecast_end_date=end,
+        train_window_days=window,
+        model_name="CATBOOST",
+        full_sign=full_sign,
+        metric_name=metric_name,
+        chain_dates=kwargs.get("chain_dates")
+    )
+
+def model_lightgbm_direct_warm(df, start, end, window, full_sign=None, metric_name=None, **kwargs):
+    from forecast.warm_start_direct_forecast import warm_start_direct_forecast
+
+    return warm_start_direct_forecast(
+        df=df,
+        forecast_start_date=start,
+        forecast_end_date=end,
+        train_window_days=window,
+        model_name="LIGHTGBM",
+        full_sign=full_sign,
+        metric_name=metric_name,
+        chain_dates=kwargs.get("chain_dates")
     )
 
+def model_xgb_direct_warm(df, start, end, window, full_sign=None, metric_name=None, **kwargs):
+    from forecast.warm_start_direct_forecast import warm_start_direct_forecast
+
+    return warm_start_direct_forecast(
+        df=df,
+        forecast_start_date=start,
+        forecast_end_date=end,
+        train_window_days=window,
+        model_name="XGBOOST",
+        full_sign=full_sign,
+        metric_name=metric_name,
+        chain_dates=kwargs.get("chain_dates")
+    )
+
+
+_CATBOOST = "models.catboost_model:CATBOOST_PARAMS"
+_LIGHTGBM = "models.light_gbm:LIGHTGBM_PARAMS"
+_XGBOOST = "models.xgboost_model:XGBOOST_PARAMS"
+_GLOBAL = "forecast.global_boosting_forecast:GLOBAL_MODEL_PARAMS"
+_WARM_START = "forecast.warm_start_direct_forecast:WARM_START_PARAMS"
+_BATCH_SMOOTHING = "models.batch_smoothing:BATCH_SMOOTHING_PARAMS"
 
-MODEL_REGISTRY = {
+_GLOBAL_CELLS = "forecast.global_boosting_forecast:global_boosting_cells"
+_WARM_START_CELLS = "forecast.warm_start_direct_forecast:warm_start_direct_cells"
+_SMOOTHING_CELLS = "forecast.baseline_smoothing_batch_forecast:batch_smoothing_cells"
+
+# =========================================================
+# ✅ Описания моделей
+# Baseline-ы без явных параметров: их логика целиком в коде (учитывается версией кода)
+# =========================================================
+MODEL_SPECS = {
 
     # Baselines
-    "BASELINE_OLS": model_baseline_ols,
-    "BASELINE_EXPON": model_baseline_simple_smooth,
-    "BASELINE_HOLT": model_baseline_holt_smooth,
-    "BASELINE_HOLT_WINTERS": model_baseline_holt_winters,
+    "BASELINE_OLS": ModelSpec(model_baseline_ols, backend="numpy", cost=COST_LIGHT),
+    "BASELINE_OLS_PREFIX": ModelSpec(
+        model_baseline_ols_prefix, backend="numpy", cost=COST_LIGHT,
+        batch="forecast.baseline_ols_prefix:baseline_ols_prefix_cells"
+    ),
+    "BASELINE_EXPON": ModelSpec(model_baseline_simple_smooth, backend="statsmodels", cost=COST_MEDIUM),
+    "BASELINE_HOLT": ModelSpec(model_baseline_holt_smooth, backend="statsmodels", cost=COST_MEDIUM),
+    "BASELINE_HOLT_WINTERS": ModelSpec(model_baseline_holt_winters, backend="statsmodels", cost=COST_MEDIUM),
+
+    # batch_kwargs - значения models.batch_smoothing.SES / HOLT / HOLT_WINTERS
+    "BASELINE_EXPON_FAST": ModelSpec(
+        model_baseline_simple_smooth_fast, backend="numpy", cost=COST_LIGHT,
+        params=(_BATCH_SMOOTHING,), batch=_SMOOTHING_CELLS, batch_kwargs={"method": "SES"}
+    ),
+    "BASELINE_HOLT_FAST": ModelSpec(
+        model_baseline_holt_smooth_fast, backend="numpy", cost=COST_LIGHT,
+        params=(_BATCH_SMOOTHING,), batch=_SMOOTHING_CELLS, batch_kwargs={"method": "HOLT"}
+    ),
+    "BASELINE_HOLT_WINTERS_FAST": ModelSpec(
+        model_baseline_holt_winters_fast, backend="numpy", cost=COST_LIGHT,
+        params=(_BATCH_SMOOTHING,), batch=_SMOOTHING_CELLS, batch_kwargs={"method": "HOLT_WINTERS"}
+    ),
 
     # ML models
-    "BASELINE_RF": model_random_forest,
+    "BASELINE_RF": ModelSpec(
+        model_random_forest, backend="sklearn", cost=COST_MEDIUM, threaded=True,
+        params=("models.random_forest_regressor:RANDOM_FOREST_PARAMS",)
+    ),
+
+    "CATBOOST_RECURSIVE": ModelSpec(
+        model_catboost_recursive, backend="catboost", cost=COST_HEAVY, threaded=True,
+        early_stopping=True, params=(_CATBOOST,)
+    ),
+    "CATBOOST_RECURSIVE_ONE_FIT": ModelSpec(
+        model_catboost_recursive_one_fit, backend="catboost", cost=COST_HEAVY, threaded=True,
+        early_stopping=True, params=(_CATBOOST,)
+    ),
+    "CATBOOST_DIRECT": ModelSpec(
+        model_catboost_direct, backend="catboost", cost=COST_HEAVY, threaded=True,
+        early_stopping=True, params=(_CATBOOST,)
+    ),
+
+    "LIGHTGBM_RECURSIVE": ModelSpec(
+        model_lightgbm_recursive, backend="lightgbm", cost=COST_HEAVY, threaded=True,
+        early_stopping=True, params=(_LIGHTGBM,)
+    ),
+    "LIGHTGBM_RECURSIVE_ONE_FIT": ModelSpec(
+        model_lightgbm_recursive_one_fit, backend="lightgbm", cost=COST_MEDIUM, threaded=True,
+        early_stopping=True, params=(_LIGHTGBM,)
+    ),
+    "LIGHTGBM_DIRECT": ModelSpec(
+        model_lightgbm_direct, backend="lightgbm", cost=COST_MEDIUM, threaded=True,
+        early_stopping=True, params=(_LIGHTGBM,)
+    ),
 
-    "CATBOOST_RECURSIVE": model_catboost_recursive,
-    "CATBOOST_DIRECT": model_catboost_direct,
+    "XGB_DIRECT": ModelSpec(
+        model_xgb_direct, backend="xgboost", cost=COST_HEAVY, threaded=True,
+        early_stopping=True, params=(_XGBOOST,)
+    ),
 
-    "LIGHTGBM_RECURSIVE": model_lightgbm_recursive,
-    "LIGHTGBM_DIRECT": model_lightgbm_direct,
+    "CATBOOST_GLOBAL": ModelSpec(
+        model_catboost_global, backend="catboost", cost=COST_HEAVY, threaded=True,
+        early_stopping=True, params=(_CATBOOST, _GLOBAL),
+        batch=_GLOBAL_CELLS, batch_kwargs={"model_name": "CATBOOST"}, key_scope=KEY_SCOPE_STORE
+    ),
+    "LIGHTGBM_GLOBAL": ModelSpec(
+        model_lightgbm_global, backend="lightgbm", cost=COST_HEAVY, threaded=True,
+        early_stopping=True, params=(_LIGHTGBM, _GLOBAL),
+        batch=_GLOBAL_CELLS, batch_kwargs={"model_name": "LIGHTGBM"}, key_scope=KEY_SCOPE_STORE
+    ),
 
-    "XGB_DIRECT": model_xgb_direct,
+    # MultiRMSE обучается без ранней остановки
+    "CATBOOST_MULTI_TARGET": ModelSpec(
+        model_catboost_multi_target, backend="catboost", cost=COST_HEAVY, threaded=True,
+        params=(
+            "models.catboost_model:CATBOOST_MULTI_TARGET_PARAMS",
+            "forecast.multi_target_catboost_forecast:MULTI_TARGET_PARAMS"
+        ),
+        batch="forecast.multi_target_catboost_forecast:multi_target_cells", key_scope=KEY_SCOPE_CHANNEL
+    ),
+
+    "CATBOOST_DIRECT_WARM": ModelSpec(
+        model_catboost_direct_warm, backend="catboost", cost=COST_HEAVY, threaded=True,
+        warm_start=True, early_stopping=True, params=(_CATBOOST, _WARM_START),
+        batch=_WARM_START_CELLS, batch_kwargs={"model_name": "CATBOOST"}
+    ),
+    "LIGHTGBM_DIRECT_WARM": ModelSpec(
+        model_lightgbm_direct_warm, backend="lightgbm", cost=COST_MEDIUM, threaded=True,
+        warm_start=True, early_stopping=True, params=(_LIGHTGBM, _WARM_START),
+        batch=_WARM_START_CELLS, batch_kwargs={"model_name": "LIGHTGBM"}
+    ),
+    "XGB_DIRECT_WARM": ModelSpec(
+        model_xgb_direct_warm, backend="xgboost", cost=COST_HEAVY, threaded=True,
+        warm_start=True, early_stopping=True, params=(_XGBOOST, _WARM_START),
+        batch=_WARM_START_CELLS, batch_kwargs={"model_name": "XGBOOST"}
+    ),
 }
 
+MODEL_REGISTRY = {model_key: spec.forecast for model_key, spec in MODEL_SPECS.items()}
+
+
+@functools.lru_cache(maxsize=None)
+def _resolve_hyperparams(model_key: str) -> dict:
+
+    params = {}
+
+    for target in MODEL_SPECS[model_key].params:
+        params.update(_resolve(target))
+
+    return params
+
+
+def model_hyperparams(model_key: str) -> dict:
+    """
+        Гиперпараметры модели (импортирует модули моделей при первом обращении).
+    """
+
+    if model_key not in MODEL_SPECS:
+        return {}
+
+    return dict(_resolve_hyperparams(model_key))
+
+
+def model_cache_params(model_key: str) -> dict:
+    """
+        Параметры модели для ключа кэша бэктеста: гиперпараметры
+        + настройки ранней остановки у бустингов (если она включена).
+    """
+
+    params = model_hyperparams(model_key)
+
+    if model_key in MODEL_SPECS and MODEL_SPECS[model_key].early_stopping:
+        params = {**params, **early_stopping_signature()}
+
+    return params
+
+
+def models_cost(models: list[str]) -> str:
+    """
+        Самый дорогой класс стоимости среди моделей (без импорта моделей).
+    """
+
+    costs = [MODEL_SPECS[model_key].cost for model_key in models if model_key in MODEL_SPECS]
+
+    for cost in (COST_HEAVY, COST_MEDIUM):
+        if cost in costs:
+            return cost
+
+    return COST_LIGHT
+
+
+def model_key_scope(model_key: str) -> str:
+    """
+        От каких рядов зависит прогноз ячейки модели (KEY_SCOPE_*, без импорта модели).
+    """
+
+    if model_key not in MODEL_SPECS:
+        return KEY_SCOPE_SERIES
+
+    return MODEL_SPECS[model_key].key_scope
+
+
+def model_warm_start(model_key: str) -> bool:
+    """
+        Прогноз ячейки модели зависит от более ранних дат цепочки бэктеста (warm start, без импорта модели).
+    """
+
+    return model_key in MODEL_SPECS and MODEL_SPECS[model_key].warm_start
+
+
+def warm_start_chain_before(chain_dates: list | None, start_date: pd.Timestamp) -> list[pd.Timestamp]:
+    """
+        Даты цепочки warm start раньше start_date (по возрастанию, без повторов).
+        От них зависит прогноз на start_date: дообучение предыдущей модели и фаза full_refit_every.
+    """
+
+    start_date = pd.Timestamp(start_date)
+
+    return [date for date in sorted({pd.Timestamp(date) for date in chain_dates or []}) if date < start_date]
+
+
+def _run_batch_model(model_key: str, df, cells, **kwargs):
+    spec = MODEL_SPECS[model_key]
+    return _resolve(spec.batch)(df, cells, **spec.batch_kwargs, **kwargs)
+
+# =========================================================
+# ✅ Модели, которые умеют считать много ячеек сетки за один вызов
+# (сетка бэктеста считает их заранее и раздаёт ячейкам готовые прогнозы)
+# функция: (df | SeriesStore, ячейки [(окно, канал, метрика, дата)]) -> {ячейка: [DDATE, FORECAST]}
+# warm start модели (model_warm_start) принимают ещё chain_dates - все даты цепочки бэктеста
+# =========================================================
+BATCH_MODEL_REGISTRY = {
+    model_key: functools.partial(_run_batch_model, model_key)
+    for model_key, spec in MODEL_SPECS.items()
+    if spec.batch is not None
+}
@@ -0,0 +1,246 @@
+# forecast/multi_target_catboost_forecast.py
+"""
+    Multi-target: все метрики одного канала (FULL_SIGN) одной моделью CatBoost (MultiRMSE).
+
+    SUM_SNDS, SUM_PROFIT, SUM_PROFIT_NO_KSP одного канала сильно связаны и обучаются
+    на одних и тех же календарных признаках, поэтому вместо модели на каждую метрику
+    строится одна таблица на канал:
+
+        DDATE | календарные признаки | лаги/rolling каждой метрики (SUM_SNDS__LAG_7D, ...) | таргеты (по метрике)
+
+    и одна модель предсказывает сразу все метрики канала (direct-прогноз на весь месяц, как CATBOOST_DIRECT).
+
+    Каждая метрика (таргет и её лаги) делится на среднее |факта| своего train-окна,
+    чтобы MultiRMSE не подстраивался только под самую крупную метрику.
+
+    Шаг MultiRMSE дороже шага одиночной модели и растёт с числом признаков, поэтому у каждой метрики
+    берётся сокращённый набор лагов (lag_columns): по 4 лага на метрику при трёх метриках дают
+    столько же признаков, сколько у одиночной модели.
+
+    Обучается на всех метриках канала, которые есть во входе (SeriesStore / длинный df):
+    если в df добавить колонки себестоимости, они становятся ещё одним таргетом той же модели.
+    Вызов по одному ряду (MODEL_REGISTRY) обучает модель только на этой метрике.
+"""
+
+import numpy as np
+import pandas as pd
+
+from data.series_store import SeriesStore
+from evaluation.backtest import split_X_y
+from evaluation.date_index import DateIndex, rows_between, rows_tail_before
+from features.lag_features import add_lags_means_for_model, LAG_FEATURE_COLUMNS
+from forecast.global_boosting_forecast import series_scale
+from models.artifact_store import train_or_load
+from models.catboost_model import train_catboost_multi_target, CATBOOST_MULTI_TARGET_PARAMS
+
+# ========= Параметры multi-target модели (входят в ключ кэша бэктеста) ====================
+MULTI_TARGET_PARAMS = dict(
+    # "mean" - деление метрики на среднее |факта| train-окна, "none" - без масштабирования
+    scaling="mean",
+    # лаги / rolling каждой метрики в признаках (подмножество LAG_FEATURE_COLUMNS)
+    lag_columns=["ROLL_MEAN_7", "ROLL_MEAN_28", "LAG_1D", "LAG_7D"]
+)
+
+
+def _metric_lag_columns(metric_name: str, lag_columns: list[str]) -> list[str]:
+    return [f"{metric_name}__{column}" for column in lag_columns]
+
+
+def build_channel_frame(
+        series_store: SeriesStore,
+        full_sign: str,
+        metric_names: list[str],
+        lag_columns: list[str] | None = None
+) -> pd.DataFrame:
+    """
+        Таблица канала: одна строка на дату, таргет и лаги по каждой метрике.
+
+        :param lag_columns: какие лаги каждой метрики брать в признаки (по умолчанию из MULTI_TARGET_PARAMS)
+
+        :return: DDATE | календарные признаки | <METRIC>__<LAG> | <METRIC>
+    """
+
+    lag_columns = lag_columns or MULTI_TARGET_PARAMS["lag_columns"]
+
+    channel_df = None
+
+    for metric_name in metric_names:
+
+        df_model = add_lags_means_for_model(series_store.get(full_sign, metric_name))
+
+        X, y = split_X_y(df_model)
+
+        metric_df = X[lag_columns].copy()
+        metric_df.columns = _metric_lag_columns(metric_name, lag_columns)
+        metric_df[metric_name] = y.values
+        metric_df.insert(0, "DDATE", df_model["DDATE"].values)
+
+        # календарные признаки одинаковы у всех метрик канала — берём у первой
+        if channel_df is None:
+            calendar_df = X.drop(columns=LAG_FEATURE_COLUMNS)
+            calendar_df.insert(0, "DDATE", df_model["DDATE"].values)
+
+            channel_df = calendar_df.merge(metric_df, on="DDATE", how="inner")
+
+        else:
+            channel_df = channel_df.merge(metric_df, on="DDATE", how="inner")
+
+    return channel_df.sort_values("DDATE").reset_index(drop=True)
+
+
+def multi_target_fit_predict(
+        channel_df: pd.DataFrame,
+        metric_names: list[str],
+        forecast_start_date: pd.Timestamp,
+        forecast_end_date: pd.Timestamp,
+        train_window_days: int,
+        full_sign: str | None = None,
+        params: dict | None = None
+) -> dict[str, pd.DataFrame]:
+    """
+        Одна модель на все метрики канала для одного окна и одной даты.
+
+        :param channel_df: таблица канала (build_channel_frame)
+        :param metric_names: метрики-таргеты (все обучаются и прогнозируются вместе)
+        :return: {METRIC_NAME: DataFrame [DDATE, FORECAST]}
+    """
+
+    params = params or MULTI_TARGET_PARAMS
+
+    date_index = DateIndex(channel_df)
+
+    train_df = rows_tail_before(channel_df, forecast_start_date, train_window_days, date_index).copy()
+    future_df = rows_between(channel_df, forecast_start_date, forecast_end_date, date_index).copy()
+
+    # ✅ масштаб своей метрики: таргет + её лаги
+    scales = {}
+
+    for metric_name in metric_names:
+
+        scales[metric_name] = series_scale(
+            train_df[[metric_name]].rename(columns={metric_name: "METRIC_VALUE"}),
+            params["scaling"]
+        )
+
+        scaled_columns = [metric_name] + [
+            column for column in channel_df.columns if column.startswith(f"{metric_name}__")
+        ]
+
+        train_df[scaled_columns] = train_df[scaled_columns] / scales[metric_name]
+        future_df[scaled_columns] = future_df[scaled_columns] / scales[metric_name]
+
+    feature_columns = [
+        column for column in channel_df.columns
+        if column != "DDATE" and column not in metric_names
+    ]
+
+    # ✅ одна модель на все метрики канала (или готовая из хранилища моделей)
+    model = train_or_load(
+        model_name="CATBOOST_MULTI_TARGET",
+        train_func=train_catboost_multi_target,
+        X_train=train_df[feature_columns],
+        y_train=train_df[metric_names],
+        hyperparams={**CATBOOST_MULTI_TARGET_PARAMS, **params},
+        train_window_days=train_window_days,
+        train_end=forecast_start_date - pd.Timedelta(days=1),
+        full_sign=full_sign
+    )
+
+    if len(future_df):
+        preds = np.asarray(model.predict(future_df[feature_columns])).reshape(len(future_df), -1)
+    else:
+        preds = np.empty((0, len(metric_names)))
+
+    return {
+        metric_name: pd.DataFrame({
+            "DDATE": future_df["DDATE"].values,
+            "FORECAST": preds[:, position] * scales[metric_name]
+        })
+        for position, metric_name in enumerate(metric_names)
+    }
+
+
+def _channel_metrics(series_store: SeriesStore) -> dict[str, list[str]]:
+    # все метрики каждого канала в порядке хранилища
+    channel_metrics = {}
+
+    for full_sign, metric_name in series_store.keys():
+        channel_metrics.setdefault(full_sign, []).append(metric_name)
+
+    return channel_metrics
+
+
+def multi_target_cells(
+        df: pd.DataFrame | SeriesStore,
+        cells: list[tuple]
+) -> dict[tuple, pd.DataFrame]:
+    """
+        Прогнозы для ячеек сетки бэктеста: одно обучение на (окно, дата, канал) по всем метрикам канала.
+
+        :param cells: [(окно, канал, метрика, дата старта)]
+        :return: {ячейка: DataFrame [DDATE, FORECAST]}
+    """
+
+    series_store = SeriesStore.from_df(df)
+
+    channel_metrics = _channel_metrics(series_store)
+
+    cells_by_channel = {}
+
+    for cell in cells:
+        train_window, full_sign, metric, start_date = cell
+        cells_by_channel.setdefault((train_window, start_date, full_sign), []).append(cell)
+
+    # ✅ таблица канала строится один раз (от окна и даты не зависит)
+    channel_frames = {}
+
+    forecasts = {}
+
+    for (train_window, start_date, full_sign), channel_cells in cells_by_channel.items():
+
+        if full_sign not in channel_frames:
+            channel_frames[full_sign] = build_channel_frame(series_store, full_sign, channel_metrics[full_sign])
+
+        metric_forecasts = multi_target_fit_predict(
+            channel_df=channel_frames[full_sign],
+            metric_names=channel_metrics[full_sign],
+            forecast_start_date=start_date,
+            forecast_end_date=start_date + pd.offsets.MonthEnd(0),
+            train_window_days=train_window,
+            full_sign=full_sign
+        )
+
+        for cell in channel_cells:
+            forecasts[cell] = metric_forecasts[cell[2]]
+
+    return forecasts
+
+
+def catboost_multi_target_forecast(
+        df: pd.DataFrame,
+        forecast_start_date: pd.Timestamp,
+        forecast_end_date: pd.Timestamp,
+        train_window_days: int,
+        full_sign: str | None = None,
+        metric_name: str | None = None
+) -> pd.DataFrame:
+    """
+        Прогноз одной метрики: модель обучается на всех метриках канала, которые есть в df.
+    """
+
+    series_store = SeriesStore.from_df(df)
+
+    full_sign, metric_name = (
+        (full_sign, metric_name) if (full_sign, metric_name) in series_store else series_store.keys()[0]
+    )
+
+    metric_names = _channel_metrics(series_store)[full_sign]
+
+    return multi_target_fit_predict(
+        channel_df=build_channel_frame(series_store, full_sign, metric_names),
+        metric_names=metric_names,
+        forecast_start_date=forecast_start_date,
+        forecast_end_date=forecast_end_date,
+        train_window_days=train_window_days,
+        full_sign=full_sign
+    )[metric_name]
@@ -0,0 +1,244 @@
+# forecast/parallel_policy_forecast.py
+"""
+    Параллельный прогноз строк policy (production-прогноз текущего месяца).
+
+    Строка policy = (канал, метрика, модель, окно) — независимый прогноз одной связки.
+    Batch-модель (BATCH_MODEL_REGISTRY) - одна задача на все свои строки (forecast_policy_batch).
+    Задачи выполняются на ограниченном пуле процессов (n_workers), у каждой модели
+    в процессе threads_per_worker потоков (models/threads.py), как в параллельном бэктесте.
+
+    Таймаут задачи:
+        ProcessPoolExecutor не умеет прервать уже запущенную задачу, поэтому у каждого процесса пула
+        свой канал (Pipe), и задача, превысившая row_timeout, снимается вместе с процессом:
+        процесс завершается, на его место запускается новый, остальные задачи продолжают считаться.
+
+    Упавшая / не уложившаяся в таймаут задача возвращается как ошибка,
+    запасной прогноз для её строк строит вызывающий код (forecast_current_month_by_policy).
+"""
+
+import multiprocessing
+import time
+from collections import deque
+from multiprocessing.connection import wait
+
+import pandas as pd
+
+from data.series_store import SeriesStore
+from forecast.models_registry import BATCH_MODEL_REGISTRY, MODEL_REGISTRY
+from models.threads import limit_model_threads
+
+
+def forecast_policy_row(
+        work_df: pd.DataFrame,
+        model_name: str,
+        forecast_start_date: pd.Timestamp,
+        forecast_end_date: pd.Timestamp,
+        window: int,
+        full_sign: str,
+        metric: str
+) -> pd.DataFrame:
+    """
+        Прогноз одной строки policy моделью из MODEL_REGISTRY.
+
+        :return: DataFrame [DDATE, FORECAST]
+    """
+
+    return MODEL_REGISTRY[model_name](
+        df=work_df,
+        start=forecast_start_date,
+        end=forecast_end_date,
+        window=window,
+        full_sign=full_sign,
+        metric_name=metric
+    )
+
+
+def forecast_policy_batch(
+        series_store: SeriesStore,
+        model_name: str,
+        cells: list[tuple]
+) -> dict[tuple, pd.DataFrame]:
+    """
+        Прогноз всех строк policy batch-модели одним вызовом (глобальные модели обучаются на всех связках).
+
+        :param cells: ячейки (окно, канал, метрика, дата старта)
+        :return: {ячейка: DataFrame [DDATE, FORECAST]}
+    """
+
+    return BATCH_MODEL_REGISTRY[model_name](series_store, cells)
+
+
+def _run_task_safely(task: tuple) -> tuple:
+    # task = (функция, аргументы) -> (результат, None) или (None, текст ошибки)
+    func, args = task
+
+    try:
+        return func(*args), None
+    except Exception as exc:
+        return None, f"{type(exc).__name__}: {exc}"
+
+
+def _policy_row_worker(conn, threads_per_worker: int):
+    # процесс пула: задачи по одной из канала, пока не придёт None
+    limit_model_threads(threads_per_worker)
+
+    while True:
+        task = conn.recv()
+
+        if task is None:
+            return
+
+        conn.send(_run_task_safely(task))
+
+
+class _Worker:
+    """
+        Процесс пула со своим каналом и текущей задачей.
+    """
+
+    def __init__(self, ctx, threads_per_worker: int):
+        self.conn, child_conn = ctx.Pipe()
+
+        self.process = ctx.Process(
+            target=_policy_row_worker,
+            args=(child_conn, threads_per_worker),
+            daemon=True
+        )
+        self.process.start()
+
+        child_conn.close()
+
+        self.task_id = None
+        self.started = None
+
+    def submit(self, task_id: int, task: tuple):
+        self.conn.send(task)
+        self.task_id = task_id
+        self.started = time.monotonic()
+
+    def release(self):
+        self.task_id = None
+        self.started = None
+
+    def kill(self):
+        self.process.terminate()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self):
+        if self.process.is_alive():
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+
+            self.process.join(timeout=5)
+
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+
+        self.conn.close()
+
+
+def run_policy_tasks(
+        tasks: list[tuple],
+        n_workers: int = 1,
+        threads_per_worker: int = 1,
+        row_timeout: float | None = None
+) -> list[tuple]:
+    """
+        Задачи прогноза по policy: строки (forecast_policy_row) и batch-модели (forecast_policy_batch).
+
+        :param tasks: (функция модуля, аргументы) - функция должна импортироваться в процессе пула (spawn)
+        :param n_workers: число процессов (1 и без таймаута = последовательно в текущем процессе)
+        :param threads_per_worker: потоков на одну модель внутри процесса пула
+        :param row_timeout: секунд на задачу (None = без ограничения); таймаут требует процесса пула
+        :return: [(результат | None, ошибка | None)] в порядке tasks
+    """
+
+    if not tasks:
+        return []
+
+    if n_workers <= 1 and row_timeout is None:
+        return [_run_task_safely(task) for task in tasks]
+
+    n_workers = min(max(n_workers, 1), len(tasks))
+
+    print(
+        f"\n✅ Параллельный прогноз по policy: {len(tasks)} задач, процессов: {n_workers}"
+        + ("" if row_timeout is None else f", таймаут задачи: {row_timeout} с")
+    )
+
+    # spawn: чистые процессы, без копии состояния OpenMP родителя
+    ctx = multiprocessing.get_context("spawn")
+
+    results = [None] * len(tasks)
+    pending = deque(range(len(tasks)))
+
+    workers = [_Worker(ctx, threads_per_worker) for _ in range(n_workers)]
+
+    try:
+        while True:
+            # ---- свободным процессам - следующие задачи ----
+            for i, worker in enumerate(workers):
+                if worker.task_id is None and pending:
+                    if not worker.process.is_alive():
+                        worker.kill()
+                        worker = workers[i] = _Worker(ctx, threads_per_worker)
+
+                    task_id = pending.popleft()
+                    worker.submit(task_id, tasks[task_id])
+
+            busy = [worker for worker in workers if worker.task_id is not None]
+
+            if not busy:
+                break
+
+            wait_timeout = None
+
+            if row_timeout is not None:
+                now = time.monotonic()
+                wait_timeout = max(0.0, min(worker.started + row_timeout - now for worker in busy))
+
+            ready = wait(
+                [worker.conn for worker in busy] + [worker.process.sentinel for worker in busy],
+                timeout=wait_timeout
+            )
+
+            now = time.monotonic()
+
+            for i, worker in enumerate(workers):
+
+                if worker.task_id is None:
+                    continue
+
+                if worker.conn in ready or worker.process.sentinel in ready:
+                    try:
+                        results[worker.task_id] = worker.conn.recv()
+                        worker.release()
+                        continue
+
+                    except (EOFError, OSError):
+                        # процесс умер, не отдав результат (OOM, segfault библиотеки)
+                        results[worker.task_id] = (
+                            None, f"процесс прогноза завершился (код {worker.process.exitcode})"
+                        )
+
+                elif row_timeout is not None and now - worker.started >= row_timeout:
+                    results[worker.task_id] = (None, f"таймаут {row_timeout} с")
+
+                else:
+                    continue
+
+                # процесс со снятой задачей заменяется новым (если ещё есть задачи)
+                worker.kill()
+                workers[i] = _Worker(ctx, threads_per_worker) if pending else None
+
+            workers = [worker for worker in workers if worker is not None]
+
+    finally:
+        for worker in workers:
+            worker.stop()
+
+    return results
@@ -1,78 +1,167 @@
-import json
 from ast import fix_missing_locations
 
 import pandas as pd
-from forecast.models_registry import MODEL_REGISTRY
+from data.series_store import SeriesStore
+from evaluation.policy_store import PolicyStore
+from forecast.models_registry import BATCH_MODEL_REGISTRY, COST_LIGHT, models_cost
+from forecast.parallel_policy_forecast import forecast_policy_batch, forecast_policy_row, run_policy_tasks
 from utils.finish_formating_dframe import long_to_wide_forecast
 
 
 def load_latest_policy_for_forecast(
-        filename='policy_model.json'
+        filename='policy_store.sqlite'
 ):
+    """
+        Текущая policy по всем связкам (последний запуск на связку) из хранилища policy.
+    """
 
-    with open(filename, 'r', encoding='utf-8') as f:
-        records = json.load(f)
-
-    df = pd.DataFrame(records)
-
-    df['RUN_DATE'] = pd.to_datetime(df['RUN_DATE'])
-
-    latest_policy = (
-        df
-        .sort_values('RUN_DATE')
-        .groupby(["FULL_SIGN", "METRIC_NAME"])
-        .tail(1)
-        .reset_index(drop=True)
-    )
+    store = PolicyStore(filename)
 
-    return latest_policy
+    try:
+        return store.latest_policy()
+    finally:
+        store.close()
 
 def forecast_current_month_by_policy(
-        df: pd.DataFrame,
+        df: pd.DataFrame | SeriesStore,
         policy_df: pd.DataFrame,
-        forecast_start_date: pd.Timestamp
+        forecast_start_date: pd.Timestamp,
+        n_workers: int = 1,
+        threads_per_worker: int = 1,
+        row_timeout: float | None = None,
+        fallback_model: str = "BASELINE_OLS"
 ):
     """
         Считает актуальный прогноз текущего месяца по policy.
 
+        :param df: длинный датафрейм с признаками или SeriesStore по нему
+        :param n_workers: процессов для строк policy (forecast/parallel_policy_forecast.py)
+        :param threads_per_worker: потоков на одну модель внутри процесса пула
+        :param row_timeout: секунд на задачу пула - строку policy или batch-модель (None = без ограничения)
+        :param fallback_model: модель, которой считается строка, если модель policy упала или не уложилась в таймаут
+
+        Batch-модели (BATCH_MODEL_REGISTRY) считаются одним вызовом по всем своим связкам,
+        как в сетке бэктеста (глобальные модели обучаются на всех связках df): одна задача пула на модель,
+        с тем же таймаутом и ограничением потоков, что и строки.
+        Остальные строки - по задаче на строку; если все модели лёгкие (ModelSpec.cost == COST_LIGHT),
+        то в текущем процессе.
+
         Возвращает long df:
-            DDATE | FULL_SIGN | METRIC_NAME | FORECAST
+            DDATE | FORECAST | FULL_SIGN | METRIC_NAME | FORECAST_MODEL
+        FORECAST_MODEL - модель, которая фактически посчитала строку (модель policy или fallback_model).
     """
 
-    result = []
+    series_store = SeriesStore.from_df(df)
+
+    forecast_end_date = forecast_start_date + pd.offsets.MonthEnd(0)
+
+    rows = [
+        (row['FULL_SIGN'], row['METRIC_NAME'], row['BEST_WINDOW'], row['BEST_MODEL'].replace("_WMAPE", ""))
+        for _, row in policy_df.iterrows()
+    ]
+
+    # ---- batch-модели: ячейки (окно, канал, метрика, дата) по каждой модели ----
+    batch_cells = {}
+
+    for full_sign, metric, window, model_name in rows:
+
+        if model_name in BATCH_MODEL_REGISTRY:
+            batch_cells.setdefault(model_name, []).append(
+                (window, full_sign, metric, forecast_start_date)
+            )
+
+    # ---- остальные строки: по задаче на строку ----
+    row_ids = [
+        i for i, (full_sign, metric, window, model_name) in enumerate(rows)
+        if model_name not in BATCH_MODEL_REGISTRY
+    ]
+
+    if models_cost([model_name for *_, model_name in rows]) == COST_LIGHT:
+        n_workers = 1
+        row_timeout = None
+
+    # batch-модели первыми: самые долгие задачи
+    results = run_policy_tasks(
+        [
+            (forecast_policy_batch, (series_store, model_name, cells))
+            for model_name, cells in batch_cells.items()
+        ]
+        + [
+            (
+                forecast_policy_row,
+                (
+                    series_store.get(rows[i][0], rows[i][1]),
+                    rows[i][3],
+                    forecast_start_date,
+                    forecast_end_date,
+                    rows[i][2],
+                    rows[i][0],
+                    rows[i][1]
+                )
+            )
+            for i in row_ids
+        ],
+        n_workers=n_workers,
+        threads_per_worker=threads_per_worker,
+        row_timeout=row_timeout
+    )
+
+    batch_forecasts = {}
+    errors = {}
+
+    for (model_name, cells), (forecasts, error) in zip(batch_cells.items(), results):
+
+        if forecasts is None:
+            # строки упавшей / снятой по таймауту batch-модели уходят в fallback
+            for cell in cells:
+                errors[(model_name, cell)] = error
+            continue
 
-    for _, row in policy_df.iterrows():
+        for cell, forecast_df in forecasts.items():
+            batch_forecasts[(model_name, cell)] = forecast_df
 
-        full_sign = row['FULL_SIGN']
-        metric = row['METRIC_NAME']
-        window = row['BEST_WINDOW']
-        model_name = row['BEST_MODEL'].replace("_WMAPE", "")
+    row_forecasts = dict(zip(row_ids, results[len(batch_cells):]))
+
+    result = []
+
+    for i, (full_sign, metric, window, model_name) in enumerate(rows):
 
         print(
             f"Актуальный прогноз: \n"
             f"{full_sign} | {metric} | {model_name} | {window}"
         )
 
-        work_df = df[
-            (df["FULL_SIGN"] == full_sign) &
-            (df["METRIC_NAME"] == metric)
-        ].copy()
+        batch_key = (model_name, (window, full_sign, metric, forecast_start_date))
 
-        model_func = MODEL_REGISTRY[model_name]
+        if batch_key in batch_forecasts:
+            actual_forecast_df, error = batch_forecasts[batch_key].copy(), None
 
-        forecast_end_date = forecast_start_date + pd.offsets.MonthEnd(0)
+        elif i in row_forecasts:
+            actual_forecast_df, error = row_forecasts[i]
 
-        actual_forecast_df = model_func(
-            df=work_df,
-            start=forecast_start_date,
-            end=forecast_end_date,
-            window=window,
-            full_sign=full_sign,
-            metric_name=metric
-        )
+        else:
+            actual_forecast_df, error = None, errors.get(batch_key, "нет прогноза batch-модели")
+
+        forecast_model = model_name
+
+        if actual_forecast_df is None:
+            print(f"⚠️ {model_name} не посчитал строку ({error}) -> {fallback_model}")
+
+            actual_forecast_df = forecast_policy_row(
+                series_store.get(full_sign, metric),
+                fallback_model,
+                forecast_start_date,
+                forecast_end_date,
+                window,
+                full_sign,
+                metric
+            )
+
+            forecast_model = fallback_model
 
         actual_forecast_df['FULL_SIGN'] = full_sign
         actual_forecast_df['METRIC_NAME'] = metric
+        actual_forecast_df['FORECAST_MODEL'] = forecast_model
 
         result.append(actual_forecast_df)
 
@@ -82,15 +171,42 @@ def forecast_current_month_by_policy(
 def run_policy_current_month_forecast(
         df,
         policy_file,
-        forecast_start_date
+        forecast_start_date,
+        policy_df: pd.DataFrame | None = None,
+        n_workers: int = 1,
+        threads_per_worker: int = 1,
+        row_timeout: float | None = None,
+        fallback_model: str = "BASELINE_OLS"
 ):
+    """
+        Прогноз текущего месяца по policy и сводка по подвидам продаж.
+
+        :param policy_file: хранилище policy (текущая policy по связкам)
+        :param policy_df: готовая policy (например снимок этапа policy в cli.py) вместо policy_file
+        :param n_workers, threads_per_worker, row_timeout, fallback_model: см. forecast_current_month_by_policy
+        :return: (широкий прогноз long_to_wide_forecast,
+                  модели связок: FULL_SIGN | METRIC_NAME | FORECAST_MODEL - модель policy или fallback_model)
+    """
 
-    policy_df = load_latest_policy_for_forecast(policy_file)
+    if policy_df is None:
+        policy_df = load_latest_policy_for_forecast(policy_file)
 
     forecast_current_long = forecast_current_month_by_policy(
         df=df,
         policy_df=policy_df,
-        forecast_start_date=forecast_start_date
+        forecast_start_date=forecast_start_date,
+        n_workers=n_workers,
+        threads_per_worker=threads_per_worker,
+        row_timeout=row_timeout,
+        fallback_model=fallback_model
+    )
+
+    # какая модель фактически посчитала каждую связку (fallback вместо модели policy)
+    forecast_models = (
+        forecast_current_long
+        .groupby(["FULL_SIGN", "METRIC_NAME"], sort=False)["FORECAST_MODEL"]
+        .first()
+        .reset_index()
     )
 
     finish_forecast_df = long_to_wide_forecast(forecast_current_long)
@@ -105,7 +221,7 @@ def run_policy_current_month_forecast(
 
     print(group_df)
 
-    return finish_forecast_df
+    return finish_forecast_df, forecast_models
 
 
 
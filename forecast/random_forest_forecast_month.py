@@ -3,13 +3,17 @@ import pandas as pd
 
 from features.lag_features import add_lags_means_for_model
 from evaluation.backtest import split_train_and_test_data, split_X_y
-from models.random_forest_regressor import train_rand_forest_reggr
+from evaluation.date_index import DateIndex, rows_between, rows_tail_before
+from models.random_forest_regressor import train_rand_forest_reggr, RANDOM_FOREST_PARAMS
+from models.artifact_store import train_or_load
 
 def random_forest_forecast_direct_to_month_end(
     df: pd.DataFrame,
     forecast_start_date: pd.Timestamp,
     forecast_end_date: pd.Timestamp,
-    train_window_days: int
+    train_window_days: int,
+    full_sign: str | None = None,
+    metric_name: str | None = None
 ) -> pd.DataFrame:
     """
     Direct-прогноз до конца месяца с помощью RandomForest.
@@ -24,14 +28,13 @@ def random_forest_forecast_direct_to_month_end(
     # ✅ лаги + rolling
     df_model = add_lags_means_for_model(df)
 
+    date_index = DateIndex(df_model)
+
     # ✅ обучаемся только на истории
-    train_df = df_model[df_model["DDATE"] < forecast_start_date].tail(train_window_days)
+    train_df = rows_tail_before(df_model, forecast_start_date, train_window_days, date_index)
 
     # ✅ тестовый горизонт
-    test_df = df_model[
-        (df_model["DDATE"] >= forecast_start_date) &
-        (df_model["DDATE"] <= forecast_end_date)
-    ]
+    test_df = rows_between(df_model, forecast_start_date, forecast_end_date, date_index)
 
     if len(test_df) == 0:
         return pd.DataFrame()
@@ -40,8 +43,18 @@ def random_forest_forecast_direct_to_month_end(
     X_train, y_train = split_X_y(train_df)
     X_test, _ = split_X_y(test_df)
 
-    # ✅ train model
-    model = train_rand_forest_reggr(X_train, y_train)
+    # ✅ train model (или готовая модель из хранилища)
+    model = train_or_load(
+        model_name="RANDOM_FOREST",
+        train_func=train_rand_forest_reggr,
+        X_train=X_train,
+        y_train=y_train,
+        hyperparams=RANDOM_FOREST_PARAMS,
+        train_window_days=train_window_days,
+        train_end=forecast_start_date - pd.Timedelta(days=1),
+        full_sign=full_sign,
+        metric_name=metric_name
+    )
 
     # ✅ predict all days at once
     y_pred = model.predict(X_test)
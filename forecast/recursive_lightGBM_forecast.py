@@ -2,17 +2,19 @@
 
 import pandas as pd
 
-from features.lag_features import add_lags_means_for_model
+from features.lag_features import add_lags_means_for_model, IncrementalLagFeatures, LAG_FEATURE_COLUMNS
 
 from evaluation.backtest import split_train_and_test_data, split_X_y, predict_one_day
-from models.light_gbm import train_lightgbm
+from evaluation.date_index import DateIndex
+from models.light_gbm import train_lightgbm, LIGHTGBM_PARAMS
+from models.artifact_store import train_or_load
+from data.series_store import series_identity
+from forecast.recursive_one_fit_forecast import recursive_one_fit_forecast_to_month_end
 
 
 # ============= Прогноз до конца месяца ====================
 def recursive_lightGBM_forecast_to_month_end(
     df: pd.DataFrame,
-    full_sign: str,
-    metric_name: str,
     forecast_start_date: pd.Timestamp,
     forecast_end_date: pd.Timestamp,
     train_window_days: int
@@ -29,7 +31,7 @@ def recursive_lightGBM_forecast_to_month_end(
            - обучаем CatBoost
            - прогнозируем значение на текущий день
            - сохраняем прогноз
-           - подставляем прогноз как факт в work_df
+           - подставляем прогноз как факт (и в lag_state для лагов следующего дня)
 
         Результат:
         - прогнозный DataFrame по всем датам месяца
@@ -39,37 +41,65 @@ def recursive_lightGBM_forecast_to_month_end(
         - модель должна учиться эффекту праздников через IS_HOLIDAY
     '''
 
+    # связка - из самого ряда (ключ хранилища моделей и ранней остановки)
+    full_sign, metric_name = series_identity(df)
+
     forecast_dates = pd.date_range(
         start=forecast_start_date,
         end=forecast_end_date
     ) # Даты без выходных, их добавим ниже
 
-    work_df = df.copy()
+    # ✅ лаги и rolling считаем ОДИН раз по всей истории,
+    # далее признаки прогнозных дней обновляются инкрементально за O(1)
+    df_model = add_lags_means_for_model(
+        df=df
+    )
+    row_by_date = pd.Series(df_model.index, index=df_model["DDATE"])
+    # даты df_model в цикле не меняются (только значения) — индекс дат строим один раз
+    date_index = DateIndex(df_model)
+
+    lag_state = IncrementalLagFeatures.from_history(
+        df=df,
+        forecast_start_date=forecast_start_date
+    )
 
     forecasts = []
     importance_list = []
 
     for d in forecast_dates:
 
-        if d not in work_df["DDATE"].values:
+        if d not in row_by_date.index:
             print("Нет строки на дату", d)
 
-        # ✅ лаги и rolling
-        df_model = add_lags_means_for_model(
-            df=work_df
-        )
+        row = row_by_date[d]
+
+        # ✅ лаги и rolling с учётом уже подставленных прогнозов
+        df_model.loc[row, LAG_FEATURE_COLUMNS] = list(lag_state.features().values())
 
         # train/test split
         train_df, test_df = split_train_and_test_data(
             df=df_model,
             forecast_date=d,
-            train_window_days=train_window_days
+            train_window_days=train_window_days,
+            date_index=date_index
         )
 
         X_train, y_train = split_X_y(train_df)
         X_test, _ = split_X_y(test_df)
 
-        model = train_lightgbm(X_train, y_train)
+        model = train_or_load(
+            model_name="LIGHTGBM",
+            train_func=train_lightgbm,
+            X_train=X_train,
+            y_train=y_train,
+            hyperparams=LIGHTGBM_PARAMS,
+            train_window_days=train_window_days,
+            train_end=d - pd.Timedelta(days=1),
+            full_sign=full_sign,
+            metric_name=metric_name,
+            # модель дня обучена на подставленных прогнозах - в хранилище моделей не сохраняем
+            use_store=False
+        )
         y_pred = predict_one_day(model, X_test)
 
         # # IMPORTANCE FEATURES
@@ -81,15 +111,35 @@ def recursive_lightGBM_forecast_to_month_end(
             "FORECAST": y_pred
         })
 
-        mask = (
-                (work_df["DDATE"] == d) &
-                (work_df["FULL_SIGN"] == full_sign) &
-                (work_df["METRIC_NAME"] == metric_name)
-        )
-
-        work_df.loc[mask, "METRIC_VALUE"] = y_pred
+        # прогноз подставляется как факт
+        df_model.loc[row, "METRIC_VALUE"] = y_pred
+        lag_state.append(y_pred)
 
     forecast_df = pd.DataFrame(forecasts)
 
 
-    return forecast_df
\ No newline at end of file
+    return forecast_df
+
+
+# ============= Прогноз до конца месяца с одним обучением ====================
+def recursive_lightGBM_one_fit_forecast_to_month_end(
+    df: pd.DataFrame,
+    forecast_start_date: pd.Timestamp,
+    forecast_end_date: pd.Timestamp,
+    train_window_days: int
+) -> pd.DataFrame:
+    '''
+        Рекурсивный прогноз LightGBM с одним обучением:
+        модель учится один раз на окне до forecast_start_date,
+        далее по дням только predict с подстановкой прогноза в лаги.
+    '''
+
+    return recursive_one_fit_forecast_to_month_end(
+        df=df,
+        forecast_start_date=forecast_start_date,
+        forecast_end_date=forecast_end_date,
+        train_window_days=train_window_days,
+        train_func=train_lightgbm,
+        model_name="LIGHTGBM",
+        hyperparams=LIGHTGBM_PARAMS
+    )
@@ -0,0 +1,120 @@
+# forecast/recursive_one_fit_forecast.py
+"""
+        Рекурсивный прогноз до конца месяца с ОДНИМ обучением модели.
+
+        Отличие от recursive_catboost_forecast_month / recursive_lightGBM_forecast:
+
+        1. Модель обучается один раз на окне train_window_days ДО forecast_start_date
+        2. Далее по дням месяца только делается predict:
+           - лаги и rolling признаки пересчитываются с учётом уже сделанных прогнозов
+           - прогноз подставляется обратно как факт (recursive forecasting)
+
+        Так вместо ~30 обучений на месяц получается одно,
+        что позволяет сравнить точность и время с режимом "переобучение каждый день".
+
+        :return: DataFrame [DDATE, FORECAST]
+"""
+
+import pandas as pd
+
+from features.lag_features import add_lags_means_for_model, IncrementalLagFeatures, LAG_FEATURE_COLUMNS
+from evaluation.backtest import split_train_and_test_data, split_X_y, predict_one_day
+from models.artifact_store import train_or_load
+from data.series_store import series_identity
+
+
+def recursive_one_fit_forecast_to_month_end(
+    df: pd.DataFrame,
+    forecast_start_date: pd.Timestamp,
+    forecast_end_date: pd.Timestamp,
+    train_window_days: int,
+    train_func,
+    model_name: str,
+    hyperparams: dict
+) -> pd.DataFrame:
+    '''
+        Строит рекурсивный ML-прогноз до конца месяца, обучая модель один раз.
+
+        Алгоритм:
+
+        1. Считаем лаги и rolling признаки на истории.
+        2. Обучаем модель train_func на окне train_window_days до forecast_start_date.
+        3. Для каждого дня месяца:
+           - обновляем лаги и rolling с учётом прогнозов прошлых дней (IncrementalLagFeatures)
+           - прогнозируем значение на текущий день уже обученной моделью
+           - подставляем прогноз как факт для лагов следующего дня
+
+        :param train_func: функция обучения (X_train, y_train) -> model (train_catboost, train_lightgbm ...)
+        :param model_name: имя модели в хранилище обученных моделей (CATBOOST, LIGHTGBM ...)
+        :param hyperparams: гиперпараметры train_func (часть ключа хранилища)
+        :return: DataFrame [DDATE, FORECAST]
+    '''
+
+    # связка - из самого ряда (ключ хранилища моделей и ранней остановки)
+    full_sign, metric_name = series_identity(df)
+
+    forecast_dates = pd.date_range(
+        start=forecast_start_date,
+        end=forecast_end_date
+    )
+
+    # ✅ лаги и rolling по истории
+    df_model = add_lags_means_for_model(
+        df=df
+    )
+    row_by_date = pd.Series(df_model.index, index=df_model["DDATE"])
+
+    # ✅ обучаем один раз на окне до старта прогноза (или берём готовую модель из хранилища)
+    train_df, _ = split_train_and_test_data(
+        df=df_model,
+        forecast_date=forecast_start_date,
+        train_window_days=train_window_days
+    )
+
+    X_train, y_train = split_X_y(train_df)
+
+    model = train_or_load(
+        model_name=model_name,
+        train_func=train_func,
+        X_train=X_train,
+        y_train=y_train,
+        hyperparams=hyperparams,
+        train_window_days=train_window_days,
+        train_end=forecast_start_date - pd.Timedelta(days=1),
+        full_sign=full_sign,
+        metric_name=metric_name
+    )
+
+    # ✅ признаки прогнозных дней обновляются инкрементально за O(1)
+    lag_state = IncrementalLagFeatures.from_history(
+        df=df,
+        forecast_start_date=forecast_start_date
+    )
+
+    forecasts = []
+
+    for d in forecast_dates:
+
+        if d not in row_by_date.index:
+            print("Нет строки на дату", d)
+
+        row = row_by_date[d]
+
+        # ✅ лаги и rolling с учётом уже подставленных прогнозов
+        df_model.loc[row, LAG_FEATURE_COLUMNS] = list(lag_state.features().values())
+
+        X_test, _ = split_X_y(df_model.loc[[row]])
+
+        y_pred = predict_one_day(model, X_test)
+
+        forecasts.append({
+            "DDATE": d,
+            "FORECAST": y_pred
+        })
+
+        # прогноз подставляется как факт
+        lag_state.append(y_pred)
+
+    forecast_df = pd.DataFrame(forecasts)
+
+    return forecast_df
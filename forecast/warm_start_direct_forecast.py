@@ -0,0 +1,224 @@
+# forecast/warm_start_direct_forecast.py
+"""
+    Warm start: direct-модели (CatBoost / LightGBM / XGBoost) по цепочке дат бэктеста.
+
+    Соседние BACKTEST_DATES (например 10-01, 10-10, 10-20) при одном окне обучения делят
+    большую часть train-окна, а *_DIRECT на каждой дате обучает модель с нуля (800 / 500 деревьев).
+
+    Здесь по каждой связке и окну даты идут по порядку:
+    - первая дата, каждая full_refit_every-я дата и дата, чьё окно не пересекается
+      с окном предыдущей модели -> полное обучение (та же модель, что у *_DIRECT)
+    - остальные -> дообучение предыдущей модели: добавляется warm_iterations деревьев
+      (CatBoost / LightGBM init_model, XGBoost xgb_model) на train-окне новой даты
+
+    Цепочка ячейки - все даты chain_dates (BACKTEST_DATES прогона) раньше её даты и сама дата,
+    независимо от того, какие ячейки считаются в этом вызове: racing-раунд с частью дат,
+    промах кэша на последней дате и полная сетка дают ячейке один и тот же прогноз.
+    Эти более ранние даты входят в ключ ячейки в кэше бэктеста (backtest_cell_key).
+
+    Дообучение идёт на всём текущем окне, а не только на добавленных днях: 10 новых строк
+    при деревьях глубины 5-6 модель просто запоминает, на окне новые деревья исправляют
+    остатки старой модели с учётом свежих дней.
+
+    В прогнозе ячейки кроме [DDATE, FORECAST] есть FIT_MODE (FULL / WARM) и FIT_SECONDS —
+    бэктест пишет их в отчёт (<MODEL>_FIT_MODE, <MODEL>_FIT_SECONDS) для сравнения точности и скорости.
+"""
+
+import time
+
+import pandas as pd
+
+from data.series_store import SeriesStore
+from features.series_dataset import get_series_dataset
+from forecast.models_registry import warm_start_chain_before
+from models.artifact_store import train_or_load
+from models.catboost_model import train_catboost, continue_catboost, CATBOOST_PARAMS
+from models.light_gbm import train_lightgbm, continue_lightgbm, LIGHTGBM_PARAMS
+from models.xgboost_model import train_xgboost, continue_xgboost, XGBOOST_PARAMS
+
+# ========= Параметры warm start (входят в ключ кэша бэктеста) ====================
+WARM_START_PARAMS = dict(
+    # сколько деревьев добавляет дообучение
+    warm_iterations=100,
+    # полное обучение на каждой N-й дате цепочки (1 = всегда полное, как *_DIRECT)
+    full_refit_every=3
+)
+
+FIT_MODE_FULL = "FULL"
+FIT_MODE_WARM = "WARM"
+
+# имя модели в хранилище (как у *_DIRECT), обучение, дообучение, гиперпараметры
+WARM_START_MODELS = {
+    "CATBOOST": (train_catboost, continue_catboost, CATBOOST_PARAMS),
+    "LIGHTGBM": (train_lightgbm, continue_lightgbm, LIGHTGBM_PARAMS),
+    "XGBOOST": (train_xgboost, continue_xgboost, XGBOOST_PARAMS),
+}
+
+
+def warm_start_direct_chain(
+        df: pd.DataFrame,
+        forecast_start_dates: list[pd.Timestamp],
+        train_window_days: int,
+        model_name: str,
+        full_sign: str | None = None,
+        metric_name: str | None = None,
+        params: dict | None = None
+) -> dict[pd.Timestamp, pd.DataFrame]:
+    """
+        Direct-прогнозы одной связки по цепочке дат с дообучением между датами.
+
+        :param df: ряд одной связки
+        :param forecast_start_dates: даты старта (идут по возрастанию)
+        :param model_name: CATBOOST / LIGHTGBM / XGBOOST
+        :return: {дата старта: DataFrame [DDATE, FORECAST, FIT_MODE, FIT_SECONDS]}
+    """
+
+    params = params or WARM_START_PARAMS
+    train_func, continue_func, hyperparams = WARM_START_MODELS[model_name]
+
+    # ✅ лаги один раз на ряд (общие для всех окон цепочки и для *_DIRECT)
+    dataset = get_series_dataset(df)
+
+    forecasts = {}
+
+    model = None
+    previous_start = None
+    steps_since_refit = 0
+
+    for start_date in sorted(pd.Timestamp(date) for date in forecast_start_dates):
+
+        end_date = start_date + pd.offsets.MonthEnd(0)
+
+        X_train, y_train = dataset.train_data(start_date, train_window_days)
+        future_dates, X_future = dataset.future_data(start_date, end_date)
+
+        # окно новой даты не пересекается с окном предыдущей модели -> дообучать не на чем
+        windows_overlap = (
+            previous_start is not None and
+            (start_date - previous_start).days < train_window_days
+        )
+
+        full_refit = (
+            model is None or
+            not windows_overlap or
+            steps_since_refit + 1 >= params["full_refit_every"]
+        )
+
+        fit_started = time.perf_counter()
+
+        if full_refit:
+            model = train_or_load(
+                model_name=model_name,
+                train_func=train_func,
+                X_train=X_train,
+                y_train=y_train,
+                hyperparams=hyperparams,
+                train_window_days=train_window_days,
+                train_end=start_date - pd.Timedelta(days=1),
+                full_sign=full_sign,
+                metric_name=metric_name
+            )
+            steps_since_refit = 0
+
+        else:
+            model = continue_func(model, X_train, y_train, params["warm_iterations"])
+            steps_since_refit += 1
+
+        fit_seconds = time.perf_counter() - fit_started
+
+        forecasts[start_date] = pd.DataFrame({
+            "DDATE": future_dates,
+            "FORECAST": model.predict(X_future),
+            "FIT_MODE": FIT_MODE_FULL if full_refit else FIT_MODE_WARM,
+            "FIT_SECONDS": round(fit_seconds, 3)
+        })
+
+        previous_start = start_date
+
+    return forecasts
+
+
+def warm_start_direct_cells(
+        df: pd.DataFrame | SeriesStore,
+        cells: list[tuple],
+        model_name: str,
+        chain_dates: list[pd.Timestamp] | None = None
+) -> dict[tuple, pd.DataFrame]:
+    """
+        Прогнозы для ячеек сетки бэктеста: цепочка дат на (окно, связка).
+
+        :param cells: [(окно, канал, метрика, дата старта)]
+        :param chain_dates: все даты цепочки (BACKTEST_DATES прогона); прогноз ячейки - по цепочке
+                            из более ранних chain_dates и её даты (None - каждая ячейка обучается полностью)
+        :return: {ячейка: DataFrame [DDATE, FORECAST, FIT_MODE, FIT_SECONDS]}
+    """
+
+    series_store = SeriesStore.from_df(df)
+    chain_set = {pd.Timestamp(date) for date in chain_dates or []}
+
+    cells_by_chain = {}
+
+    for cell in cells:
+        train_window, full_sign, metric, start_date = cell
+        cells_by_chain.setdefault((train_window, full_sign, metric), []).append(cell)
+
+    forecasts = {}
+
+    for (train_window, full_sign, metric), chain_cells in cells_by_chain.items():
+
+        cell_dates = sorted({pd.Timestamp(cell[3]) for cell in chain_cells})
+
+        # одна цепочка на все ячейки связки, если их даты (кроме последней) - даты chain_dates,
+        # иначе до ячейки в цепочке оказались бы чужие даты - тогда цепочка на каждую дату
+        if all(date in chain_set for date in cell_dates[:-1]):
+            runs = [cell_dates]
+        else:
+            runs = [[date] for date in cell_dates]
+
+        chain_forecasts = {}
+
+        for run_dates in runs:
+            chain_forecasts.update(
+                warm_start_direct_chain(
+                    df=series_store.get(full_sign, metric),
+                    forecast_start_dates=sorted(
+                        set(warm_start_chain_before(chain_dates, run_dates[-1])) | set(run_dates)
+                    ),
+                    train_window_days=train_window,
+                    model_name=model_name,
+                    full_sign=full_sign,
+                    metric_name=metric
+                )
+            )
+
+        for cell in chain_cells:
+            forecasts[cell] = chain_forecasts[pd.Timestamp(cell[3])]
+
+    return forecasts
+
+
+def warm_start_direct_forecast(
+        df: pd.DataFrame,
+        forecast_start_date: pd.Timestamp,
+        forecast_end_date: pd.Timestamp,
+        train_window_days: int,
+        model_name: str,
+        full_sign: str | None = None,
+        metric_name: str | None = None,
+        chain_dates: list[pd.Timestamp] | None = None
+) -> pd.DataFrame:
+    """
+        Одна дата. Без chain_dates (прогноз по policy) цепочки нет, модель обучается полностью, как *_DIRECT;
+        с chain_dates (ячейка бэктеста) - цепочка по более ранним chain_dates, как в warm_start_direct_cells.
+    """
+
+    forecast_df = warm_start_direct_chain(
+        df=df,
+        forecast_start_dates=[*warm_start_chain_before(chain_dates, forecast_start_date), forecast_start_date],
+        train_window_days=train_window_days,
+        model_name=model_name,
+        full_sign=full_sign,
+        metric_name=metric_name
+    )[pd.Timestamp(forecast_start_date)]
+
+    return forecast_df[forecast_df["DDATE"] <= forecast_end_date].reset_index(drop=True)
@@ -1,9 +1,9 @@
 # forecast/xgboost_forecast_direct_month.py
 import pandas as pd
 
-from features.lag_features import add_lags_means_for_model
-from evaluation.backtest import split_train_and_test_data, split_X_y
-from models.xgboost_model import train_xgboost
+from features.series_dataset import get_series_dataset
+from models.xgboost_model import train_xgboost, XGBOOST_PARAMS
+from models.artifact_store import train_or_load
 
 # =========== ИСПРАВИТЬ НЕВЕРНО СТРОИТ ==================
 
@@ -12,7 +12,9 @@ def xgboost_forecast_direct_to_month_end(
     df: pd.DataFrame,
     forecast_start_date: pd.Timestamp,
     forecast_end_date: pd.Timestamp,
-    train_window_days: int
+    train_window_days: int,
+    full_sign: str | None = None,
+    metric_name: str | None = None
 ) -> pd.DataFrame:
     """
     Direct Forecast через XGBoost.
@@ -26,37 +28,37 @@ def xgboost_forecast_direct_to_month_end(
         [DDATE, FORECAST]
     """
 
-    df = df.sort_values("DDATE").copy()
-
-    # ✅ создаём лаги
-    df_model = add_lags_means_for_model(df)
+    # ✅ лаги ряда (один раз на связку; ряд сортируется внутри add_lags_means_for_model)
+    dataset = get_series_dataset(df)
 
     # =====================================================
     # ✅ 2) Train window
     # =====================================================
-    train_df = df_model[
-        df_model["DDATE"] < forecast_start_date
-        ].tail(train_window_days)
+    X_train, y_train = dataset.train_data(forecast_start_date, train_window_days)
 
     # =====================================================
     # ✅ 3) Будущий горизонт (все даты месяца)
     # =====================================================
-    test_df = df_model[
-        (df_model["DDATE"] >= forecast_start_date) &
-        (df_model["DDATE"] <= forecast_end_date)
-        ].copy()
-
-    X_train, y_train = split_X_y(train_df)
-    X_test, _ = split_X_y(test_df)
-
-    # ✅ обучаем XGB
-    model = train_xgboost(X_train, y_train)
+    test_dates, X_test = dataset.future_data(forecast_start_date, forecast_end_date)
+
+    # ✅ обучаем XGB (или готовая модель из хранилища)
+    model = train_or_load(
+        model_name="XGBOOST",
+        train_func=train_xgboost,
+        X_train=X_train,
+        y_train=y_train,
+        hyperparams=XGBOOST_PARAMS,
+        train_window_days=train_window_days,
+        train_end=forecast_start_date - pd.Timedelta(days=1),
+        full_sign=full_sign,
+        metric_name=metric_name
+    )
 
     # ✅ прогноз сразу на весь месяц
     y_pred = model.predict(X_test)
 
     forecast_df = pd.DataFrame({
-        "DDATE": test_df["DDATE"].values,
+        "DDATE": test_dates,
         "FORECAST": y_pred
     })
 
@@ -1,34 +1,58 @@
-import itertools
-import pandas as pd
 from config.setting import (
     MODELS_TO_RUN,
     TRAIN_WINDOWS,
     BACKTEST_DATES,
+    SELECTION_MODE,
+    RACING_FIRST_DATES,
+    RACING_DROP_FRACTION,
+    BACKTEST_N_WORKERS,
+    MODEL_THREADS_PER_WORKER,
+    PLOT_N_WORKERS,
+    PLOT_SKIP_UNCHANGED,
+    POLICY_FORECAST_N_WORKERS,
+    POLICY_FORECAST_ROW_TIMEOUT,
+    POLICY_FORECAST_FALLBACK_MODEL,
+    BACKTEST_CACHE_FILE,
+    MODEL_ARTIFACT_DIR,
+    MODEL_ARTIFACT_MAX_MB,
+    EARLY_STOPPING_VALIDATION_DAYS,
+    EARLY_STOPPING_REUSE_ITERATIONS,
     START_FORECAST_DATE,
     MAX_HISTORY_DAYS,
     KP_DISTR_PAIRS,
     TD_PAIRS,
     METRICS,
+    CLICKHOUSE_BULK_LOAD,
+    DATA_SOURCE,
+    DATA_SOURCE_PATH,
+    FACT_CACHE_DIR,
+    FACT_CACHE_RECHECK_DAYS,
+    FACT_CACHE_FORCE_REFRESH,
+    FACT_CACHE_OFFLINE,
     POLICY_FILE,
+    POLICY_JSON_FILE,
     EXCEL_REPORT_FILE
 )
 
-from forecast.policy_month_forecast import run_policy_current_month_forecast
+from forecast.policy_month_forecast import run_policy_current_month_forecast, load_latest_policy_for_forecast
 
-from data.clickhouse import create_clickhouse_connect
+from data.sources import create_fact_source
 
-from data.load_raw_fact_data import load_and_prepare_long_df, long_to_wide_forecast
+from data.series_store import SeriesStore
+
+from data.load_raw_fact_data import load_and_prepare_long_df
 
 from data.calendar_days import HOLIDAYS
 
 from features.calendar_features import add_calendar_features
 
-from utils.printers import print_month_metrics
-
 from utils.pandas_setting import setup_pandas_display
 
-from evaluation.backtests_models_few_periods import run_monthly_backtests
+from evaluation.racing_selection import run_model_selection
+from models.artifact_store import configure_artifact_store
+from models.early_stopping import configure_early_stopping
 from evaluation.summary_report_metrics import export_report_excel_n_dump_policy
+from evaluation.policy_store import migrate_policy_json
 
 from plots_tables.policy_plots_backtests import plot_policy_backtests
 
@@ -61,24 +85,44 @@ def main():
     """
 
 
-    # ✅ накопители для итогового отчета
-    all_results = []
-
     # --------------------------------------------------
     # 1. Настройка вывода в консоль данных датафрейма (форматы и отображение)
     # --------------------------------------------------
     setup_pandas_display()
 
+    # ✅ хранилище обученных моделей (общее для бэктеста, прогноза по policy и графиков)
+    configure_artifact_store(
+        root_dir=MODEL_ARTIFACT_DIR,
+        max_mb=MODEL_ARTIFACT_MAX_MB
+    )
+
+    # ✅ ранняя остановка бустингов на хвосте train-окна
+    configure_early_stopping(
+        validation_days=EARLY_STOPPING_VALIDATION_DAYS,
+        reuse_iterations=EARLY_STOPPING_REUSE_ITERATIONS
+    )
+
+    # ✅ старый policy JSON -> хранилище policy (один раз)
+    migrate_policy_json(POLICY_FILE, POLICY_JSON_FILE)
+
     # --------------------------------------------------
     # 2. Загрузка факта из клика по каждой связке канал + метрика
     # И подготовка одного общего длинного датафрейма
     # --------------------------------------------------
     long_df = load_and_prepare_long_df(
-        client=create_clickhouse_connect(),
+        source=create_fact_source(
+            kind=DATA_SOURCE,
+            path=DATA_SOURCE_PATH,
+            bulk=CLICKHOUSE_BULK_LOAD
+        ),
         subspecies_kp=KP_DISTR_PAIRS,
         subspecies_td=TD_PAIRS,
         start_date=START_FORECAST_DATE,
-        count_hist_dates=MAX_HISTORY_DAYS
+        count_hist_dates=MAX_HISTORY_DAYS,
+        cache_dir=FACT_CACHE_DIR,
+        recheck_days=FACT_CACHE_RECHECK_DAYS,
+        force_refresh=FACT_CACHE_FORCE_REFRESH,
+        offline=FACT_CACHE_OFFLINE
     )
 
     # --------------------------------------------------------------------------------
@@ -93,6 +137,9 @@ def main():
     # --------------------------------------------------
     # 4. Перебор каналов и метрик
     # --------------------------------------------------
+    # ✅ ряды связок (канал × метрика) раскладываются один раз на все этапы
+    series_store = SeriesStore(df_w_features)
+
     full_signs = (
         df_w_features["FULL_SIGN"]
         .dropna()
@@ -101,44 +148,23 @@ def main():
     )
 
     # =========================================================
-    # ✅ главный цикл: канал × метрика × окно
+    # ✅ главный цикл: окно × канал × метрика × дата (ячейки считаются на пуле процессов),
+    # при SELECTION_MODE = "racing" - только кандидаты, не выбывшие после первых дат
     # =========================================================
-
-    for train_window in TRAIN_WINDOWS:
-        print(f"\n===============================")
-        print(f"✅ TRAIN WINDOW = {train_window} days")
-        print(f"===============================\n")
-
-        for full_sign, metric in itertools.product(full_signs, METRICS):
-
-            print(f"\n📌 Тестируем: {full_sign} | {metric}")
-
-            # ---- рабочий df по связке ----
-            work_df = df_w_features[
-                (df_w_features["FULL_SIGN"] == full_sign) &
-                (df_w_features["METRIC_NAME"] == metric)
-                ].copy()
-
-            # ---- прогоняем backtests ----
-            results_df = run_monthly_backtests(
-                df=work_df,
-                full_sign=full_sign,
-                metric_name=metric,
-                forecast_backtest_dates=BACKTEST_DATES,
-                train_window_days=train_window,
-                models_to_run=MODELS_TO_RUN
-            )
-
-            results_df["TRAIN_WINDOW_DAYS"] = train_window
-            results_df["FULL_SIGN"] = full_sign
-            results_df["METRIC_NAME"] = metric
-
-            all_results.append(results_df)
-
-    # =========================================================
-    # ✅ Финальный отчёт
-    # =========================================================
-    final_report = pd.concat(all_results, ignore_index=True)
+    final_report = run_model_selection(
+        selection_mode=SELECTION_MODE,
+        first_dates=RACING_FIRST_DATES,
+        drop_fraction=RACING_DROP_FRACTION,
+        df=series_store,
+        full_signs=full_signs,
+        metrics=METRICS,
+        train_windows=TRAIN_WINDOWS,
+        backtest_dates=BACKTEST_DATES,
+        models_to_run=MODELS_TO_RUN,
+        n_workers=BACKTEST_N_WORKERS,
+        threads_per_worker=MODEL_THREADS_PER_WORKER,
+        cache_file=BACKTEST_CACHE_FILE
+    )
 
     print("\n✅ Итоговый отчёт:")
     print(final_report)
@@ -150,19 +176,31 @@ def main():
         report_df=final_report,
         models_list=MODELS_TO_RUN,
         file_policy=POLICY_FILE,
-        filename_for_report=EXCEL_REPORT_FILE
+        filename_for_report=EXCEL_REPORT_FILE,
+        forecast_store_file=BACKTEST_CACHE_FILE,
+        df=series_store
     )
 
-    run_policy_current_month_forecast(
-        df=df_w_features,
+    _, forecast_models = run_policy_current_month_forecast(
+        df=series_store,
         policy_file=POLICY_FILE,
-        forecast_start_date=START_FORECAST_DATE
+        forecast_start_date=START_FORECAST_DATE,
+        n_workers=POLICY_FORECAST_N_WORKERS,
+        threads_per_worker=MODEL_THREADS_PER_WORKER,
+        row_timeout=POLICY_FORECAST_ROW_TIMEOUT,
+        fallback_model=POLICY_FORECAST_FALLBACK_MODEL
     )
 
+    # какая модель фактически посчитала каждую связку (fallback вместо модели policy)
+    print(forecast_models)
+
     plot_policy_backtests(
-        df=df_w_features,
-        policy_df=pd.read_json(POLICY_FILE),
-        backtest_dates=BACKTEST_DATES
+        df=series_store,
+        policy_df=load_latest_policy_for_forecast(POLICY_FILE),
+        backtest_dates=BACKTEST_DATES,
+        forecast_store_file=BACKTEST_CACHE_FILE,
+        n_workers=PLOT_N_WORKERS,
+        skip_unchanged=PLOT_SKIP_UNCHANGED
     )
 
 if __name__ == '__main__':
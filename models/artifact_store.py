@@ -0,0 +1,331 @@
+# models/artifact_store.py
+"""
+    Хранилище обученных моделей на локальном диске.
+
+    Одна запись = одна обученная модель (CatBoost / LightGBM / XGBoost / RandomForest / statsmodels),
+    сериализованная pickle. Ключ записи — хэш от:
+        - связки (FULL_SIGN, METRIC_NAME)
+        - модели (имя трейнера: одна и та же обученная модель переиспользуется
+          разными ключами реестра, если у них совпадают данные обучения)
+        - окна обучения и последнего дня обучения
+        - гиперпараметров
+        - хэша обучающих данных (X, y) и версии кода моделей/фичей
+
+    Зачем:
+    - графики policy и прогноз текущего месяца не переобучают модели,
+      которые уже обучались на тех же данных в бэктесте или прошлом запуске
+
+    Размер ограничен: при превышении удаляются записи, к которым дольше всего не обращались (LRU по mtime).
+    Размер каталога процесс ведёт сам (сумма своих записей), полный обход каталога — только когда
+    эта оценка превысила лимит или раз в _RESCAN_EVERY_PUTS записей (записи других процессов пула).
+
+    Модели рекурсивных прогнозов по дням (CATBOOST_RECURSIVE, LIGHTGBM_RECURSIVE) в хранилище не попадают:
+    со второго дня они обучаются на подставленных прогнозах и повторно не используются.
+
+    Активное хранилище задаётся configure_artifact_store (main) и передаётся
+    процессам пула через переменные окружения, как ограничение потоков в models/threads.py.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+
+import pandas as pd
+
+from evaluation.backtest_cache import compute_code_version
+from models.early_stopping import early_stopping_signature, fit_series
+
+ARTIFACT_STORE_VERSION = 1
+
+_ENV_DIR = "FORECAST_MODEL_ARTIFACT_DIR"
+_ENV_MAX_MB = "FORECAST_MODEL_ARTIFACT_MAX_MB"
+
+_ACTIVE_STORE = None
+
+# раз в сколько записей пересчитывать размер каталога обходом (его пополняют и другие процессы)
+_RESCAN_EVERY_PUTS = 256
+
+# вытеснение до этой доли лимита: следующий обход не нужен сразу после вытеснения
+_EVICT_TO_FRACTION = 0.9
+
+
+def hash_training_data(X_train, y_train) -> str:
+    """
+        Хэш обучающих данных: значения и названия колонок X (если есть) и y (ряд или таблица таргетов).
+    """
+
+    digest = hashlib.sha256()
+
+    if X_train is not None:
+        digest.update(pd.util.hash_pandas_object(X_train, index=False).values.tobytes())
+        digest.update(",".join(map(str, X_train.columns)).encode())
+
+    # несколько таргетов (multi-target) -> DataFrame, иначе ряд
+    if isinstance(y_train, pd.DataFrame):
+        y = y_train.reset_index(drop=True)
+        digest.update(",".join(map(str, y.columns)).encode())
+    else:
+        y = pd.Series(y_train).reset_index(drop=True)
+
+    digest.update(pd.util.hash_pandas_object(y, index=False).values.tobytes())
+
+    return digest.hexdigest()
+
+
+def make_artifact_key(
+        model_name: str,
+        hyperparams: dict,
+        train_window_days: int,
+        train_end: pd.Timestamp,
+        data_hash: str,
+        full_sign: str | None = None,
+        metric_name: str | None = None
+) -> str:
+    """
+        Ключ обученной модели (content-addressed).
+    """
+
+    payload = json.dumps(
+        {
+            "version": ARTIFACT_STORE_VERSION,
+            "series": [full_sign, metric_name],
+            "model": model_name,
+            "window": int(train_window_days),
+            "train_end": str(pd.Timestamp(train_end).date()),
+            "params": hyperparams,
+            "data": data_hash,
+            "code": compute_code_version(),
+        },
+        sort_keys=True,
+        default=str
+    )
+
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ModelArtifactStore:
+    """
+        Каталог с pickle-файлами обученных моделей и LRU-вытеснением по размеру.
+
+        Запись атомарная (временный файл + os.replace), поэтому каталог
+        можно использовать из нескольких процессов параллельного бэктеста.
+    """
+
+    def __init__(self, root_dir: str, max_mb: float = 2048):
+        """
+            :param root_dir: каталог хранилища
+            :param max_mb: максимальный размер хранилища (МБ)
+        """
+
+        self.root_dir = root_dir
+        self.max_bytes = int(max_mb * 1024 * 1024)
+
+        # оценка размера каталога (None - ещё не обходили) и записей с последнего обхода
+        self._total_bytes = None
+        self._puts_since_scan = 0
+
+        os.makedirs(root_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root_dir, key[:2], f"{key}.pkl")
+
+    def get(self, key: str):
+        """
+            :return: обученная модель или None, если её нет в хранилище
+        """
+
+        path = self._path(key)
+
+        try:
+            with open(path, "rb") as f:
+                model = pickle.load(f)
+
+        # файла нет / вытеснен другим процессом — модель просто обучится заново
+        except FileNotFoundError:
+            return None
+
+        # битый файл / модель другой версии библиотеки (AttributeError, ImportError, ValueError, ...) —
+        # тоже промах: запись удаляется, модель обучится и сохранится заново
+        except Exception:
+            self._remove(path)
+            return None
+
+        # обращение к записи продлевает её жизнь в LRU
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+
+        return model
+
+    def _remove(self, path: str):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except FileNotFoundError:
+            return
+
+        if self._total_bytes is not None:
+            self._total_bytes = max(self._total_bytes - size, 0)
+
+    def put(self, key: str, model):
+        """
+            Сохраняет модель и вытесняет старые записи, если превышен размер.
+        """
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+
+        with open(tmp_path, "wb") as f:
+            pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        new_size = os.path.getsize(tmp_path)
+
+        try:
+            old_size = os.path.getsize(path)
+        except FileNotFoundError:
+            old_size = 0
+
+        os.replace(tmp_path, path)
+
+        if self._total_bytes is None:
+            self.evict()
+            return
+
+        self._total_bytes += new_size - old_size
+        self._puts_since_scan += 1
+
+        if self._total_bytes > self.max_bytes or self._puts_since_scan >= _RESCAN_EVERY_PUTS:
+            self.evict()
+
+    def evict(self):
+        """
+            Обходит каталог и, если размер больше max_bytes, удаляет самые давно использованные записи
+            (до _EVICT_TO_FRACTION лимита).
+        """
+
+        entries = []
+
+        for dir_path, _, file_names in os.walk(self.root_dir):
+            for file_name in file_names:
+                if not file_name.endswith(".pkl"):
+                    continue
+
+                path = os.path.join(dir_path, file_name)
+
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_bytes = sum(size for _, size, _ in entries)
+
+        target_bytes = self.max_bytes if total_bytes <= self.max_bytes else self.max_bytes * _EVICT_TO_FRACTION
+
+        for _, size, path in sorted(entries):
+
+            if total_bytes <= target_bytes:
+                break
+
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+            total_bytes -= size
+
+        self._total_bytes = total_bytes
+        self._puts_since_scan = 0
+
+
+def configure_artifact_store(root_dir: str | None, max_mb: float = 2048):
+    """
+        Включает хранилище моделей для текущего процесса и процессов пула (None = выключить).
+    """
+
+    global _ACTIVE_STORE
+
+    if root_dir is None:
+        _ACTIVE_STORE = None
+        os.environ.pop(_ENV_DIR, None)
+        os.environ.pop(_ENV_MAX_MB, None)
+        return
+
+    _ACTIVE_STORE = ModelArtifactStore(root_dir, max_mb)
+
+    os.environ[_ENV_DIR] = root_dir
+    os.environ[_ENV_MAX_MB] = str(max_mb)
+
+
+def get_artifact_store() -> ModelArtifactStore | None:
+    """
+        Активное хранилище моделей (None = модели всегда обучаются заново).
+    """
+
+    global _ACTIVE_STORE
+
+    # процесс пула (spawn): настройки пришли через переменные окружения
+    if _ACTIVE_STORE is None and os.environ.get(_ENV_DIR):
+        _ACTIVE_STORE = ModelArtifactStore(
+            os.environ[_ENV_DIR],
+            float(os.environ.get(_ENV_MAX_MB, 2048))
+        )
+
+    return _ACTIVE_STORE
+
+
+def train_or_load(
+        model_name: str,
+        train_func,
+        X_train,
+        y_train,
+        hyperparams: dict,
+        train_window_days: int,
+        train_end: pd.Timestamp,
+        full_sign: str | None = None,
+        metric_name: str | None = None,
+        use_store: bool = True
+):
+    """
+        Обученная модель из хранилища, а если её там нет — обучает train_func(X_train, y_train) и сохраняет.
+
+        :param model_name: имя модели в ключе (одинаковое у всех прогнозов на одном трейнере)
+        :param train_func: функция обучения (X_train, y_train) -> model
+        :param X_train: признаки (None для моделей только по ряду, например statsmodels)
+        :param train_end: последний день обучения
+        :param use_store: False - только обучение (модели, которые не переиспользуются: рекурсия по дням)
+        :return: обученная модель
+    """
+
+    store = get_artifact_store() if use_store else None
+
+    # связка для запомненного числа итераций ранней остановки (models/early_stopping.py)
+    series = fit_series(model_name, full_sign, metric_name, train_window_days)
+
+    if store is None:
+        with series:
+            return train_func(X_train, y_train)
+
+    key = make_artifact_key(
+        model_name=model_name,
+        hyperparams={**hyperparams, **early_stopping_signature()},
+        train_window_days=train_window_days,
+        train_end=train_end,
+        data_hash=hash_training_data(X_train, y_train),
+        full_sign=full_sign,
+        metric_name=metric_name
+    )
+
+    model = store.get(key)
+
+    if model is None:
+        with series:
+            model = train_func(X_train, y_train)
+        store.put(key, model)
+
+    return model
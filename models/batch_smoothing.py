@@ -0,0 +1,358 @@
+# models/batch_smoothing.py
+"""
+    Векторизованное экспоненциальное сглаживание сразу для многих рядов (только NumPy).
+
+    Модели (аддитивные, без затухания тренда — как SimpleExpSmoothing / Holt /
+    ExponentialSmoothing(trend="add", seasonal="add") в statsmodels):
+
+        SES:           l_t = α·(y_t - s_{t-m}) + (1-α)·(l_{t-1} + b_{t-1})
+        HOLT:          + тренд        b_t = β·(l_t - l_{t-1}) + (1-β)·b_{t-1}
+        HOLT_WINTERS:  + сезонность   s_t = γ·(y_t - l_{t-1} - b_{t-1}) + (1-γ)·s_{t-m},  m = 7
+
+    Вместо scipy-оптимизатора на каждый ряд:
+        1) грубая сетка (α, β, γ) — все ряды × все комбинации одним проходом по дням
+        2) несколько шагов локального уточнения вокруг лучшей точки каждого ряда (шаг делится пополам)
+
+    При фиксированных (α, β, γ) ошибки прогноза на шаг вперёд линейно зависят от начальных
+    состояний (l_0, b_0, s_0), поэтому начало находится точно (МНК): рекурсия отдельно прогоняется
+    для ряда с нулевым началом и для единичных начальных состояний (последнее от ряда не зависит —
+    на общей сетке считается один раз на комбинацию параметров).
+    Критерий — сумма квадратов ошибок на шаг вперёд (как initialization_method="estimated" в statsmodels).
+
+    Отличие от statsmodels: на горизонтах h = 7, 14, ... statsmodels берёт сезонность на период старше,
+    здесь — последнюю оценённую (классическая формула Holt-Winters).
+
+    Вход: матрица Y (ряды × дни) одинаковой длины, без пропусков, не короче min_series_length.
+"""
+
+import itertools
+
+import numpy as np
+
+SES = "SES"
+HOLT = "HOLT"
+HOLT_WINTERS = "HOLT_WINTERS"
+
+SEASONAL_PERIOD = 7
+
+# ========= Параметры перебора (входят в ключ кэша бэктеста) ====================
+BATCH_SMOOTHING_PARAMS = dict(
+    alpha_grid=[0.02, 0.1, 0.2, 0.35, 0.5, 0.7, 0.9],
+    beta_grid=[0.001, 0.01, 0.05, 0.15, 0.3],
+    gamma_grid=[0.001, 0.05, 0.15, 0.35],
+    refine_steps=5,
+    bounds=(0.0001, 0.9999),
+    seasonal_periods=SEASONAL_PERIOD,
+    chunk_series=128
+)
+
+# какие параметры подбираются у каждой модели
+_PARAM_NAMES = {
+    SES: ["alpha"],
+    HOLT: ["alpha", "beta"],
+    HOLT_WINTERS: ["alpha", "beta", "gamma"],
+}
+
+
+def min_series_length(method: str, period: int = SEASONAL_PERIOD) -> int:
+    """
+        Минимальная длина ряда: наблюдений должно быть больше, чем оцениваемых начальных состояний.
+    """
+
+    return {SES: 2, HOLT: 3, HOLT_WINTERS: 2 * period}[method]
+
+
+def _initial_basis(method: str, period: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+        Единичные начальные состояния (по одному на оцениваемый параметр начала).
+
+        Сезонность — m-1 векторов с нулевой суммой (уровень и средняя сезонность неразличимы).
+
+        :return: level (k,), trend (k,), season (k, period)
+    """
+
+    has_trend = method in (HOLT, HOLT_WINTERS)
+    n_season = period - 1 if method == HOLT_WINTERS else 0
+
+    k = 1 + int(has_trend) + n_season
+
+    level = np.zeros(k)
+    trend = np.zeros(k)
+    season = np.zeros((k, period))
+
+    level[0] = 1.0
+
+    if has_trend:
+        trend[1] = 1.0
+
+    for j in range(n_season):
+        row = 1 + int(has_trend) + j
+        season[row] = -1.0 / period
+        season[row, j] += 1.0
+
+    return level, trend, season
+
+
+def _run_recursion(
+        level: np.ndarray,
+        trend: np.ndarray,
+        season: np.ndarray,
+        alpha,
+        beta,
+        gamma,
+        method: str,
+        n_obs: int,
+        period: int,
+        Y: np.ndarray | None = None
+):
+    """
+        Рекурсия сглаживания для произвольной формы состояний (...).
+
+        :param level, trend: (...) начальные состояния
+        :param season: (..., period) начальная сезонность
+        :param alpha, beta, gamma: параметры, совместимые по форме с level
+        :param Y: (n, T) ряды — прибавляются к состояниям формы (n, c); None = нулевой вход
+        :return: прогнозы на шаг вперёд (..., T) и конечные level, trend, season
+    """
+
+    has_trend = method in (HOLT, HOLT_WINTERS)
+    has_season = method == HOLT_WINTERS
+
+    season = season.copy()
+    predictions = np.empty(level.shape + (n_obs,))
+
+    for t in range(n_obs):
+
+        # кольцевой буфер: в слоте t % period лежит s_{t-period}
+        s_prev = season[..., t % period]
+
+        base = level + trend
+        predictions[..., t] = base + s_prev
+
+        y = 0.0 if Y is None else Y[:, t][:, None]
+
+        new_level = alpha * (y - s_prev) + (1 - alpha) * base
+
+        if has_trend:
+            trend = beta * (new_level - level) + (1 - beta) * trend
+
+        if has_season:
+            season[..., t % period] = gamma * (y - base) + (1 - gamma) * s_prev
+
+        level = new_level
+
+    return predictions, level, trend, season
+
+
+def run_smoothing(
+        Y: np.ndarray,
+        method: str,
+        alpha: np.ndarray,
+        beta: np.ndarray,
+        gamma: np.ndarray,
+        period: int = SEASONAL_PERIOD
+):
+    """
+        Сглаживание всех рядов при всех комбинациях параметров с МНК-оценкой начальных состояний.
+
+        Ошибка на шаг вперёд = error_0 - D · x0, где
+            error_0 - ошибка рекурсии по ряду с нулевым началом
+            D       - отклик прогноза на единичные начальные состояния (от ряда не зависит)
+
+        :param Y: (n, T) ряды
+        :param alpha, beta, gamma: (n, c) — свои комбинации у каждого ряда,
+                                   или (c,) — общая сетка (отклик D считается один раз на комбинацию)
+        :return: sse (n, c), level (n, c), trend (n, c), season (n, c, period) после последнего дня
+    """
+
+    n, T = Y.shape
+    shape = (n, alpha.shape[-1])
+
+    # ---- ряд с нулевым началом ----
+    prediction_0, level_0, trend_0, season_0 = _run_recursion(
+        np.zeros(shape), np.zeros(shape), np.zeros(shape + (period,)),
+        alpha, beta, gamma, method, T, period, Y=Y
+    )
+
+    error_0 = Y[:, None, :] - prediction_0
+
+    # ---- отклик на единичные начальные состояния: (..., k) ----
+    basis_level, basis_trend, basis_season = _initial_basis(method, period)
+    k = len(basis_level)
+
+    unit_shape = alpha.shape + (k,)
+
+    D, unit_level, unit_trend, unit_season = _run_recursion(
+        np.broadcast_to(basis_level, unit_shape).copy(),
+        np.broadcast_to(basis_trend, unit_shape).copy(),
+        np.broadcast_to(basis_season, unit_shape + (period,)).copy(),
+        alpha[..., None], beta[..., None], gamma[..., None],
+        method, T, period
+    )
+
+    # ---- нормальные уравнения МНК: gram · x0 = cross ----
+    gram = np.einsum("...kt,...lt->...kl", D, D)
+
+    if alpha.ndim == 1:
+        cross = np.einsum("nct,ckt->nck", error_0, D)
+    else:
+        cross = np.einsum("nct,nckt->nck", error_0, D)
+
+    ridge = 1e-10 * np.trace(gram, axis1=-2, axis2=-1)[..., None, None] + 1e-12
+    gram_inv = np.linalg.inv(gram + ridge * np.eye(k))
+
+    x0 = np.einsum("...kl,...l->...k", gram_inv, cross)
+
+    sse = np.maximum((error_0 * error_0).sum(axis=2) - (cross * x0).sum(axis=2), 0.0)
+
+    # ---- конечные состояния при лучшем начале ----
+    final_level = level_0 + (unit_level * x0).sum(axis=-1)
+    final_trend = trend_0 + (unit_trend * x0).sum(axis=-1)
+    final_season = season_0 + (unit_season * x0[..., None]).sum(axis=-2)
+
+    return sse, final_level, final_trend, final_season
+
+
+def _forecast_from_states(
+        level: np.ndarray,
+        trend: np.ndarray,
+        season: np.ndarray,
+        n_obs: int,
+        horizon: int,
+        method: str,
+        period: int = SEASONAL_PERIOD
+) -> np.ndarray:
+    """
+        Прогноз на horizon дней по конечным состояниям (n,) / (n, period).
+    """
+
+    steps = np.arange(1, horizon + 1)
+
+    forecast = level[:, None] + steps[None, :] * trend[:, None]
+
+    if method == HOLT_WINTERS:
+        forecast = forecast + season[:, (n_obs + steps - 1) % period]
+
+    return forecast
+
+
+def _candidate_grid(method: str, params: dict) -> np.ndarray:
+    """
+        Грубая сетка: (c, k) — c комбинаций по k параметрам модели.
+    """
+
+    grids = {
+        "alpha": params["alpha_grid"],
+        "beta": params["beta_grid"],
+        "gamma": params["gamma_grid"],
+    }
+
+    return np.array(list(itertools.product(*[grids[name] for name in _PARAM_NAMES[method]])))
+
+
+def _to_abg(candidates: np.ndarray, method: str):
+    """
+        (..., k) -> alpha, beta, gamma (...) (неиспользуемые = 0).
+    """
+
+    names = _PARAM_NAMES[method]
+    zeros = np.zeros(candidates.shape[:-1])
+
+    return tuple(
+        candidates[..., names.index(name)] if name in names else zeros
+        for name in ["alpha", "beta", "gamma"]
+    )
+
+
+def _fit_chunk(Y: np.ndarray, method: str, params: dict) -> np.ndarray:
+
+    n = Y.shape[0]
+    period = params["seasonal_periods"]
+    low, high = params["bounds"]
+
+    # ---- 1) грубая сетка (общая для всех рядов) ----
+    grid = _candidate_grid(method, params)
+
+    sse = run_smoothing(Y, method, *_to_abg(grid, method), period=period)[0]
+    best = grid[sse.argmin(axis=1)]
+
+    # ---- 2) локальное уточнение: соседи ±step по каждому параметру ----
+    offsets = np.array(list(itertools.product([-1.0, 0.0, 1.0], repeat=best.shape[1])))
+
+    step = 0.05
+
+    for _ in range(params["refine_steps"]):
+
+        candidates = np.clip(best[:, None, :] + step * offsets[None, :, :], low, high)
+
+        sse = run_smoothing(Y, method, *_to_abg(candidates, method), period=period)[0]
+        best = candidates[np.arange(n), sse.argmin(axis=1)]
+
+        step /= 2
+
+    return best
+
+
+def fit_smoothing_batch(
+        Y: np.ndarray,
+        method: str,
+        params: dict | None = None
+) -> np.ndarray:
+    """
+        Подбор параметров для всех рядов сразу (ряды обрабатываются пачками по chunk_series).
+
+        :param Y: (n, T) ряды одинаковой длины
+        :param method: SES / HOLT / HOLT_WINTERS
+        :return: (n, k) лучшие параметры (alpha[, beta[, gamma]])
+    """
+
+    params = params or BATCH_SMOOTHING_PARAMS
+
+    Y = np.asarray(Y, dtype=float)
+
+    min_length = min_series_length(method, params["seasonal_periods"])
+
+    if Y.shape[1] < min_length:
+        raise ValueError(f"{method}: нужно минимум {min_length} наблюдений, есть {Y.shape[1]}")
+
+    chunk = params["chunk_series"]
+
+    return np.concatenate([
+        _fit_chunk(Y[i:i + chunk], method, params)
+        for i in range(0, Y.shape[0], chunk)
+    ])
+
+
+def forecast_smoothing_batch(
+        Y: np.ndarray,
+        horizon: int,
+        method: str,
+        params: dict | None = None
+):
+    """
+        Подбор параметров + прогноз на horizon дней для всех рядов.
+
+        :param Y: (n, T) ряды одинаковой длины (история до даты прогноза)
+        :return: forecast (n, horizon), best_params (n, k)
+    """
+
+    params = params or BATCH_SMOOTHING_PARAMS
+    period = params["seasonal_periods"]
+
+    Y = np.asarray(Y, dtype=float)
+
+    best = fit_smoothing_batch(Y, method, params)
+
+    _, level, trend, season = run_smoothing(
+        Y, method, *_to_abg(best[:, None, :], method), period=period
+    )
+
+    forecast = _forecast_from_states(
+        level[:, 0], trend[:, 0], season[:, 0, :],
+        n_obs=Y.shape[1],
+        horizon=horizon,
+        method=method,
+        period=period
+    )
+
+    return forecast, best
@@ -1,7 +1,27 @@
 # models/catboost_model.py
 from catboost import CatBoostRegressor
 
+from models.threads import get_model_threads
+from models.early_stopping import fit_with_early_stopping
+
 # ========= Параметры модели CatBoost самые стандартные, пока на них тестирую ====================
+CATBOOST_PARAMS = dict(
+    iterations=800,
+    learning_rate=0.05,
+    depth=5,
+
+    loss_function="MAE",
+    l2_leaf_reg=20,
+
+    subsample=0.7,
+    random_strength=2,
+
+    early_stopping_rounds=50,
+
+    random_seed=42,
+    verbose=False
+)
+
 def train_catboost(X_train, y_train):
 
     # model = CatBoostRegressor(
@@ -13,25 +33,71 @@ def train_catboost(X_train, y_train):
     #     verbose=False
     # )
 
-    model = CatBoostRegressor(
-        iterations=800,
-        learning_rate=0.05,
-        depth=5,
+    # категориальные признаки задаются dtype category (глобальная модель: FULL_SIGN, METRIC_NAME)
+    cat_features = list(X_train.select_dtypes("category").columns) or None
+
+    def fit_full(X, y, n_iterations):
+        params = CATBOOST_PARAMS if n_iterations is None else {**CATBOOST_PARAMS, "iterations": n_iterations}
+
+        model = CatBoostRegressor(
+            **params,
+            thread_count=get_model_threads()
+        )
+
+        model.fit(X, y, cat_features=cat_features)
+
+        return model
 
-        loss_function="MAE",
-        l2_leaf_reg=20,
+    def fit_validated(X_fit, y_fit, X_val, y_val):
+        # early_stopping_rounds из CATBOOST_PARAMS работает только с eval_set
+        model = CatBoostRegressor(
+            **CATBOOST_PARAMS,
+            thread_count=get_model_threads()
+        )
 
-        subsample=0.7,
-        random_strength=2,
+        model.fit(X_fit, y_fit, cat_features=cat_features, eval_set=(X_val, y_val))
 
-        early_stopping_rounds=50,
+        return model.get_best_iteration() + 1
 
-        random_seed=42,
-        verbose=False
+    # ранняя остановка на хвосте окна (models/early_stopping.py), если включена
+    return fit_with_early_stopping(X_train, y_train, fit_full, fit_validated)
+
+
+# ========= Multi-target: все метрики канала одной моделью (MultiRMSE) ====================
+# Multi-target лосс в CatBoost только MultiRMSE; subsample требует явного Bernoulli-бутстрэпа
+# (по умолчанию у MultiRMSE Bayesian), early stopping без eval set не нужен; остальное как у CATBOOST_PARAMS
+CATBOOST_MULTI_TARGET_PARAMS = {
+    **{key: value for key, value in CATBOOST_PARAMS.items() if key != "early_stopping_rounds"},
+    "loss_function": "MultiRMSE",
+    "bootstrap_type": "Bernoulli",
+}
+
+def train_catboost_multi_target(X_train, Y_train):
+    """
+     Одна модель CatBoost на несколько таргетов сразу (Y_train - DataFrame, колонка на таргет).
+    """
+
+    model = CatBoostRegressor(
+        **CATBOOST_MULTI_TARGET_PARAMS,
+        thread_count=get_model_threads()
     )
 
-    model.fit(X_train, y_train)
+    model.fit(X_train, Y_train)
 
+    return model
+
+
+def continue_catboost(init_model, X_train, y_train, iterations: int):
+    """
+     Дообучение (warm start): к деревьям init_model добавляются iterations новых деревьев,
+     обученных на (X_train, y_train). Признаки те же, что у init_model.
+    """
+
+    model = CatBoostRegressor(
+        **{**CATBOOST_PARAMS, "iterations": iterations},
+        thread_count=get_model_threads()
+    )
 
+    model.fit(X_train, y_train, init_model=init_model)
 
-    return model
\ No newline at end of file
+    return model
@@ -0,0 +1,145 @@
+# models/early_stopping.py
+"""
+    Ранняя остановка бустинга (CatBoost / LightGBM / XGBoost) на хвосте train-окна.
+
+    Раньше train_catboost задавал early_stopping_rounds, но fit вызывался без eval set,
+    поэтому каждое обучение шло все 800 итераций; у LightGBM и XGBoost остановки не было вовсе.
+
+    При включённой остановке (validation_days) трейнер:
+        1) отрезает последние validation_days строк train-окна (ряд дневной и отсортирован по дате,
+           т.е. это последние дни - валидация идёт строго после обучения по времени)
+        2) обучает модель на остальном с eval set = хвост, останавливается через EARLY_STOPPING_ROUNDS
+           итераций без улучшения
+        3) переобучает модель на всём окне с найденным числом итераций
+
+    Найденное число итераций запоминается на (модель, связка, окно) в процессе (reuse_iterations):
+    следующие обучения той же связки (следующие даты бэктеста, графики, прогноз по policy)
+    шаги 1-2 пропускают и сразу обучаются на всём окне с этим числом итераций.
+    Результат тогда зависит от того, какая дата связки обучалась в процессе первой
+    (параллельный бэктест может немного отличаться от последовательного).
+
+    Связку трейнеру сообщает train_or_load (fit_series), настройки процессам пула
+    передаются через переменные окружения, как в models/threads.py и models/artifact_store.py.
+"""
+
+import os
+from contextlib import contextmanager
+
+# итераций без улучшения на валидации до остановки (LightGBM / XGBoost; у CatBoost - из CATBOOST_PARAMS)
+EARLY_STOPPING_ROUNDS = 50
+
+# обучающая часть должна быть хотя бы в столько раз длиннее валидации, иначе обычное обучение
+MIN_FIT_TO_VALIDATION_RATIO = 2
+
+_ENV_VALIDATION_DAYS = "FORECAST_EARLY_STOPPING_DAYS"
+_ENV_REUSE = "FORECAST_EARLY_STOPPING_REUSE"
+
+_VALIDATION_DAYS = None
+_REUSE_ITERATIONS = False
+
+# (модель, FULL_SIGN, METRIC_NAME, окно) -> число итераций
+_BEST_ITERATIONS = {}
+
+_ACTIVE_SERIES = None
+
+
+def configure_early_stopping(validation_days: int | None, reuse_iterations: bool = False):
+    """
+        Включает раннюю остановку для текущего процесса и процессов пула (None = выключить).
+
+        :param validation_days: сколько последних дней train-окна уходит в валидацию
+        :param reuse_iterations: переиспользовать найденное число итераций для следующих обучений связки
+    """
+
+    global _VALIDATION_DAYS, _REUSE_ITERATIONS
+
+    _VALIDATION_DAYS = validation_days
+    _REUSE_ITERATIONS = reuse_iterations
+
+    _BEST_ITERATIONS.clear()
+
+    if validation_days is None:
+        os.environ.pop(_ENV_VALIDATION_DAYS, None)
+        os.environ.pop(_ENV_REUSE, None)
+        return
+
+    os.environ[_ENV_VALIDATION_DAYS] = str(validation_days)
+    os.environ[_ENV_REUSE] = "1" if reuse_iterations else "0"
+
+
+def _settings() -> tuple[int | None, bool]:
+
+    # процесс пула (spawn): настройки пришли через переменные окружения
+    if _VALIDATION_DAYS is None and os.environ.get(_ENV_VALIDATION_DAYS):
+        return int(os.environ[_ENV_VALIDATION_DAYS]), os.environ.get(_ENV_REUSE, "0") == "1"
+
+    return _VALIDATION_DAYS, _REUSE_ITERATIONS
+
+
+def early_stopping_signature() -> dict:
+    """
+        Настройки остановки для ключей кэша (пусто, если выключена).
+    """
+
+    validation_days, reuse_iterations = _settings()
+
+    if validation_days is None:
+        return {}
+
+    return {
+        "early_stopping_days": validation_days,
+        "early_stopping_rounds": EARLY_STOPPING_ROUNDS,
+        "early_stopping_reuse": reuse_iterations
+    }
+
+
+@contextmanager
+def fit_series(model_name: str, full_sign, metric_name, train_window_days):
+    """
+        Связка текущего обучения (ключ запомненного числа итераций).
+    """
+
+    global _ACTIVE_SERIES
+
+    previous = _ACTIVE_SERIES
+    _ACTIVE_SERIES = (model_name, full_sign, metric_name, int(train_window_days))
+
+    try:
+        yield
+    finally:
+        _ACTIVE_SERIES = previous
+
+
+def fit_with_early_stopping(X_train, y_train, fit_full, fit_validated):
+    """
+        Обучение с ранней остановкой на хвосте окна.
+
+        :param fit_full: (X, y, n_iterations | None) -> model; None = число итераций из параметров модели
+        :param fit_validated: (X_fit, y_fit, X_val, y_val) -> лучшее число итераций
+        :return: модель, обученная на всём окне
+    """
+
+    validation_days, reuse_iterations = _settings()
+
+    if validation_days is None:
+        return fit_full(X_train, y_train, None)
+
+    series_key = _ACTIVE_SERIES
+
+    if reuse_iterations and series_key in _BEST_ITERATIONS:
+        return fit_full(X_train, y_train, _BEST_ITERATIONS[series_key])
+
+    n_fit = len(X_train) - validation_days
+
+    if n_fit < MIN_FIT_TO_VALIDATION_RATIO * validation_days:
+        return fit_full(X_train, y_train, None)
+
+    best_iterations = max(1, int(fit_validated(
+        X_train.iloc[:n_fit], y_train.iloc[:n_fit],
+        X_train.iloc[n_fit:], y_train.iloc[n_fit:]
+    )))
+
+    if series_key is not None:
+        _BEST_ITERATIONS[series_key] = best_iterations
+
+    return fit_full(X_train, y_train, best_iterations)
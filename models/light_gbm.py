@@ -1,6 +1,18 @@
 # models/lightGBM.py
 
-from lightgbm import LGBMRegressor
+from lightgbm import LGBMRegressor, early_stopping
+
+from models.threads import get_model_threads
+from models.early_stopping import fit_with_early_stopping, EARLY_STOPPING_ROUNDS
+
+LIGHTGBM_PARAMS = dict(
+    n_estimators=500,
+    learning_rate=0.05,
+    max_depth=6,
+    subsample=0.8,
+    colsample_bytree=0.8,
+    random_state=42
+)
 
 def train_lightgbm(
         X_train,
@@ -15,15 +27,52 @@ def train_lightgbm(
      - оптимизация MAE
      """
 
+    def fit_full(X, y, n_iterations):
+        params = LIGHTGBM_PARAMS if n_iterations is None else {**LIGHTGBM_PARAMS, "n_estimators": n_iterations}
+
+        model = LGBMRegressor(
+            **params,
+            n_jobs=get_model_threads()
+        )
+
+        model.fit(X, y)
+
+        return model
+
+    def fit_validated(X_fit, y_fit, X_val, y_val):
+        model = LGBMRegressor(
+            **LIGHTGBM_PARAMS,
+            n_jobs=get_model_threads()
+        )
+
+        model.fit(
+            X_fit, y_fit,
+            eval_set=[(X_val, y_val)],
+            callbacks=[early_stopping(EARLY_STOPPING_ROUNDS, verbose=False)]
+        )
+
+        return model.best_iteration_ or LIGHTGBM_PARAMS["n_estimators"]
+
+    # ранняя остановка на хвосте окна (models/early_stopping.py), если включена
+    return fit_with_early_stopping(X_train, y_train, fit_full, fit_validated)
+
+
+def continue_lightgbm(
+        init_model,
+        X_train,
+        y_train,
+        iterations: int
+):
+    """
+     Дообучение (warm start): бустинг продолжается от деревьев init_model,
+     добавляется iterations деревьев на (X_train, y_train).
+    """
+
     model = LGBMRegressor(
-        n_estimators=500,
-        learning_rate=0.05,
-        max_depth=6,
-        subsample=0.8,
-        colsample_bytree=0.8,
-        random_state=42
+        **{**LIGHTGBM_PARAMS, "n_estimators": iterations},
+        n_jobs=get_model_threads()
     )
 
-    model.fit(X_train, y_train)
+    model.fit(X_train, y_train, init_model=init_model.booster_)
 
-    return model
\ No newline at end of file
+    return model
@@ -1,13 +1,19 @@
 # models/random_forest_regressor.py
 from sklearn.ensemble import RandomForestRegressor
 
+from models.threads import get_model_threads
+
+RANDOM_FOREST_PARAMS = dict(
+    n_estimators=300,
+    max_depth=8,
+    random_state=42
+)
+
 def train_rand_forest_reggr(X_train, y_train):
 
     model = RandomForestRegressor(
-        n_estimators=300,
-        max_depth=8,
-        random_state=42,
-        n_jobs=-1
+        **RANDOM_FOREST_PARAMS,
+        n_jobs=get_model_threads()
     )
 
     model.fit(X_train, y_train)
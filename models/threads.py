@@ -0,0 +1,50 @@
+# models/threads.py
+"""
+    Ограничение внутренних потоков ML-библиотек.
+
+    RandomForest (n_jobs), CatBoost (thread_count), LightGBM (n_jobs), XGBoost (n_jobs)
+    по умолчанию занимают все ядра. При запуске нескольких процессов
+    (параллельный бэктест) каждый процесс должен использовать только свою долю CPU,
+    иначе потоки конкурируют и всё работает медленнее, чем последовательно.
+
+    -1 = без ограничения (все ядра), как и было раньше.
+"""
+
+import os
+
+_THREAD_ENV_VARS = [
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+]
+
+_MODEL_THREADS = -1
+
+
+def limit_model_threads(n_threads: int):
+    """
+        Ограничивает число потоков для всех моделей в текущем процессе.
+
+        Выставляет переменные окружения OpenMP/BLAS (действуют на библиотеки,
+        которые ещё не инициализировали пул потоков) и значение,
+        которое трейнеры передают в параметры моделей.
+
+        :param n_threads: число потоков на процесс (-1 = все ядра)
+    """
+
+    global _MODEL_THREADS
+
+    _MODEL_THREADS = n_threads
+
+    if n_threads > 0:
+        for env_var in _THREAD_ENV_VARS:
+            os.environ[env_var] = str(n_threads)
+
+
+def get_model_threads() -> int:
+    """
+        Сколько потоков может использовать одна модель (-1 = все ядра).
+    """
+
+    return _MODEL_THREADS
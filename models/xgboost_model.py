@@ -1,6 +1,21 @@
 # models/xgboost_model.py
 from xgboost import XGBRegressor
 
+from models.threads import get_model_threads
+from models.early_stopping import fit_with_early_stopping, EARLY_STOPPING_ROUNDS
+
+XGBOOST_PARAMS = dict(
+    n_estimators=500,
+    learning_rate=0.05,
+    max_depth=6,
+
+    subsample=0.8,
+    colsample_bytree=0.8,
+
+    objective="reg:absoluteerror",
+    random_state=42
+)
+
 def train_xgboost(
         X_train,
         y_train
@@ -19,20 +34,49 @@ def train_xgboost(
         Возвращает обученную модель.
     """
 
-    model = XGBRegressor(
-        n_estimators=500,
-        learning_rate=0.05,
-        max_depth=6,
+    def fit_full(X, y, n_iterations):
+        params = XGBOOST_PARAMS if n_iterations is None else {**XGBOOST_PARAMS, "n_estimators": n_iterations}
 
-        subsample=0.8,
-        colsample_bytree=0.8,
+        model = XGBRegressor(
+            **params,
+            n_jobs=get_model_threads()
+        )
 
-        objective="reg:absoluteerror",
-        random_state=42
-    )
+        model.fit(X, y)
 
-    model.fit(X_train, y_train)
+        return model
 
-    return model
+    def fit_validated(X_fit, y_fit, X_val, y_val):
+        model = XGBRegressor(
+            **XGBOOST_PARAMS,
+            early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+            n_jobs=get_model_threads()
+        )
+
+        model.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], verbose=False)
+
+        return model.best_iteration + 1
+
+    # ранняя остановка на хвосте окна (models/early_stopping.py), если включена
+    return fit_with_early_stopping(X_train, y_train, fit_full, fit_validated)
 
 
+def continue_xgboost(
+        init_model,
+        X_train,
+        y_train,
+        iterations: int
+):
+    """
+        Дообучение (warm start): бустинг продолжается от деревьев init_model (xgb_model),
+        добавляется iterations деревьев на (X_train, y_train).
+    """
+
+    model = XGBRegressor(
+        **{**XGBOOST_PARAMS, "n_estimators": iterations},
+        n_jobs=get_model_threads()
+    )
+
+    model.fit(X_train, y_train, xgb_model=init_model.get_booster())
+
+    return model
@@ -1,28 +1,140 @@
 
+import json
+import multiprocessing
 import os
-import matplotlib.pyplot as plt
-import matplotlib
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 
-from forecast.models_registry import MODEL_REGISTRY
+from data.series_store import SeriesStore
+from forecast.models_registry import BATCH_MODEL_REGISTRY, MODEL_REGISTRY
+from evaluation.backtest_cache import BacktestCache
+from evaluation.backtests_models_few_periods import backtest_cell_key
+from evaluation.date_index import DateIndex, rows_between, rows_between_before
+from evaluation.parallel_backtests import cells_scope_hashes, precompute_batch_forecasts
 from evaluation.metrics import calc_month_metrics
+from plots_tables.render_policy_plot import hash_plot_job, render_policy_plot
+
+# каталог PNG по умолчанию (его же перечисляет этап plot в cli.py)
+PLOTS_SAVE_DIR = "backtests_plots_policy_daily"
+
+# хэши входов уже нарисованных графиков (для skip_unchanged)
+PLOTS_MANIFEST_FILE = "_plots_manifest.json"
+
+
+def _load_manifest(save_dir: str) -> dict:
+
+    path = os.path.join(save_dir, PLOTS_MANIFEST_FILE)
+
+    if not os.path.exists(path):
+        return {}
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    # битый манифест -> просто перерисуем всё
+    except (json.JSONDecodeError, OSError):
+        return {}
+
+
+def _save_manifest(save_dir: str, manifest: dict):
+
+    path = os.path.join(save_dir, PLOTS_MANIFEST_FILE)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=4, sort_keys=True)
+
+    os.replace(tmp_path, path)
 
-matplotlib.use("Agg")
 
 def plot_policy_backtests(
-    df: pd.DataFrame,
+    df: pd.DataFrame | SeriesStore,
     policy_df: pd.DataFrame,
     backtest_dates: list[pd.Timestamp],
-    save_dir="backtests_plots_policy_daily"
+    save_dir=PLOTS_SAVE_DIR,
+    forecast_store_file: str | None = None,
+    n_workers: int = 1,
+    skip_unchanged: bool = False
 ):
     """
     Строит информативные daily графики:
 
     Train fact + Test fact + Forecast best model
+
+    Сначала в текущем процессе собираются задания (небольшие массивы на график),
+    затем PNG рисуются на пуле процессов (render_policy_plot).
+
+    :param df: длинный датафрейм с признаками или SeriesStore по нему
+    :param forecast_store_file: файл кэша бэктеста (BacktestCache) — дневные прогнозы
+                                берутся из него, модель запускается только для ячеек, которых там нет
+                                (batch-модели - как в бэктесте, по SeriesStore: глобальная модель
+                                обучается на всех связках, а не на одном ряду)
+    :param n_workers: число процессов отрисовки (1 = последовательно в текущем процессе)
+    :param skip_unchanged: не перерисовывать графики, входы которых не изменились
+                           с прошлой отрисовки (манифест PLOTS_MANIFEST_FILE в save_dir)
     """
 
     os.makedirs(save_dir, exist_ok=True)
 
+    series_store = SeriesStore.from_df(df)
+
+    forecast_store = BacktestCache(forecast_store_file) if forecast_store_file else None
+
+    # ячейки графиков: (окно, канал, метрика, дата, [модель])
+    plot_cells = [
+        (row.BEST_WINDOW, row.FULL_SIGN, row.METRIC_NAME, start_date, [row.BEST_MODEL.replace("_WMAPE", "")])
+        for row in policy_df.itertuples()
+        for start_date in backtest_dates
+    ]
+
+    # хэши рядов для ключей глобальных моделей (как в бэктесте), хэш хранилища - один раз на дату
+    scope_hashes = cells_scope_hashes(series_store, plot_cells) if forecast_store is not None else {}
+
+    # ---- прогнозы из кэша бэктеста, по тому же ключу ячейки ----
+    forecasts = {}
+
+    for train_window, full_sign, metric, start_date, (model_key,) in plot_cells:
+        if forecast_store is None:
+            break
+
+        # тот же ключ, что в бэктесте: прогноз именно по текущим данным и коду
+        forecast_df = forecast_store.get_forecast(
+            backtest_cell_key(
+                df=series_store.get(full_sign, metric),
+                model_key=model_key,
+                train_window_days=train_window,
+                start_date=start_date,
+                scope_hash=scope_hashes.get(
+                    (train_window, full_sign, metric, start_date), {}
+                ).get((model_key, start_date)),
+                chain_dates=backtest_dates
+            )
+        )
+
+        if forecast_df is not None:
+            forecasts[(model_key, (train_window, full_sign, metric, start_date))] = forecast_df
+
+    n_from_store = len(forecasts)
+
+    # ---- промахи batch-моделей: одним вызовом по SeriesStore, как в бэктесте ----
+    batch_misses = {}
+
+    for train_window, full_sign, metric, start_date, (model_key,) in plot_cells:
+        cell = (train_window, full_sign, metric, start_date)
+
+        if model_key in BATCH_MODEL_REGISTRY and (model_key, cell) not in forecasts:
+            batch_misses.setdefault(model_key, []).append(cell)
+
+    for model_key, cells in batch_misses.items():
+        for cell, cell_forecasts in precompute_batch_forecasts(series_store, cells, [model_key], backtest_dates).items():
+            forecasts[(model_key, cell)] = cell_forecasts[(model_key, cell[3])]
+
+    n_recomputed = len(forecasts) - n_from_store
+
+    jobs = []
+
     for _, policy_row in policy_df.iterrows():
 
         full_sign = policy_row["FULL_SIGN"]
@@ -36,10 +148,10 @@ def plot_policy_backtests(
         )
 
         # --- рабочий df ---
-        work_df = df[
-            (df["FULL_SIGN"] == full_sign) &
-            (df["METRIC_NAME"] == metric)
-        ].copy()
+        work_df = series_store.get(full_sign, metric)
+
+        # индекс дат ряда - один на все даты бэктеста
+        date_index = DateIndex(work_df)
 
         model_func = MODEL_REGISTRY[best_model]
 
@@ -52,30 +164,30 @@ def plot_policy_backtests(
             # =========================
             train_start = start_date - pd.Timedelta(days=best_window)
 
-            train_df = work_df[
-                (work_df["DDATE"] >= train_start) &
-                (work_df["DDATE"] < start_date)
-            ].copy()
+            train_df = rows_between_before(work_df, train_start, start_date, date_index)
 
             # =========================
             # TEST
             # =========================
-            test_df = work_df[
-                (work_df["DDATE"] >= start_date) &
-                (work_df["DDATE"] <= end_date)
-            ].copy()
+            test_df = rows_between(work_df, start_date, end_date, date_index)
 
             # =========================
             # FORECAST
             # =========================
-            forecast_df = model_func(
-                df=work_df,
-                start=start_date,
-                end=end_date,
-                window=best_window,
-                full_sign=full_sign,
-                metric_name=metric
-            )
+            forecast_df = forecasts.get((best_model, (best_window, full_sign, metric, start_date)))
+
+            # модель по одному ряду; batch-модель - только если её batch-вызов ячейку не отдал
+            # (например короткий ряд у batch-сглаживания), как в бэктесте
+            if forecast_df is None:
+                forecast_df = model_func(
+                    df=work_df,
+                    start=start_date,
+                    end=end_date,
+                    window=best_window,
+                    full_sign=full_sign,
+                    metric_name=metric
+                )
+                n_recomputed += 1
 
             # =========================
             # WMAPE
@@ -88,60 +200,84 @@ def plot_policy_backtests(
             wmape = metrics["WMAPE_MONTH"]
 
             # =========================
-            # PLOT
+            # задание на график: только массивы, без датафреймов
             # =========================
-            plt.figure(figsize=(15, 6))
-
-            # Train
-            plt.plot(
-                train_df["DDATE"],
-                train_df["METRIC_VALUE"],
-                label=f"Train ({best_window} days)",
-                color="gray"
-            )
-
-            # Test fact
-            plt.plot(
-                test_df["DDATE"],
-                test_df["METRIC_VALUE"],
-                label="Test fact",
-                color="black",
-                linewidth=2
-            )
-
-            # Forecast
-            plt.plot(
-                forecast_df["DDATE"],
-                forecast_df["FORECAST"],
-                label=f"Forecast ({best_model})",
-                linewidth=2
-            )
-
-            plt.axvline(x=start_date, linestyle="--")
-
-            plt.title(
-                f"{full_sign} | {metric}\n"
-                f"Model: {best_model} | "
-                f"Window: {best_window} | "
-                f"Start: {start_date.date()}\n"
-                f"WMAPE = {wmape:.2%}"
-            )
-
-            plt.legend()
-            plt.grid(True)
-
             filename = (
                 f"{full_sign}_{metric}_{start_date.date()}.png"
                 .replace(" ", "_")
             )
 
-            plt.savefig(
-                os.path.join(save_dir, filename),
-                bbox_inches="tight"
-            )
-
-            plt.close()
-
-    print(f"\n✅ Policy daily plots saved → {save_dir}")
+            jobs.append({
+                "FILE_PATH": os.path.join(save_dir, filename),
+                "TRAIN_DATES": train_df["DDATE"].to_numpy(),
+                "TRAIN_VALUES": train_df["METRIC_VALUE"].to_numpy(dtype=float),
+                "TEST_DATES": test_df["DDATE"].to_numpy(),
+                "TEST_VALUES": test_df["METRIC_VALUE"].to_numpy(dtype=float),
+                "FORECAST_DATES": pd.to_datetime(forecast_df["DDATE"]).to_numpy(),
+                "FORECAST_VALUES": forecast_df["FORECAST"].to_numpy(dtype=float),
+                "START_DATE": start_date.to_datetime64(),
+                "TRAIN_LABEL": f"Train ({best_window} days)",
+                "FORECAST_LABEL": f"Forecast ({best_model})",
+                "TITLE": (
+                    f"{full_sign} | {metric}\n"
+                    f"Model: {best_model} | "
+                    f"Window: {best_window} | "
+                    f"Start: {start_date.date()}\n"
+                    f"WMAPE = {wmape:.2%}"
+                ),
+            })
+
+    if forecast_store is not None:
+        forecast_store.close()
+
+    # один файл - один график: при повторе связки в policy побеждает более поздняя строка
+    jobs = list({job["FILE_PATH"]: job for job in jobs}.values())
+
+    # =========================
+    # какие графики действительно нужно рисовать
+    # =========================
+    manifest = _load_manifest(save_dir) if skip_unchanged else {}
+
+    jobs_to_render = []
+
+    for job in jobs:
+
+        job_hash = hash_plot_job(job)
+        file_name = os.path.basename(job["FILE_PATH"])
+
+        if manifest.get(file_name) == job_hash and os.path.exists(job["FILE_PATH"]):
+            continue
+
+        jobs_to_render.append(job)
+        manifest[file_name] = job_hash
+
+    # =========================
+    # PLOT
+    # =========================
+    if n_workers <= 1 or len(jobs_to_render) <= 1:
+        for job in jobs_to_render:
+            render_policy_plot(job)
+
+    else:
+        # spawn: как в параллельном бэктесте; процессы импортируют только модуль отрисовки
+        with ProcessPoolExecutor(
+                max_workers=min(n_workers, len(jobs_to_render)),
+                mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+
+            list(executor.map(
+                render_policy_plot,
+                jobs_to_render,
+                chunksize=max(1, len(jobs_to_render) // (n_workers * 4))
+            ))
+
+    # манифест пишем только после успешной отрисовки
+    _save_manifest(save_dir, manifest)
+
+    print(
+        f"\n✅ Policy daily plots saved → {save_dir} "
+        f"(прогнозов из кэша: {n_from_store}, пересчитано моделями: {n_recomputed}; "
+        f"нарисовано: {len(jobs_to_render)}, без изменений: {len(jobs) - len(jobs_to_render)})"
+    )
 
 
@@ -0,0 +1,102 @@
+# plots_tables/render_policy_plot.py
+"""
+    Отрисовка одного daily-графика policy в PNG.
+
+    Вынесено отдельно от plot_policy_backtests, чтобы процессы пула (spawn)
+    импортировали только matplotlib/numpy, а не реестр моделей.
+
+    Задание на график (job) — словарь с небольшими массивами:
+        FILE_PATH                          - куда сохранить PNG
+        TRAIN_DATES / TRAIN_VALUES         - факт окна обучения
+        TEST_DATES / TEST_VALUES           - факт месяца бэктеста
+        FORECAST_DATES / FORECAST_VALUES   - прогноз лучшей модели
+        START_DATE, TRAIN_LABEL, FORECAST_LABEL, TITLE
+"""
+
+import hashlib
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+# меняется при любом изменении оформления графика -> все PNG перерисуются
+RENDER_VERSION = 1
+
+_ARRAY_FIELDS = [
+    "TRAIN_DATES", "TRAIN_VALUES",
+    "TEST_DATES", "TEST_VALUES",
+    "FORECAST_DATES", "FORECAST_VALUES",
+]
+
+_TEXT_FIELDS = ["START_DATE", "TRAIN_LABEL", "FORECAST_LABEL", "TITLE"]
+
+
+def hash_plot_job(job: dict) -> str:
+    """
+        Хэш входов графика: если он не изменился — PNG можно не перерисовывать.
+    """
+
+    digest = hashlib.sha256(f"render:{RENDER_VERSION}".encode())
+
+    for field in _ARRAY_FIELDS:
+        digest.update(field.encode())
+        digest.update(np.ascontiguousarray(job[field]).tobytes())
+
+    for field in _TEXT_FIELDS:
+        digest.update(f"{field}={job[field]}".encode())
+
+    return digest.hexdigest()
+
+
+def render_policy_plot(job: dict) -> str:
+    """
+        Train fact + Test fact + Forecast best model -> PNG.
+
+        :return: путь сохранённого файла
+    """
+
+    plt.figure(figsize=(15, 6))
+
+    # Train
+    plt.plot(
+        job["TRAIN_DATES"],
+        job["TRAIN_VALUES"],
+        label=job["TRAIN_LABEL"],
+        color="gray"
+    )
+
+    # Test fact
+    plt.plot(
+        job["TEST_DATES"],
+        job["TEST_VALUES"],
+        label="Test fact",
+        color="black",
+        linewidth=2
+    )
+
+    # Forecast
+    plt.plot(
+        job["FORECAST_DATES"],
+        job["FORECAST_VALUES"],
+        label=job["FORECAST_LABEL"],
+        linewidth=2
+    )
+
+    plt.axvline(x=job["START_DATE"], linestyle="--")
+
+    plt.title(job["TITLE"])
+
+    plt.legend()
+    plt.grid(True)
+
+    plt.savefig(
+        job["FILE_PATH"],
+        bbox_inches="tight"
+    )
+
+    plt.close()
+
+    return job["FILE_PATH"]
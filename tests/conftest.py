@@ -0,0 +1,6 @@
+# tests/conftest.py
+import os
+import sys
+
+# модули проекта импортируются от корня репозитория (как из main.py / cli.py)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
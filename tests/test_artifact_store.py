@@ -0,0 +1,62 @@
+# tests/test_artifact_store.py
+"""
+    Хранилище моделей: любая ошибка чтения записи — промах (запись удаляется, модель обучится заново).
+"""
+
+import os
+
+import pytest
+
+from models.artifact_store import ModelArtifactStore
+
+KEY = "ab" + "0" * 62
+
+
+class _Model:
+    def __init__(self, value):
+        self.value = value
+
+
+def _corrupt_truncated(path: str):
+    with open(path, "rb") as f:
+        content = f.read()
+
+    with open(path, "wb") as f:
+        f.write(content[:len(content) // 2])
+
+
+def _corrupt_missing_class(path: str):
+    # модель класса, которого уже нет (другая версия библиотеки) -> AttributeError при загрузке
+    with open(path, "rb") as f:
+        content = f.read()
+
+    with open(path, "wb") as f:
+        f.write(content.replace(b"_Model", b"_Gone_"))
+
+
+def _corrupt_missing_module(path: str):
+    # GLOBAL на несуществующий модуль -> ModuleNotFoundError (ImportError)
+    with open(path, "wb") as f:
+        f.write(b"\x80\x04cno_such_module_xyz\nModel\n)R.")
+
+
+@pytest.mark.parametrize("corrupt", [_corrupt_truncated, _corrupt_missing_class, _corrupt_missing_module])
+def test_unreadable_artifact_is_a_miss(tmp_path, corrupt):
+    store = ModelArtifactStore(str(tmp_path))
+
+    store.put(KEY, _Model(1))
+    assert store.get(KEY).value == 1
+
+    path = store._path(KEY)
+    corrupt(path)
+
+    assert store.get(KEY) is None
+    assert not os.path.exists(path)
+
+    # модель обучилась заново и сохранилась
+    store.put(KEY, _Model(2))
+    assert store.get(KEY).value == 2
+
+
+def test_missing_artifact_is_a_miss(tmp_path):
+    assert ModelArtifactStore(str(tmp_path)).get(KEY) is None
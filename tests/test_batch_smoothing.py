@@ -0,0 +1,190 @@
+# tests/test_batch_smoothing.py
+"""
+    Векторизованное сглаживание (models.batch_smoothing) против statsmodels:
+    - при одних и тех же параметрах и начальных состояниях рекурсия и прогноз совпадают
+      (Holt-Winters — кроме горизонтов h = 7, 14, ..., см. docstring модуля)
+    - МНК-оценка начальных состояний даёт SSE statsmodels (initialization_method="estimated")
+    - короткий ряд не роняет пачку, а уходит в прогноз по одному ряду
+"""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from forecast.baseline_smoothing_batch_forecast import batch_smoothing_cells, batch_smoothing_forecast
+from models.batch_smoothing import (
+    SES,
+    HOLT,
+    HOLT_WINTERS,
+    SEASONAL_PERIOD,
+    _forecast_from_states,
+    _run_recursion,
+    _to_abg,
+    forecast_smoothing_batch,
+    min_series_length,
+    run_smoothing
+)
+
+try:
+    from statsmodels.tsa.holtwinters import ExponentialSmoothing, Holt, SimpleExpSmoothing
+except ImportError:
+    ExponentialSmoothing = None
+
+needs_statsmodels = pytest.mark.skipif(ExponentialSmoothing is None, reason="statsmodels не установлен")
+
+METHODS = [SES, HOLT, HOLT_WINTERS]
+
+FIXED_PARAMS = {
+    SES: (0.3,),
+    HOLT: (0.3, 0.05),
+    HOLT_WINTERS: (0.3, 0.05, 0.2),
+}
+
+HORIZON = 31
+
+
+def _weekly_series(seed: int, n_days: int = 90) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_days)
+    day_of_week = np.array([1.0, 1.1, 1.05, 1.0, 0.9, 0.2, 0.1])
+
+    return 1e5 * day_of_week[t % SEASONAL_PERIOD] * (1 + 0.002 * t) * rng.normal(1, 0.1, n_days)
+
+
+def _statsmodels_fit(y: np.ndarray, method: str, params: tuple):
+    # параметры сглаживания фиксированы, statsmodels оптимизирует только начальные состояния
+    if method == SES:
+        model = SimpleExpSmoothing(y, initialization_method="estimated")
+    elif method == HOLT:
+        model = Holt(y, initialization_method="estimated")
+    else:
+        model = ExponentialSmoothing(
+            y, trend="add", seasonal="add", seasonal_periods=SEASONAL_PERIOD, initialization_method="estimated"
+        )
+
+    names = ["smoothing_level", "smoothing_trend", "smoothing_seasonal"]
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return model.fit(**dict(zip(names, params)), optimized=True)
+
+
+def _recursion_from_statsmodels(y: np.ndarray, method: str, params: tuple, fit):
+    # рекурсия движка с начальными состояниями statsmodels
+    level = np.array([fit.params["initial_level"]])
+    trend = np.array([fit.params["initial_trend"] if method != SES else 0.0])
+    season = (
+        np.asarray(fit.params["initial_seasons"])[None, :]
+        if method == HOLT_WINTERS else np.zeros((1, SEASONAL_PERIOD))
+    )
+
+    alpha, beta, gamma = _to_abg(np.array([params]), method)
+
+    predictions, level, trend, season = _run_recursion(
+        level, trend, season, alpha, beta, gamma, method, len(y), SEASONAL_PERIOD, Y=y[None, :]
+    )
+
+    forecast = _forecast_from_states(
+        level.ravel(), trend.ravel(), season.reshape(1, SEASONAL_PERIOD), len(y), HORIZON, method
+    )
+
+    return predictions[0], forecast[0]
+
+
+@needs_statsmodels
+@pytest.mark.parametrize("method", METHODS)
+def test_fixed_params_forecast_matches_statsmodels(method):
+    y = _weekly_series(seed=3)
+    fit = _statsmodels_fit(y, method, FIXED_PARAMS[method])
+
+    predictions, forecast = _recursion_from_statsmodels(y, method, FIXED_PARAMS[method], fit)
+
+    np.testing.assert_allclose(predictions, fit.fittedvalues, rtol=1e-9)
+
+    horizons = np.arange(1, HORIZON + 1)
+    same = horizons % SEASONAL_PERIOD != 0 if method == HOLT_WINTERS else np.ones(HORIZON, dtype=bool)
+
+    np.testing.assert_allclose(forecast[same], fit.forecast(HORIZON)[same], rtol=1e-9)
+
+
+@needs_statsmodels
+def test_holt_winters_full_week_horizons_use_latest_season():
+    # h = 7k: statsmodels берёт сезонность на период старше, движок — последнюю оценённую
+    method = HOLT_WINTERS
+    y = _weekly_series(seed=5)
+    fit = _statsmodels_fit(y, method, FIXED_PARAMS[method])
+
+    _, forecast = _recursion_from_statsmodels(y, method, FIXED_PARAMS[method], fit)
+
+    full_weeks = np.arange(SEASONAL_PERIOD, HORIZON + 1, SEASONAL_PERIOD) - 1
+    season = np.asarray(fit.season)
+
+    np.testing.assert_allclose(
+        fit.forecast(HORIZON)[full_weeks] - forecast[full_weeks],
+        season[-1 - SEASONAL_PERIOD] - season[-1],
+        rtol=1e-7
+    )
+
+
+@needs_statsmodels
+@pytest.mark.parametrize("method", METHODS)
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_estimated_start_sse_matches_statsmodels(method, seed):
+    y = _weekly_series(seed=seed)
+    fit = _statsmodels_fit(y, method, FIXED_PARAMS[method])
+
+    sse = run_smoothing(y[None, :], method, *_to_abg(np.array([FIXED_PARAMS[method]]), method))[0][0, 0]
+
+    assert sse == pytest.approx(fit.sse, rel=1e-3)
+
+
+@needs_statsmodels
+@pytest.mark.parametrize("method", METHODS)
+def test_batch_forecast_close_to_statsmodels_with_same_params(method):
+    Y = np.vstack([_weekly_series(seed=seed) for seed in range(4)])
+
+    forecast, best = forecast_smoothing_batch(Y, HORIZON, method)
+
+    horizons = np.arange(1, HORIZON + 1)
+    same = horizons % SEASONAL_PERIOD != 0 if method == HOLT_WINTERS else np.ones(HORIZON, dtype=bool)
+
+    for y, series_forecast, params in zip(Y, forecast, best):
+        sm_forecast = _statsmodels_fit(y, method, tuple(params)).forecast(HORIZON)
+
+        assert np.max(np.abs(series_forecast - sm_forecast)[same]) / np.abs(sm_forecast).mean() < 1e-2
+
+
+def _long_df(lengths: dict) -> pd.DataFrame:
+    end_date = pd.Timestamp("2025-10-31")
+
+    frames = [
+        pd.DataFrame({
+            "DDATE": pd.date_range(end=end_date, periods=n_days),
+            "FULL_SIGN": full_sign,
+            "METRIC_NAME": "SUM_SNDS",
+            "METRIC_VALUE": _weekly_series(seed=i, n_days=n_days),
+        })
+        for i, (full_sign, n_days) in enumerate(lengths.items())
+    ]
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_short_series_left_out_of_batch():
+    start_date = pd.Timestamp("2025-11-01")
+    short_days = min_series_length(HOLT_WINTERS) - 1
+
+    df = _long_df({"A": 120, "B": 120, "SHORT": short_days})
+    keys = [("A", "SUM_SNDS"), ("B", "SUM_SNDS"), ("SHORT", "SUM_SNDS")]
+
+    forecasts = batch_smoothing_forecast(
+        df, keys, start_date, start_date + pd.offsets.MonthEnd(0), train_window_days=90, method=HOLT_WINTERS
+    )
+
+    assert set(forecasts) == set(keys[:2])
+
+    cells = [(90, full_sign, metric, start_date) for full_sign, metric in keys]
+
+    assert set(batch_smoothing_cells(df, cells, method=HOLT_WINTERS)) == set(cells[:2])
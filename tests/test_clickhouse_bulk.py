@@ -0,0 +1,219 @@
+# tests/test_clickhouse_bulk.py
+"""
+    Загрузка факта одним запросом (get_fact_data_bulk) против старого цикла по связкам:
+    - на локальной замене клиента ClickHouse (SQL не исполняется: параметры и условия запроса)
+    - на embedded ClickHouse (chdb): SQL обоих вариантов исполняется на одних и тех же витринах
+"""
+
+import pandas as pd
+import pytest
+
+from data.load_raw_fact_data import FACT_WIDE_COLUMNS, load_wide_fact_df
+from data.local_client import LocalClickHouseClient
+from data.synthetic_panel import generate_synthetic_fact, synthetic_pairs
+
+
+@pytest.fixture(scope="module")
+def fact_df() -> pd.DataFrame:
+    return generate_synthetic_fact(n_series=6, n_days=90, end_date=pd.Timestamp("2025-12-31"))
+
+
+@pytest.mark.parametrize("start_date", ["2025-12-01", "2025-12-15", "2026-01-10"])
+def test_bulk_matches_loop(fact_df, start_date):
+    pairs = synthetic_pairs(fact_df)
+
+    subspecies_kp = pairs[:3]
+    # ТД: канал с двумя признаками ИРИС и повтор связки (как закомментированный TD_PAIRS в настройках)
+    subspecies_td = [pairs[4], pairs[5], pairs[5]]
+
+    loaded = {}
+
+    for bulk in (False, True):
+        client = LocalClickHouseClient(fact_df)
+
+        loaded[bulk] = load_wide_fact_df(
+            client=client,
+            subspecies_kp=subspecies_kp,
+            subspecies_td=subspecies_td,
+            start_date=pd.Timestamp(start_date).date(),
+            count_hist_dates=60,
+            bulk=bulk
+        )
+
+        assert len(client.queries) == (1 if bulk else len(subspecies_kp) + len(subspecies_td))
+
+    assert list(loaded[True].columns) == FACT_WIDE_COLUMNS
+    assert len(loaded[True]) == 60 * (len(subspecies_kp) + len(subspecies_td))
+
+    pd.testing.assert_frame_equal(loaded[True], loaded[False], check_dtype=False)
+
+
+def test_bulk_query_joins_distinct_td_pairs(fact_df):
+    # stand-in не исполняет SQL: проверяем, что факт ТД соединяется с уникальными связками
+    client = LocalClickHouseClient(fact_df)
+    pairs = synthetic_pairs(fact_df)
+
+    load_wide_fact_df(
+        client=client,
+        subspecies_kp=[],
+        subspecies_td=[pairs[0], pairs[0]],
+        start_date=pd.Timestamp("2025-12-01").date(),
+        count_hist_dates=30,
+        bulk=True
+    )
+
+    assert "SELECT DISTINCT SALES_SUBSPECIES, SIGN_IRIS FROM pairs WHERE SOURCE = 'TD'" in client.queries[0]
+
+
+def test_bulk_query_binds_pairs_and_dates(fact_df):
+    client = LocalClickHouseClient(fact_df)
+    pairs = synthetic_pairs(fact_df)
+
+    load_wide_fact_df(
+        client=client,
+        subspecies_kp=pairs[:2],
+        subspecies_td=[pairs[4], pairs[4]],
+        start_date=pd.Timestamp("2025-12-15").date(),
+        count_hist_dates=45,
+        bulk=True
+    )
+
+    assert client.parameters[0] == {
+        # номер связки - порядок KP + TD, повтор связки остаётся отдельной связкой
+        "pairs": [
+            (0, *pairs[0], "KP"),
+            (1, *pairs[1], "KP"),
+            (2, *pairs[4], "TD"),
+            (3, *pairs[4], "TD"),
+        ],
+        "start_date": pd.Timestamp("2025-12-15").date(),
+        "count_hist_fact_dates": 45,
+    }
+
+    query = " ".join(client.queries[0].split())
+
+    # календарь на все связки, факт - по связкам своей витрины, соединение по дате + связке + витрине
+    for clause in [
+        "FROM numbers({count_hist_fact_dates:UInt32}) AS n CROSS JOIN pairs AS p",
+        "(SALES_SUBSPECIES, SIGN_IRIS) IN ( SELECT SALES_SUBSPECIES, SIGN_IRIS FROM pairs WHERE SOURCE = 'KP' )",
+        "SALES_SUBSPECIES IN (SELECT SALES_SUBSPECIES FROM pairs WHERE SOURCE = 'TD')",
+        "ON cal.DDATE = f.DDATE AND cal.SALES_SUBSPECIES = f.SALES_SUBSPECIES "
+        "AND cal.SIGN_IRIS = f.SIGN_IRIS AND cal.SOURCE = f.SOURCE",
+        "ORDER BY cal.PAIR_IDX ASC, cal.DDATE ASC",
+    ]:
+        assert clause in query
+
+
+# ---- настоящий движок ClickHouse (chdb, embedded): SQL запросов исполняется, а не подменяется ----
+try:
+    import chdb.session as chdb_session
+except ImportError:
+    chdb_session = None
+
+needs_chdb = pytest.mark.skipif(chdb_session is None, reason="chdb не установлен")
+
+_METRICS = ["SUM_SNDS", "SUM_PROFIT", "SUM_PROFIT_NO_KSP", "SUM_COST_NONDS_NO_KSP", "SUM_COST_SNDS_NO_KSP"]
+
+
+def _ch_literal(value) -> str:
+    # параметр запроса в текстовом формате ClickHouse (как его передаёт clickhouse_connect)
+    if isinstance(value, str):
+        return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+    if isinstance(value, (list, tuple)):
+        items = ", ".join(_ch_literal(item) for item in value)
+        return f"[{items}]" if isinstance(value, list) else f"({items})"
+    return str(value)
+
+
+class ChdbClient:
+    """
+        Клиент с интерфейсом clickhouse_connect (query_df) поверх embedded ClickHouse.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.queries = []
+
+    def query_df(self, query: str, parameters: dict | None = None) -> pd.DataFrame:
+        self.queries.append(query)
+
+        # верхний уровень: числа и даты как есть, массивы / кортежи - литералом
+        params = {
+            name: _ch_literal(value) if isinstance(value, (list, tuple)) else str(value)
+            for name, value in (parameters or {}).items()
+        }
+
+        return self.session.query(query, "DataFrame", params=params)
+
+
+@pytest.fixture(scope="module")
+def chdb_client(fact_df):
+    session = chdb_session.Session()
+
+    session.query("CREATE DATABASE IF NOT EXISTS vitrina")
+    session.query("CREATE DATABASE IF NOT EXISTS opt_prod")
+
+    metric_columns = ", ".join(f"{metric} Float64" for metric in _METRICS)
+
+    session.query(
+        "CREATE TABLE vitrina.FACT_KP_IRIS_NOIRIS "
+        f"(DDATE Date, SALES_SUBSPECIES String, SIGN_IRIS String, FULL_SIGN String, {metric_columns}) "
+        "ENGINE = Memory"
+    )
+    session.query(
+        "CREATE TABLE opt_prod.OPT_BASE_FACT_TABLE "
+        f"(DDATE Date, SALES_SUBSPECIES String, {metric_columns}) ENGINE = Memory"
+    )
+
+    # каждый день связки - двумя строками (половины), чтобы запросы действительно суммировали
+    rows_kp = []
+    rows_td = []
+
+    for row in fact_df.itertuples(index=False):
+        values = [round(getattr(row, metric) / 2, 2) for metric in _METRICS]
+        day = pd.Timestamp(row.DDATE).strftime("%Y-%m-%d")
+
+        for _ in range(2):
+            rows_kp.append(
+                f"('{day}', '{row.SALES_SUBSPECIES}', '{row.SIGN_IRIS}', '{row.FULL_SIGN}', "
+                + ", ".join(map(str, values)) + ")"
+            )
+            rows_td.append(f"('{day}', '{row.SALES_SUBSPECIES}', " + ", ".join(map(str, values)) + ")")
+
+    session.query(f"INSERT INTO vitrina.FACT_KP_IRIS_NOIRIS VALUES {', '.join(rows_kp)}")
+    session.query(f"INSERT INTO opt_prod.OPT_BASE_FACT_TABLE VALUES {', '.join(rows_td)}")
+
+    yield ChdbClient(session)
+
+    session.close()
+
+
+@needs_chdb
+@pytest.mark.parametrize("start_date", ["2025-12-01", "2025-12-15", "2026-01-10"])
+def test_bulk_sql_matches_loop_sql_on_clickhouse(chdb_client, fact_df, start_date):
+    pairs = synthetic_pairs(fact_df)
+
+    subspecies_kp = [pairs[0], pairs[1], pairs[2], pairs[0]]
+    # ТД: канал с двумя признаками ИРИС, повтор связки, канал и в КП, и в ТД
+    subspecies_td = [pairs[4], pairs[5], pairs[5], pairs[2]]
+
+    loaded = {
+        bulk: load_wide_fact_df(
+            client=chdb_client,
+            subspecies_kp=subspecies_kp,
+            subspecies_td=subspecies_td,
+            start_date=pd.Timestamp(start_date).date(),
+            count_hist_dates=60,
+            bulk=bulk
+        )
+        for bulk in (False, True)
+    }
+
+    assert list(loaded[True].columns) == FACT_WIDE_COLUMNS
+    assert len(loaded[True]) == 60 * (len(subspecies_kp) + len(subspecies_td))
+    assert loaded[True][_METRICS].to_numpy().sum() > 0
+
+    for df in loaded.values():
+        df["DDATE"] = pd.to_datetime(df["DDATE"])
+
+    pd.testing.assert_frame_equal(loaded[True], loaded[False], check_dtype=False)
@@ -0,0 +1,89 @@
+# tests/test_date_index.py
+"""
+    Разбиение по DateIndex (evaluation.date_index) против прежних фильтров по маске:
+    split_train_and_test_data и срезы графиков policy совпадают один в один
+    (и строки, и индекс) — на сортированном ряду, несортированном, с дублями дат и пропусками дней.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from evaluation.backtest import split_train_and_test_data
+from evaluation.date_index import DateIndex, rows_between, rows_between_before, rows_tail_before
+
+
+def _split_by_mask(df, forecast_date, train_window_days):
+    # split_train_and_test_data до DateIndex
+    train_end = forecast_date - pd.Timedelta(days=1)
+    train_start = train_end - pd.Timedelta(days=train_window_days - 1)
+
+    train_df = df[(df["DDATE"] >= train_start) & (df["DDATE"] <= train_end)].copy()
+    test_df = df[df["DDATE"] == forecast_date].copy()
+
+    return train_df, test_df
+
+
+def _series(kind: str) -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    dates = pd.date_range("2025-06-01", "2025-12-31")
+
+    if kind == "gaps":
+        dates = dates[rng.random(len(dates)) > 0.2]
+
+    df = pd.DataFrame({"DDATE": dates, "METRIC_VALUE": rng.normal(100, 10, len(dates))})
+    df.index = df.index * 3 + 5  # индекс не 0..n-1 (ряд - срез длинного датафрейма)
+
+    if kind == "unsorted":
+        df = df.sample(frac=1, random_state=1)
+
+    if kind == "duplicates":
+        df = pd.concat([df, df.iloc[::10].assign(METRIC_VALUE=-1.0)]).sort_values("DDATE", kind="stable")
+
+    return df
+
+
+KINDS = ["sorted", "gaps", "unsorted", "duplicates"]
+
+FORECAST_DATES = ["2025-06-01", "2025-06-15", "2025-11-01", "2025-12-31", "2026-01-05"]
+
+
+@pytest.mark.parametrize("kind", KINDS)
+@pytest.mark.parametrize("forecast_date", FORECAST_DATES)
+@pytest.mark.parametrize("train_window_days", [1, 30, 90, 400])
+def test_split_train_and_test_matches_mask(kind, forecast_date, train_window_days):
+    df = _series(kind)
+    forecast_date = pd.Timestamp(forecast_date)
+
+    expected = _split_by_mask(df, forecast_date, train_window_days)
+
+    for date_index in (None, DateIndex(df)):
+        actual = split_train_and_test_data(df, forecast_date, train_window_days, date_index=date_index)
+
+        for actual_df, expected_df in zip(actual, expected):
+            pd.testing.assert_frame_equal(actual_df, expected_df)
+
+
+@pytest.mark.parametrize("kind", KINDS)
+@pytest.mark.parametrize("start_date", ["2025-06-01", "2025-09-01", "2025-12-01", "2026-01-01"])
+@pytest.mark.parametrize("window", [30, 90])
+def test_policy_plot_slices_match_mask(kind, start_date, window):
+    df = _series(kind)
+    date_index = DateIndex(df)
+
+    start_date = pd.Timestamp(start_date)
+    end_date = start_date + pd.offsets.MonthEnd(0)
+    train_start = start_date - pd.Timedelta(days=window)
+
+    pd.testing.assert_frame_equal(
+        rows_between_before(df, train_start, start_date, date_index),
+        df[(df["DDATE"] >= train_start) & (df["DDATE"] < start_date)]
+    )
+    pd.testing.assert_frame_equal(
+        rows_between(df, start_date, end_date, date_index),
+        df[(df["DDATE"] >= start_date) & (df["DDATE"] <= end_date)]
+    )
+    pd.testing.assert_frame_equal(
+        rows_tail_before(df, start_date, window, date_index),
+        df[df["DDATE"] < start_date].tail(window)
+    )
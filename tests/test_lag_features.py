@@ -0,0 +1,74 @@
+# tests/test_lag_features.py
+"""
+    IncrementalLagFeatures должен давать ровно те же LAG_*D / ROLL_MEAN_*, что add_lags_means_for_model
+    (бит в бит: состояние rolling повторяет компенсированные суммы pandas rolling().mean()).
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from features.lag_features import (
+    IncrementalLagFeatures,
+    LAG_FEATURE_COLUMNS,
+    add_lags_means_for_model,
+)
+
+
+def _random_series(seed: int, n_days: int = 400) -> np.ndarray:
+
+    rng = np.random.default_rng(seed)
+
+    values = rng.normal(0, 1e5, n_days) * rng.choice([1e-3, 1, 1e3], n_days)
+
+    # отрицательные, нули и длинные серии одинаковых значений (в т.ч. отрицательных)
+    values[rng.random(n_days) < 0.05] = 0.0
+    for _ in range(6):
+        start = rng.integers(0, n_days - 40)
+        values[start:start + rng.integers(3, 40)] = rng.choice([0.0, -7.5, 1e6 / 3, values[start]])
+
+    # пропуски
+    values[rng.random(n_days) < 0.03] = np.nan
+
+    return values
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_incremental_features_match_batch(seed):
+
+    values = _random_series(seed)
+    dates = pd.date_range("2024-01-01", periods=len(values))
+
+    batch = add_lags_means_for_model(pd.DataFrame({"DDATE": dates, "METRIC_VALUE": values}))
+    batch = batch.set_index("DDATE")[LAG_FEATURE_COLUMNS]
+
+    assert len(batch) > 50
+
+    state = IncrementalLagFeatures()
+    incremental = {}
+
+    for date, value in zip(dates, values):
+        incremental[date] = state.features()
+        state.append(value)
+
+    incremental = pd.DataFrame.from_dict(incremental, orient="index")[LAG_FEATURE_COLUMNS]
+
+    # строки, которые batch оставил после dropna, совпадают точно
+    np.testing.assert_array_equal(
+        incremental.loc[batch.index].to_numpy(),
+        batch.to_numpy()
+    )
+
+
+def test_from_history_matches_appending():
+
+    values = _random_series(100, n_days=120)
+    dates = pd.date_range("2024-01-01", periods=len(values))
+    df = pd.DataFrame({"DDATE": dates, "METRIC_VALUE": values})
+
+    start = dates[90]
+
+    from_history = IncrementalLagFeatures.from_history(df, start)
+    appended = IncrementalLagFeatures(values[:90])
+
+    assert from_history.features() == pytest.approx(appended.features(), nan_ok=True)
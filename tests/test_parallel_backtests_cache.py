@@ -0,0 +1,95 @@
+# tests/test_parallel_backtests_cache.py
+"""
+    run_backtest_cells с кэшем: batch-модель получает только ячейки, которых ещё нет в кэше бэктеста.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from evaluation import parallel_backtests
+from evaluation.parallel_backtests import run_backtest_grid
+
+MODEL = "BASELINE_OLS_PREFIX"
+
+DATES = [pd.Timestamp("2025-10-01"), pd.Timestamp("2025-11-01")]
+
+
+def _long_df() -> pd.DataFrame:
+    rng = np.random.default_rng(3)
+    dates = pd.date_range("2025-01-01", "2025-12-31")
+
+    return pd.concat(
+        [
+            pd.DataFrame({
+                "DDATE": dates,
+                "FULL_SIGN": full_sign,
+                "METRIC_NAME": "SUM_SNDS",
+                "METRIC_VALUE": rng.normal(1e5, 1e4, len(dates)),
+                "DAY_OF_WEEK": dates.dayofweek,
+            })
+            for full_sign in ["A", "B"]
+        ],
+        ignore_index=True
+    )
+
+
+@pytest.fixture
+def batch_calls(monkeypatch):
+    calls = []
+    batch_model = parallel_backtests.BATCH_MODEL_REGISTRY[MODEL]
+
+    def counted(series_store, cells):
+        calls.append(sorted(cells))
+        return batch_model(series_store, cells)
+
+    monkeypatch.setitem(parallel_backtests.BATCH_MODEL_REGISTRY, MODEL, counted)
+
+    return calls
+
+
+def _run(df, backtest_dates, cache_file):
+    return run_backtest_grid(
+        df,
+        full_signs=["A", "B"],
+        metrics=["SUM_SNDS"],
+        train_windows=[60],
+        backtest_dates=backtest_dates,
+        models_to_run=[MODEL],
+        cache_file=cache_file
+    )
+
+
+def test_cached_cells_skip_batch_model(tmp_path, batch_calls):
+    df = _long_df()
+    cache_file = str(tmp_path / "cache.sqlite")
+
+    first = _run(df, DATES[:1], cache_file)
+    assert len(batch_calls) == 1 and len(batch_calls[0]) == 2
+
+    # новая дата: batch-модель считает только её ячейки
+    batch_calls.clear()
+    second = _run(df, DATES, cache_file)
+    assert batch_calls == [[(60, "A", "SUM_SNDS", DATES[1]), (60, "B", "SUM_SNDS", DATES[1])]]
+
+    # всё в кэше: batch-модель не вызывается, отчёт тот же
+    batch_calls.clear()
+    third = _run(df, DATES, cache_file)
+    assert batch_calls == []
+
+    pd.testing.assert_frame_equal(second, third)
+    pd.testing.assert_frame_equal(first, second.iloc[[0, 2]].reset_index(drop=True))
+
+
+def test_changed_series_is_recomputed(tmp_path, batch_calls):
+    df = _long_df()
+    cache_file = str(tmp_path / "cache.sqlite")
+
+    _run(df, DATES[:1], cache_file)
+
+    # поменялся факт связки B до конца месяца бэктеста - её ячейка пересчитывается
+    df.loc[(df["FULL_SIGN"] == "B") & (df["DDATE"] == "2025-09-15"), "METRIC_VALUE"] += 1.0
+
+    batch_calls.clear()
+    _run(df, DATES[:1], cache_file)
+    assert batch_calls == [[(60, "B", "SUM_SNDS", DATES[0])]]
@@ -0,0 +1,81 @@
+# tests/test_policy_daily_forecasts.py
+"""
+    Лист DAILY_FORECASTS (build_policy_daily_forecasts): прогноз берётся по ключу ячейки бэктеста,
+    т.е. по текущим данным — после смены данных A → B → A в отчёте снова прогноз A, а не последний записанный (B).
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.series_store import SeriesStore
+from evaluation.backtest_cache import BacktestCache
+from evaluation.backtests_models_few_periods import backtest_cell_key
+from evaluation.summary_report_metrics import build_policy_daily_forecasts
+
+START_DATE = pd.Timestamp("2025-12-01")
+
+
+def _series(level: float) -> pd.DataFrame:
+    dates = pd.date_range("2025-06-01", "2025-12-31")
+
+    return pd.DataFrame({
+        "DDATE": dates,
+        "FULL_SIGN": "A",
+        "METRIC_NAME": "SUM_SNDS",
+        "METRIC_VALUE": np.full(len(dates), level),
+    })
+
+
+def _put(cache_file: str, df: pd.DataFrame, model_key: str, value: float):
+    cache = BacktestCache(cache_file)
+
+    try:
+        cache.put(
+            cell_key=backtest_cell_key(df, model_key, 60, START_DATE),
+            full_sign="A",
+            metric_name="SUM_SNDS",
+            model_key=model_key,
+            train_window_days=60,
+            start_date=START_DATE,
+            forecast_df=pd.DataFrame({
+                "DDATE": pd.date_range(START_DATE, periods=31),
+                "FORECAST": np.full(31, value),
+            }),
+            metrics=None
+        )
+    finally:
+        cache.close()
+
+
+@pytest.fixture
+def policy_df():
+    return pd.DataFrame([{"FULL_SIGN": "A", "METRIC_NAME": "SUM_SNDS", "BEST_MODEL": "BASELINE_OLS", "BEST_WINDOW": 60}])
+
+
+def test_reverted_data_reads_its_own_forecast(tmp_path, policy_df):
+    cache_file = str(tmp_path / "cache.sqlite")
+    df_a, df_b = _series(100.0), _series(200.0)
+
+    _put(cache_file, df_a, "BASELINE_OLS", 1.0)
+    _put(cache_file, df_b, "BASELINE_OLS", 2.0)  # записан позже
+
+    daily_df = build_policy_daily_forecasts(policy_df, SeriesStore.from_df(df_a), cache_file, [START_DATE])
+
+    assert len(daily_df) == 31
+    assert (daily_df["FORECAST"] == 1.0).all()
+    assert daily_df[["FULL_SIGN", "METRIC_NAME", "MODEL", "TRAIN_WINDOW_DAYS"]].drop_duplicates().values.tolist() == [
+        ["A", "SUM_SNDS", "BASELINE_OLS", 60]
+    ]
+    assert (daily_df["START_DATE"] == START_DATE).all()
+
+
+def test_changed_data_without_cell_is_absent(tmp_path, policy_df):
+    cache_file = str(tmp_path / "cache.sqlite")
+
+    _put(cache_file, _series(100.0), "BASELINE_OLS", 1.0)
+
+    daily_df = build_policy_daily_forecasts(policy_df, _series(300.0), cache_file, [START_DATE])
+
+    assert daily_df.empty
+    assert "FORECAST" in daily_df.columns
@@ -0,0 +1,140 @@
+# tests/test_policy_store.py
+"""
+    Хранилище policy (evaluation.policy_store) вместо policy_model.json:
+    - текущая policy связки = запись с самым поздним RUN_DATE (более старый запуск, записанный позже, её не меняет)
+    - история и даты запусков
+    - перенос policy JSON выполняется один раз
+"""
+
+import json
+
+import pandas as pd
+import pytest
+
+from evaluation.policy_store import PolicyStore, migrate_policy_json
+
+
+def _policy(rows: list[tuple]) -> pd.DataFrame:
+    return pd.DataFrame(
+        [
+            {"FULL_SIGN": full_sign, "METRIC_NAME": metric, "BEST_MODEL": model, "BEST_WINDOW": window}
+            for full_sign, metric, model, window in rows
+        ]
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    policy_store = PolicyStore(str(tmp_path / "policy.sqlite"))
+    yield policy_store
+    policy_store.close()
+
+
+def test_latest_is_newest_run_date(store):
+    store.append(_policy([("A", "SUM_SNDS", "OLS", 60), ("B", "SUM_SNDS", "OLS", 60)]), run_date="2025-11-01 10:00:00")
+    store.append(_policy([("A", "SUM_SNDS", "HOLT", 90)]), run_date="2025-12-01 10:00:00")
+
+    assert store.current("A", "SUM_SNDS")["BEST_MODEL"] == "HOLT"
+    assert store.current("A", "SUM_SNDS")["RUN_DATE"] == pd.Timestamp("2025-12-01 10:00:00")
+    assert store.current("B", "SUM_SNDS")["BEST_MODEL"] == "OLS"
+    assert store.current("C", "SUM_SNDS") is None
+
+
+def test_older_run_written_later_does_not_replace_latest(store):
+    store.append(_policy([("A", "SUM_SNDS", "HOLT", 90)]), run_date="2025-12-01 10:00:00")
+    store.append(_policy([("A", "SUM_SNDS", "OLS", 60)]), run_date="2025-11-01 10:00:00")
+
+    assert store.current("A", "SUM_SNDS")["BEST_MODEL"] == "HOLT"
+
+    # в историю старая запись всё равно попадает
+    assert len(store.history()) == 2
+
+
+def test_equal_run_date_later_write_wins(store):
+    store.append(_policy([("A", "SUM_SNDS", "OLS", 60)]), run_date="2025-12-01 10:00:00")
+    store.append(_policy([("A", "SUM_SNDS", "HOLT", 90)]), run_date="2025-12-01 10:00:00")
+
+    assert store.current("A", "SUM_SNDS")["BEST_MODEL"] == "HOLT"
+
+
+def test_latest_policy_all_series(store):
+    store.append(_policy([("A", "SUM_SNDS", "OLS", 60), ("A", "SUM_PROFIT", "OLS", 60)]), run_date="2025-11-01 10:00:00")
+    store.append(_policy([("A", "SUM_PROFIT", "HOLT", 90)]), run_date="2025-12-01 10:00:00")
+
+    latest = store.latest_policy().set_index(["FULL_SIGN", "METRIC_NAME"])
+
+    assert len(latest) == 2
+    assert latest.loc[("A", "SUM_SNDS"), "BEST_MODEL"] == "OLS"
+    assert latest.loc[("A", "SUM_PROFIT"), "BEST_MODEL"] == "HOLT"
+    assert latest.loc[("A", "SUM_PROFIT"), "RUN_DATE"] == pd.Timestamp("2025-12-01 10:00:00")
+
+
+def test_history_and_run_dates(store):
+    for run_date, model in [
+        ("2025-12-01 10:00:00", "HOLT"),
+        ("2025-10-01 10:00:00", "OLS"),
+        ("2025-11-01 10:00:00", "RF"),
+    ]:
+        store.append(_policy([("A", "SUM_SNDS", model, 60)]), run_date=run_date)
+
+    assert store.run_dates() == [
+        pd.Timestamp("2025-10-01 10:00:00"),
+        pd.Timestamp("2025-11-01 10:00:00"),
+        pd.Timestamp("2025-12-01 10:00:00"),
+    ]
+
+    # сортировка по RUN_DATE, границы включительно
+    assert store.history()["BEST_MODEL"].tolist() == ["OLS", "RF", "HOLT"]
+    assert store.history(run_date_from="2025-11-01 10:00:00")["BEST_MODEL"].tolist() == ["RF", "HOLT"]
+    assert store.history(run_date_to="2025-11-01 10:00:00")["BEST_MODEL"].tolist() == ["OLS", "RF"]
+    assert store.history("2025-10-15", "2025-11-15")["BEST_MODEL"].tolist() == ["RF"]
+    assert store.history(run_date_from="2026-01-01").empty
+
+
+def test_migrate_json_runs_once(store, tmp_path):
+    json_file = tmp_path / "policy_model.json"
+
+    records = [
+        {"FULL_SIGN": "A", "METRIC_NAME": "SUM_SNDS", "BEST_MODEL": "OLS", "BEST_WINDOW": 60,
+         "RUN_DATE": "2025-10-01 10:00:00"},
+        {"FULL_SIGN": "A", "METRIC_NAME": "SUM_SNDS", "BEST_MODEL": "HOLT", "BEST_WINDOW": 90,
+         "RUN_DATE": "2025-11-01 10:00:00"},
+    ]
+
+    json_file.write_text(json.dumps(records), encoding="utf-8")
+
+    assert store.migrate_json(str(json_file)) == 2
+    assert store.migrate_json(str(json_file)) == 0
+
+    # файл дописали после переноса - повторного переноса всё равно нет
+    json_file.write_text(json.dumps(records * 2), encoding="utf-8")
+    assert store.migrate_json(str(json_file)) == 0
+
+    assert len(store.history()) == 2
+    assert store.current("A", "SUM_SNDS")["BEST_MODEL"] == "HOLT"
+
+
+def test_migrate_missing_json(store, tmp_path):
+    assert store.migrate_json(str(tmp_path / "missing.json")) == 0
+
+
+def test_migrate_policy_json_once_across_runs(tmp_path):
+    store_file = str(tmp_path / "policy.sqlite")
+    json_file = tmp_path / "policy_model.json"
+
+    json_file.write_text(
+        json.dumps([{"FULL_SIGN": "A", "METRIC_NAME": "SUM_SNDS", "BEST_MODEL": "OLS", "BEST_WINDOW": 60,
+                     "RUN_DATE": "2025-10-01 10:00:00"}]),
+        encoding="utf-8"
+    )
+
+    # каждый запуск main вызывает перенос заново
+    assert migrate_policy_json(store_file, str(json_file)) == 1
+    assert migrate_policy_json(store_file, str(json_file)) == 0
+
+    store = PolicyStore(store_file)
+
+    try:
+        assert len(store.history()) == 1
+    finally:
+        store.close()
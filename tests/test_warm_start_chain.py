@@ -0,0 +1,72 @@
+# tests/test_warm_start_chain.py
+"""
+    Warm start по цепочке дат бэктеста (forecast.warm_start_direct_forecast):
+    - прогноз ячейки не зависит от того, какие ещё ячейки считаются в вызове
+      (racing-раунд с частью дат = полная сетка)
+    - более ранние даты цепочки входят в ключ ячейки, у обычных моделей - нет
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from evaluation.backtests_models_few_periods import backtest_cell_key
+
+DATES = [pd.Timestamp(date) for date in ["2025-10-01", "2025-10-10", "2025-10-20", "2025-11-01", "2025-11-10"]]
+
+
+def _long_df() -> pd.DataFrame:
+    from data.calendar_days import HOLIDAYS
+    from features.calendar_features import add_calendar_features
+
+    rng = np.random.default_rng(5)
+    dates = pd.date_range("2024-09-01", "2025-11-30")
+    day_of_week = np.array([1.0, 1.1, 1.05, 1.0, 0.9, 0.2, 0.1])
+
+    long_df = pd.DataFrame({
+        "DDATE": dates,
+        "SALES_SUBSPECIES": "A",
+        "SIGN_IRIS": "ИРИС",
+        "FULL_SIGN": "A",
+        "METRIC_NAME": "SUM_SNDS",
+        "METRIC_VALUE": 1e5 * day_of_week[dates.dayofweek] * rng.normal(1, 0.1, len(dates)),
+    })
+
+    return add_calendar_features(long_df, holidays=HOLIDAYS)
+
+
+def test_chain_dates_in_warm_start_key():
+    df = _long_df()
+
+    def key(model_key, chain_dates):
+        return backtest_cell_key(df, model_key, 120, DATES[2], chain_dates=chain_dates)
+
+    # более ранние даты цепочки меняют ключ warm start ячейки, более поздние - нет
+    assert key("LIGHTGBM_DIRECT_WARM", DATES) != key("LIGHTGBM_DIRECT_WARM", DATES[1:])
+    assert key("LIGHTGBM_DIRECT_WARM", DATES) == key("LIGHTGBM_DIRECT_WARM", DATES[:3])
+    assert key("LIGHTGBM_DIRECT_WARM", None) == key("LIGHTGBM_DIRECT_WARM", DATES[2:])
+
+    assert key("BASELINE_OLS", DATES) == key("BASELINE_OLS", DATES[1:])
+
+
+def test_cell_forecast_does_not_depend_on_requested_cells():
+    pytest.importorskip("lightgbm")
+
+    from forecast.warm_start_direct_forecast import FIT_MODE_WARM, warm_start_direct_cells
+
+    df = _long_df()
+    cells = [(120, "A", "SUM_SNDS", start_date) for start_date in DATES]
+
+    full = warm_start_direct_cells(df, cells, "LIGHTGBM", chain_dates=DATES)
+
+    # racing-раунд: только даты 3-4; промах кэша: только последняя дата
+    for subset in (cells[2:4], cells[-1:]):
+        partial = warm_start_direct_cells(df, subset, "LIGHTGBM", chain_dates=DATES)
+
+        for cell in subset:
+            pd.testing.assert_frame_equal(
+                partial[cell].drop(columns="FIT_SECONDS"),
+                full[cell].drop(columns="FIT_SECONDS")
+            )
+
+    assert full[cells[1]]["FIT_MODE"].iloc[0] == FIT_MODE_WARM
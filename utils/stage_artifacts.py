@@ -0,0 +1,162 @@
+# utils/stage_artifacts.py
+"""
+    Артефакты этапов пайплайна (cli.py): load -> features -> backtest -> policy -> forecast -> plot.
+
+    Каждый этап пишет результат в файл на диске, следующий этап читает его оттуда,
+    поэтому этапы запускаются по отдельности (например утренний прогноз без бэктеста).
+
+    Раскладка:
+        <root_dir>/<stage>/<input_hash[:16]><suffix>   - версия артефакта (одна на набор входов)
+        <root_dir>/<stage>/latest.json                 - манифест последней версии
+
+    Манифест:
+        STAGE, VERSION, INPUT_HASH, INPUTS (что вошло в хэш), PATH, OUTPUT_HASH (sha256 файла), CREATED_AT
+
+    Хэш входов = хэш от входов этапа (OUTPUT_HASH предыдущих этапов, настройки, версия кода).
+    Этап пропускается, если хэш входов совпадает с последним манифестом и файл на месте.
+    Хранится keep последних версий этапа (откат = поправить latest.json на старую версию).
+"""
+
+import datetime as dt
+import hashlib
+import json
+import os
+
+STAGE_ARTIFACT_VERSION = 1
+
+_MANIFEST_FILE = "latest.json"
+
+
+def hash_file(path: str) -> str:
+    """
+        sha256 содержимого файла.
+    """
+
+    digest = hashlib.sha256()
+
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def hash_inputs(stage: str, inputs: dict) -> str:
+    """
+        Хэш входов этапа (вместе с версией формата артефактов).
+    """
+
+    payload = json.dumps(
+        {"stage": stage, "version": STAGE_ARTIFACT_VERSION, "inputs": inputs},
+        sort_keys=True,
+        default=str
+    )
+
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class StageArtifactStore:
+    """
+        Версионированные артефакты этапов в каталоге root_dir.
+    """
+
+    def __init__(self, root_dir: str, keep: int = 3):
+        self.root_dir = root_dir
+        self.keep = keep
+
+    def _stage_dir(self, stage: str) -> str:
+        return os.path.join(self.root_dir, stage)
+
+    def latest(self, stage: str) -> dict | None:
+        """
+            Манифест последней версии этапа (None, если этап ещё не запускался или файл удалён).
+        """
+
+        path = os.path.join(self._stage_dir(stage), _MANIFEST_FILE)
+
+        if not os.path.exists(path):
+            return None
+
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        if manifest.get("VERSION") != STAGE_ARTIFACT_VERSION or not os.path.exists(manifest["PATH"]):
+            return None
+
+        return manifest
+
+    def run(
+            self,
+            stage: str,
+            inputs: dict,
+            build,
+            suffix: str,
+            force: bool = False
+    ) -> dict:
+        """
+            Запускает этап, если его входы изменились (или force), иначе отдаёт последний артефакт.
+
+            :param inputs: входы этапа (json-сериализуемые; хэши артефактов, настройки)
+            :param build: функция (path) -> None, пишет артефакт в path
+            :param suffix: расширение файла артефакта (".parquet", ".json")
+            :param force: пересчитать, даже если входы не изменились
+            :return: манифест артефакта
+        """
+
+        input_hash = hash_inputs(stage, inputs)
+
+        manifest = self.latest(stage)
+
+        if not force and manifest is not None and manifest["INPUT_HASH"] == input_hash:
+            print(f"\n✅ Этап {stage}: входы не изменились, артефакт {manifest['PATH']}")
+            return manifest
+
+        stage_dir = self._stage_dir(stage)
+        os.makedirs(stage_dir, exist_ok=True)
+
+        path = os.path.join(stage_dir, input_hash[:16] + suffix)
+        tmp_path = path + ".tmp" + suffix
+
+        build(tmp_path)
+        os.replace(tmp_path, path)
+
+        manifest = {
+            "STAGE": stage,
+            "VERSION": STAGE_ARTIFACT_VERSION,
+            "INPUT_HASH": input_hash,
+            "INPUTS": inputs,
+            "PATH": path,
+            "OUTPUT_HASH": hash_file(path),
+            "CREATED_AT": dt.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+        manifest_path = os.path.join(stage_dir, _MANIFEST_FILE)
+
+        with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=4, default=str)
+
+        os.replace(manifest_path + ".tmp", manifest_path)
+
+        self._prune(stage, keep_path=path)
+
+        print(f"\n✅ Этап {stage}: артефакт {path}")
+
+        return manifest
+
+    def _prune(self, stage: str, keep_path: str):
+        # оставляем keep последних версий (по времени изменения), текущую - всегда
+        stage_dir = self._stage_dir(stage)
+
+        versions = sorted(
+            (
+                os.path.join(stage_dir, name)
+                for name in os.listdir(stage_dir)
+                if name != _MANIFEST_FILE and ".tmp" not in name
+            ),
+            key=os.path.getmtime,
+            reverse=True
+        )
+
+        for path in versions[self.keep:]:
+            if path != keep_path:
+                os.remove(path)